@@ -0,0 +1,190 @@
+# account_cache.py
+"""
+Short-lived cache of positions, balance and last prices for the trading loop.
+
+refresh() pulls all three in one parallel round at the start of a decision
+cycle; the rest of the cycle reads from memory. Fills update the cache
+locally from the order response, and reconcile() periodically compares the
+local view with the exchange.
+
+All caches submit their fetches to one process-wide thread pool, so N bots
+share POOL_WORKERS threads instead of starting three each.
+"""
+import os
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+
+POSITIONS = 'positions'
+BALANCE = 'balance'
+PRICES = 'prices'
+POOL_WORKERS = int(os.getenv("ACCOUNT_POOL_WORKERS", 16))
+
+_pool: Optional[ThreadPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def get_pool() -> ThreadPoolExecutor:
+    """Process-wide pool for the parallel fetches of every AccountCache."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(max_workers=POOL_WORKERS, thread_name_prefix="account-cache")
+        return _pool
+
+
+class AccountCache:
+    """
+    - exchange: synchronous ccxt client
+    - symbols: symbols whose positions and prices are tracked
+    - max_age: seconds after which an entry is refetched on access
+    - reconcile_interval: seconds between full comparisons with the exchange
+    The local balance update after a close assumes `total` USDT is the wallet
+    (realized) balance; reconcile() corrects any drift.
+    """
+
+    def __init__(self, exchange, symbols: List[str], contract_size: float, max_age: float = 10.0,
+                 reconcile_interval: float = 300.0, log_cb: Optional[Callable[[str], None]] = None):
+        self.exchange = exchange
+        self.symbols = list(symbols)
+        self.contract_size = contract_size
+        self.max_age = max_age
+        self.reconcile_interval = reconcile_interval
+        self.log = log_cb or (lambda s: print(s))
+        self._positions: Dict[str, Optional[Dict]] = {}
+        self._prices: Dict[str, float] = {}
+        self._balance: Optional[float] = None
+        self._stamps: Dict[str, float] = {}
+        self._last_reconcile = time.monotonic()
+        self._lock = threading.RLock()
+
+    # ---- fetching ----
+    def _fetch_positions(self) -> Dict[str, Optional[Dict]]:
+        positions: Dict[str, Optional[Dict]] = {s: None for s in self.symbols}
+        for p in self.exchange.fetch_positions(self.symbols):
+            if float(p['contracts']) > 0 and positions.get(p['symbol']) is None:
+                positions[p['symbol']] = p
+        return positions
+
+    def _fetch_prices(self) -> Dict[str, float]:
+        if len(self.symbols) == 1:
+            return {self.symbols[0]: self.exchange.fetch_ticker(self.symbols[0])['last']}
+        tickers = self.exchange.fetch_tickers(self.symbols)
+        return {s: tickers[s]['last'] for s in self.symbols}
+
+    def _fetch_balance(self) -> float:
+        return self.exchange.fetch_balance()['total']['USDT']
+
+    def _store(self, key: str, value):
+        with self._lock:
+            if key == POSITIONS:
+                self._positions = value
+            elif key == PRICES:
+                self._prices.update(value)
+            else:
+                self._balance = value
+            self._stamps[key] = time.monotonic()
+
+    def refresh(self, balance: bool = True):
+        """Fetch positions, prices and (optionally) balance concurrently: one round-trip of latency."""
+        jobs = {POSITIONS: self._fetch_positions, PRICES: self._fetch_prices}
+        if balance:
+            jobs[BALANCE] = self._fetch_balance
+        pool = get_pool()
+        futures = {key: pool.submit(fn) for key, fn in jobs.items()}
+        for key, fut in futures.items():
+            self._store(key, fut.result())
+
+    def _fresh(self, key: str) -> bool:
+        stamp = self._stamps.get(key)
+        return stamp is not None and time.monotonic() - stamp < self.max_age
+
+    def invalidate(self, *keys: str):
+        """Drop cached entries (all of them when called without arguments)."""
+        with self._lock:
+            for key in keys or (POSITIONS, BALANCE, PRICES):
+                self._stamps.pop(key, None)
+
+    # ---- reads ----
+    def position(self, symbol: str) -> Optional[Dict]:
+        if not self._fresh(POSITIONS):
+            self._store(POSITIONS, self._fetch_positions())
+        return self._positions.get(symbol)
+
+    def last_price(self, symbol: str) -> float:
+        if not self._fresh(PRICES) or symbol not in self._prices:
+            self._store(PRICES, self._fetch_prices())
+        return self._prices[symbol]
+
+    def balance(self) -> float:
+        if not self._fresh(BALANCE):
+            self._store(BALANCE, self._fetch_balance())
+        return self._balance
+
+    def equity(self, symbol: str, price: float) -> Optional[float]:
+        """Balance plus the unrealized PnL of `symbol` at `price`, from cached values only (never fetches)."""
+        with self._lock:
+            if self._balance is None:
+                return None
+            pos = self._positions.get(symbol)
+            if not pos or not pos.get('entryPrice'):
+                return self._balance
+            direction = 1 if pos['side'] == 'long' else -1
+            return self._balance + direction * float(pos['contracts']) * self.contract_size * (
+                price - float(pos['entryPrice']))
+
+    # ---- local updates ----
+    def apply_fill(self, symbol: str, order: Optional[Dict], side: str, amount: float, reduce_only: bool = False):
+        """Update position and balance from a market order response without refetching."""
+        order = order or {}
+        price = order.get('average') or order.get('price') or self._prices.get(symbol)
+        fee = (order.get('fee') or {}).get('cost') or 0.0
+        with self._lock:
+            pos = self._positions.get(symbol)
+            if reduce_only:
+                realized = 0.0
+                if pos:
+                    contracts = float(pos['contracts'])
+                    closed = min(float(amount), contracts)
+                    direction = 1 if pos['side'] == 'long' else -1
+                    if price:
+                        realized = direction * closed * self.contract_size * (price - float(pos['entryPrice']))
+                    left = contracts - closed
+                    self._positions[symbol] = {**pos, 'contracts': left} if left > 0 else None
+                if self._balance is not None:
+                    self._balance += realized - fee
+            else:
+                want = 'long' if side == 'buy' else 'short'
+                if pos and pos['side'] == want:
+                    contracts = float(pos['contracts']) + float(amount)
+                    entry = (float(pos['entryPrice']) * float(pos['contracts']) + (price or 0) * float(amount)) / contracts
+                    self._positions[symbol] = {**pos, 'contracts': contracts, 'entryPrice': entry}
+                else:
+                    self._positions[symbol] = {
+                        'symbol': symbol, 'side': want, 'contracts': float(amount),
+                        'entryPrice': price, 'markPrice': price,
+                    }
+                if self._balance is not None:
+                    self._balance -= fee
+
+    # ---- reconciliation ----
+    def reconcile(self):
+        with self._lock:
+            local = {s: (p['side'], float(p['contracts'])) if p else None for s, p in self._positions.items()}
+        try:
+            self.refresh()
+        except Exception:
+            self.log(f"[WARN] Account reconcile failed: {traceback.format_exc()}")
+            return
+        for symbol in self.symbols:
+            p = self._positions.get(symbol)
+            remote = (p['side'], float(p['contracts'])) if p else None
+            if symbol in local and local[symbol] != remote:
+                self.log(f"[WARN] Position cache drift on {symbol}: local={local[symbol]} exchange={remote}")
+        self._last_reconcile = time.monotonic()
+
+    def maybe_reconcile(self):
+        if time.monotonic() - self._last_reconcile >= self.reconcile_interval:
+            self.reconcile()
@@ -0,0 +1,255 @@
+# async_engine.py
+"""
+Asyncio engine that runs the trading strategy for many symbols/timeframes in
+one process.
+
+One event loop keeps the bar clock for every target. The per-target work goes
+through the same pieces as TradingBot: load_strategy()/feed() on a graph_for()
+graph, a DecisionJournal, a ReversalExecutor and trading_bot.decide(). These
+calls block, so they run in worker threads. Together the targets share:
+- one exchange_factory client, with one session, one markets table and one
+  rate limiter
+- one AccountCache over all symbols
+
+At every bar boundary the candle fetches of all due targets go out together.
+When any target signals, one account refresh (positions, tickers, balance)
+serves every symbol that flipped.
+
+MARGIN_PERCENT applies to the whole account. It is split evenly across the
+symbols, so N symbols together never commit more than MARGIN_PERCENT of the
+balance.
+"""
+import asyncio
+import os
+import sys
+import time
+import traceback
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+
+import dotenv
+
+import exchange_factory
+import trading_bot
+from account_cache import AccountCache
+from execution import ReversalExecutor
+from indicators import graph_for
+from metrics import REGISTRY as metrics, InstrumentedExchange
+from snapshot import DecisionJournal, SnapshotStore, check_against_exchange
+from strategies import feed, load_strategy
+from strategy import CONTRACT_SIZE, int_to_timeframe
+from trading_bot import decide, record_order_metrics
+
+TARGET_DEFAULTS = {
+    "TIMEFRAME_SECONDS": 300,
+    "LEVERAGE": 5.0,
+    "MARGIN_PERCENT": 50.0,
+    "CONTRACT_NUM": 0,
+}
+
+
+class SymbolState:
+    """Per symbol/timeframe strategy, journal and executor; built by MultiSymbolEngine.setup()."""
+
+    def __init__(self, target: Dict):
+        self.config = {**TARGET_DEFAULTS, **target}
+        self.symbol = self.config["SYMBOL"]
+        self.seconds = int(self.config["TIMEFRAME_SECONDS"])
+        self.timeframe = int_to_timeframe(self.seconds)
+        self.strategy = None
+        self.journal: Optional[DecisionJournal] = None
+        self.executor: Optional[ReversalExecutor] = None
+
+    @property
+    def label(self) -> str:
+        return f"{self.symbol} {self.timeframe}"
+
+
+class MultiSymbolEngine:
+    """
+    - config: EXCHANGE_NAME, API_KEY, API_SECRET and optional CANDLE_DELAY, HA_SEED_LIMIT, STRATEGY,
+      STRATEGY_PARAMS, EXECUTION_MODE, SNAPSHOT_DIR (empty: no snapshots), as for TradingBot
+    - targets: list of dicts with SYMBOL, TIMEFRAME_SECONDS, LEVERAGE, MARGIN_PERCENT, CONTRACT_NUM
+    - exchange: client to use instead of exchange_factory.get_exchange(), e.g. a simulator
+    """
+
+    def __init__(self, config: Dict, targets: List[Dict], log_cb: Optional[Callable[[str], None]] = None,
+                 exchange=None):
+        self.config = config.copy()
+        self.states = [SymbolState(t) for t in targets]
+        self.symbols = list(dict.fromkeys(s.symbol for s in self.states))
+        self.log_cb = log_cb or (lambda s: print(s))
+        self.candle_delay = float(self.config.get("CANDLE_DELAY", 2))
+        self.seed_limit = int(self.config.get("HA_SEED_LIMIT", trading_bot.HA_SEED_LIMIT))
+        self.exchange = exchange
+        self.account: Optional[AccountCache] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._stop: Optional[asyncio.Event] = None
+
+    def log(self, msg: str):
+        ts = time.strftime("%Y-%m-%d %H:%M:%S")
+        try:
+            self.log_cb(f"[{ts}] {msg}")
+        except Exception:
+            print("Log callback error:", traceback.format_exc())
+
+    # ---- setup ----
+    def _connect(self):
+        cfg = self.config
+        if self.exchange is None:
+            ex = exchange_factory.get_exchange(cfg.get("EXCHANGE_NAME", trading_bot.EXCHANGE_NAME),
+                                               cfg.get("API_KEY"), cfg.get("API_SECRET"),
+                                               cache_dir=trading_bot.CACHE_DIR,
+                                               markets_ttl=trading_bot.MARKETS_TTL_SECONDS)
+            self.exchange = InstrumentedExchange(ex, metrics) if metrics.enabled else ex
+        leverages = {}
+        for state in self.states:
+            if state.symbol not in self.exchange.markets:
+                raise ValueError(f"Symbol '{state.symbol}' not found in exchange markets")
+            if self.exchange.market(state.symbol).get('contract', False):
+                leverages[state.symbol] = int(state.config["LEVERAGE"])
+            else:
+                self.log(f"[WARN] {state.symbol} is not a contract market; leverage not set.")
+        for symbol, leverage in leverages.items():
+            exchange_factory.ensure_leverage(self.exchange, symbol, leverage, cache_dir=trading_bot.CACHE_DIR,
+                                             log_cb=self.log)
+        self.account = AccountCache(self.exchange, self.symbols, CONTRACT_SIZE,
+                                    reconcile_interval=trading_bot.RECONCILE_SECONDS, log_cb=self.log)
+        self.account.refresh(balance=any(int(s.config["CONTRACT_NUM"]) <= 0 for s in self.states))
+
+    def _build(self, state: SymbolState, store: Optional[SnapshotStore]):
+        cfg = {**self.config, **state.config}
+        # every symbol holds one position at a time: give each an equal share of the account's margin
+        settings = {**cfg, "MARGIN_PERCENT": float(cfg["MARGIN_PERCENT"]) / len(self.symbols)}
+        state.executor = ReversalExecutor(self.exchange, state.symbol, self.account, settings, CONTRACT_SIZE,
+                                          mode=cfg.get("EXECUTION_MODE", trading_bot.EXECUTION_MODE),
+                                          log_cb=self.log)
+        strategy = load_strategy(cfg.get("STRATEGY", trading_bot.STRATEGY),
+                                 cfg.get("STRATEGY_PARAMS", trading_bot.STRATEGY_PARAMS))
+        graph = graph_for(state.symbol, state.timeframe)
+        strategy.bind(graph)
+        state.journal = DecisionJournal(store, cfg.get("EXCHANGE_NAME", trading_bot.EXCHANGE_NAME), state.symbol,
+                                        state.timeframe, strategy)
+        since = (int(time.time()) // state.seconds - self.seed_limit) * state.seconds * 1000
+        snap = state.journal.restore(since) if graph.bars == 0 else None
+        history = self.exchange.fetch_ohlcv(state.symbol, state.timeframe, limit=self.seed_limit)[:-1]
+        seeded, _ = feed(strategy, history)
+        pos = self.account.position(state.symbol)
+        if snap:
+            self.log(f"{state.label}: restored snapshot from {datetime.fromtimestamp(snap['saved_at']).isoformat()}, "
+                     f"caught up {seeded} candles")
+            for msg in check_against_exchange(snap, pos):
+                self.log(f"{state.label}: {msg}")
+        else:
+            self.log(f"{state.label}: seeded {type(strategy).__name__} {strategy.params} with {seeded} candles")
+        state.journal.position_side = pos['side'] if pos else None
+        state.strategy = strategy
+
+    async def setup(self):
+        await asyncio.to_thread(self._connect)
+        snapshot_dir = self.config.get("SNAPSHOT_DIR", trading_bot.SNAPSHOT_DIR)
+        store = SnapshotStore(snapshot_dir) if snapshot_dir else None
+        # seed every target with one concurrent round of history fetches
+        results = await asyncio.gather(*(asyncio.to_thread(self._build, s, store) for s in self.states),
+                                       return_exceptions=True)
+        for state, r in zip(self.states, results):
+            if isinstance(r, Exception):
+                raise RuntimeError(f"{state.label}: setup failed: {r}") from r
+
+    # ---- main loop ----
+    async def run(self):
+        self._loop = asyncio.get_running_loop()
+        self._stop = asyncio.Event()
+        try:
+            await self.setup()
+            self.log(f"Engine started for {len(self.states)} targets on {len(self.symbols)} symbols")
+            while not self._stop.is_set():
+                now = time.time()
+                boundaries = {s.seconds: (now // s.seconds + 1) * s.seconds for s in self.states}
+                wake = min(boundaries.values())
+                try:
+                    await asyncio.wait_for(self._stop.wait(), timeout=wake + self.candle_delay - now)
+                    break
+                except asyncio.TimeoutError:
+                    pass
+                due = [s for s in self.states if boundaries[s.seconds] == wake]
+                try:
+                    await self.on_bar(due)
+                except Exception as e:
+                    self.log(f"[ERROR] cycle failed: {e}")
+                    self.log(traceback.format_exc())
+        finally:
+            self.log("Engine stopped")
+
+    def stop(self):
+        """Thread-safe stop request."""
+        if self._loop is not None and self._stop is not None:
+            self._loop.call_soon_threadsafe(self._stop.set)
+
+    def _fetch_closed(self, state: SymbolState) -> List[list]:
+        return self.exchange.fetch_ohlcv(state.symbol, state.timeframe, limit=7)[:-1]
+
+    async def on_bar(self, due: List[SymbolState]):
+        results = await asyncio.gather(*(asyncio.to_thread(self._fetch_closed, s) for s in due),
+                                       return_exceptions=True)
+        decisions: Dict[str, List[Tuple[SymbolState, Optional[str]]]] = {}
+        for state, candles in zip(due, results):
+            if isinstance(candles, Exception):
+                self.log(f"[ERROR] {state.label}: fetch_ohlcv failed: {candles}")
+                continue
+            with metrics.timer("stage", stage="strategy"):
+                new_bars, trend = feed(state.strategy, candles)
+            if not new_bars:
+                continue
+            self.log(f"{state.label}: {state.strategy.describe()} | signal: {trend}")
+            decisions.setdefault(state.symbol, []).append((state, trend))
+        if not decisions:
+            return
+        trading = [s for items in decisions.values() for s, trend in items if trend is not None and s.journal.is_new()]
+        if trading:
+            # one round of positions, tickers and balance for every symbol that trades on this bar
+            await asyncio.to_thread(self.account.refresh, any(s.executor.contract_num <= 0 for s in trading))
+        results = await asyncio.gather(*(asyncio.to_thread(self._decide_symbol, items)
+                                         for items in decisions.values()), return_exceptions=True)
+        for symbol, r in zip(decisions, results):
+            if isinstance(r, Exception):
+                self.log(f"[ERROR] {symbol}: decision failed: {r}")
+        await asyncio.to_thread(self.account.maybe_reconcile)
+
+    def _decide_symbol(self, items: List[Tuple[SymbolState, Optional[str]]]):
+        # several timeframes of one symbol deciding on the same bar are applied in order,
+        # each sized from the position the previous one left in the account cache
+        for state, trend in items:
+            if trend is not None and state.journal.is_new():
+                state.executor.prepare(refresh=False)
+            records = decide(state.journal, state.executor, trend)
+            record_order_metrics(records, state.strategy.last_ts, state.seconds)
+            for rec in records:
+                self.log(f"{state.label}: {rec['leg'].capitalize()} order: {rec['side']} {rec['amount']} "
+                         f"{state.symbol}, rtt {rec['rtt_ms']:.0f}ms")
+
+
+def targets_from_env() -> List[Dict]:
+    """SYMBOLS and TIMEFRAMES are comma-separated; every symbol runs on every timeframe."""
+    symbols = [s.strip() for s in os.getenv("SYMBOLS", os.getenv("SYMBOL", "BTC/USDT:USDT")).split(",") if s.strip()]
+    timeframes = [int(t) for t in os.getenv("TIMEFRAMES", os.getenv("TIMEFRAME_SECONDS", "300")).split(",")]
+    base = {
+        "LEVERAGE": float(os.getenv("LEVERAGE", 5)),
+        "MARGIN_PERCENT": float(os.getenv("MARGIN_PERCENT", 50)),
+        "CONTRACT_NUM": int(os.getenv("CONTRACT_NUM", 0)),
+    }
+    return [{**base, "SYMBOL": s, "TIMEFRAME_SECONDS": tf} for s in symbols for tf in timeframes]
+
+
+if __name__ == "__main__":
+    dotenv.load_dotenv()
+    config = {
+        "API_KEY": os.getenv("API_KEY"),
+        "API_SECRET": os.getenv("API_SECRET"),
+        "EXCHANGE_NAME": os.getenv("EXCHANGE", "xt").lower(),
+    }
+    engine = MultiSymbolEngine(config, targets_from_env())
+    try:
+        asyncio.run(engine.run())
+    except KeyboardInterrupt:
+        sys.exit(0)
@@ -0,0 +1,363 @@
+# backtest.py
+"""
+Event-driven backtester for the bot's strategies (Heikin-Ashi reversal by default).
+
+Historical candles go through the same steps as trading_bot.run():
+IndicatorGraph -> Strategy.on_bar() -> close the open position -> open a
+new one sized by position_amount(). Orders go to a SimulatedExchange that
+speaks the small subset of the ccxt API the bot uses.
+
+The signals are found first, in one pass (vectorized.ha_signals for the
+default Heikin-Ashi reversal, strategies.replay() for the others). Only the
+bars that signal then run through the Python order path. Equity between
+them is marked to market with NumPy. A year of 1m bars takes about a
+second for the default strategy, most of it in the order path of the bars
+that flip.
+"""
+import argparse
+import itertools
+import random
+import sys
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+import trading_bot
+from candle_store import CandleStore
+from indicators import IndicatorGraph
+from strategy import close_order_params, int_to_timeframe, open_order_params, position_amount
+from strategies import HAReversal, Strategy, load_strategy, replay
+from vectorized import TS, OPEN, CLOSE, UP, ha_signals, resample_ohlcv
+
+DEFAULT_CONFIG = {
+    "SYMBOL": trading_bot.SYMBOL,
+    "TIMEFRAME_SECONDS": trading_bot.TIMEFRAME_SECONDS,
+    "LEVERAGE": trading_bot.LEVERAGE,
+    "MARGIN_PERCENT": trading_bot.MARGIN_PERCENT,
+    "CONTRACT_NUM": trading_bot.CONTRACT_NUM,
+    "CONTRACT_SIZE": trading_bot.CONTRACT_SIZE,
+    "INITIAL_BALANCE": 1000.0,
+    "FEE_RATE": 0.0006,  # taker fee per side
+    "SLIPPAGE": 0.0,  # fraction of price paid on every fill
+    "WARMUP_BARS": 10,  # bars fed to the strategy before trading starts
+    "STRATEGY": trading_bot.STRATEGY,
+    "STRATEGY_PARAMS": trading_bot.STRATEGY_PARAMS,
+}
+
+
+class SimulatedExchange:
+    """
+    In-memory stand-in for a ccxt futures client.
+    Market orders fill at the price set with set_price(), USDT-margined linear contracts.
+    Orders with a positionSide param act on that leg (hedge mode); without it the
+    symbol has one net position (one-way mode).
+    """
+
+    def __init__(self, balance: float = 1000.0, contract_size: float = trading_bot.CONTRACT_SIZE,
+                 fee_rate: float = 0.0006, slippage: float = 0.0):
+        self.cash = float(balance)
+        self.contract_size = contract_size
+        self.fee_rate = fee_rate
+        self.slippage = slippage
+        self.fees_paid = 0.0
+        self.price = 0.0
+        self.timestamp = 0
+        self.positions: Dict[tuple, Dict] = {}  # (symbol, 'long'|'short') -> position
+        self.trades: List[Dict] = []
+        self._order_ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def set_price(self, price: float, timestamp: int = 0):
+        self.price = price
+        self.timestamp = timestamp
+
+    def unrealized_pnl(self, price: Optional[float] = None) -> float:
+        price = self.price if price is None else price
+        pnl = 0.0
+        for pos in self.positions.values():
+            direction = 1 if pos['side'] == 'long' else -1
+            pnl += direction * pos['contracts'] * self.contract_size * (price - pos['entryPrice'])
+        return pnl
+
+    def equity(self, price: Optional[float] = None) -> float:
+        return self.cash + self.unrealized_pnl(price)
+
+    def equity_curve(self, prices: np.ndarray) -> np.ndarray:
+        """equity() at each of `prices` with the positions held now; same float operations, so same values."""
+        pnl = np.zeros(len(prices))
+        for pos in self.positions.values():
+            direction = 1 if pos['side'] == 'long' else -1
+            pnl += direction * pos['contracts'] * self.contract_size * (prices - pos['entryPrice'])
+        return self.cash + pnl
+
+    # ---- ccxt-compatible surface ----
+    def fetch_ticker(self, symbol: str) -> Dict:
+        return {'symbol': symbol, 'last': self.price, 'timestamp': self.timestamp}
+
+    def fetch_balance(self) -> Dict:
+        # total is the wallet balance (realized PnL only), as AccountCache and ReversalExecutor.prepare() expect
+        total = self.cash
+        return {'total': {'USDT': total}, 'free': {'USDT': self.cash}, 'USDT': {'total': total, 'free': self.cash}}
+
+    def fetch_positions(self, symbols: Optional[List[str]] = None) -> List[Dict]:
+        out = []
+        for (symbol, _), pos in self.positions.items():
+            if symbols and symbol not in symbols:
+                continue
+            direction = 1 if pos['side'] == 'long' else -1
+            out.append({
+                'symbol': symbol,
+                'side': pos['side'],
+                'contracts': pos['contracts'],
+                'contractSize': self.contract_size,
+                'entryPrice': pos['entryPrice'],
+                'markPrice': self.price,
+                'unrealizedPnl': direction * pos['contracts'] * self.contract_size * (self.price - pos['entryPrice']),
+            })
+        return out
+
+    def create_market_order(self, symbol: str, side: str, amount, price=None, params: Optional[Dict] = None) -> Dict:
+        with self._lock:
+            return self._fill(symbol, side, amount, params or {})
+
+    def _fill(self, symbol: str, side: str, amount, params: Dict) -> Dict:
+        amount = float(amount)
+        if amount <= 0:
+            raise ValueError(f"Order amount must be positive, got {amount}")
+        fill = self.price * (1 + self.slippage) if side == 'buy' else self.price * (1 - self.slippage)
+        want = 'long' if side == 'buy' else 'short'
+        position_side = params.get('positionSide')
+        if position_side:
+            # hedge mode: the order only touches its own leg
+            leg = position_side.lower()
+            reducing = leg != want
+        else:
+            held = [k for k in ((symbol, 'long'), (symbol, 'short')) if k in self.positions]
+            leg = held[0][1] if held else want
+            reducing = leg != want
+        realized = 0.0
+        closed = 0.0
+        remainder = 0.0
+
+        if reducing:
+            pos = self.positions.get((symbol, leg))
+            if pos:
+                closed = min(amount, pos['contracts'])
+                direction = 1 if leg == 'long' else -1
+                realized = direction * closed * self.contract_size * (fill - pos['entryPrice'])
+                pos['contracts'] -= closed
+                if pos['contracts'] <= 0:
+                    del self.positions[(symbol, leg)]
+            if not position_side and not params.get('reduceOnly'):
+                remainder = amount - closed
+        elif not params.get('reduceOnly'):
+            remainder = amount
+
+        if remainder > 0:
+            pos = self.positions.get((symbol, want))
+            if pos:
+                total = pos['contracts'] + remainder
+                pos['entryPrice'] = (pos['entryPrice'] * pos['contracts'] + fill * remainder) / total
+                pos['contracts'] = total
+            else:
+                self.positions[(symbol, want)] = {'side': want, 'contracts': remainder, 'entryPrice': fill}
+
+        filled = closed + remainder
+        fee = filled * self.contract_size * fill * self.fee_rate
+        self.cash += realized - fee
+        self.fees_paid += fee
+        order = {
+            'id': str(next(self._order_ids)),
+            'symbol': symbol,
+            'type': 'market',
+            'side': side,
+            'amount': amount,
+            'filled': filled,
+            'average': fill,
+            'price': fill,
+            'status': 'closed',
+            'timestamp': self.timestamp,
+            'reduceOnly': bool(params.get('reduceOnly')),
+            'fee': {'cost': fee, 'currency': 'USDT'},
+            'info': {'realizedPnl': realized},
+        }
+        self.trades.append(order)
+        return order
+
+
+class LatencyExchange:
+    """
+    Wraps an exchange object and sleeps `latency` seconds (plus up to `jitter`)
+    before every method call, to time execution paths against realistic round-trips.
+    """
+
+    def __init__(self, inner, latency: float = 0.05, jitter: float = 0.0, seed: Optional[int] = None):
+        self._inner = inner
+        self.latency = latency
+        self.jitter = jitter
+        self._rng = random.Random(seed)
+
+    def __getattr__(self, name):
+        attr = getattr(self._inner, name)
+        if not callable(attr) or name.startswith('_'):
+            return attr
+
+        def delayed(*args, **kwargs):
+            time.sleep(self.latency + self._rng.random() * self.jitter)
+            return attr(*args, **kwargs)
+        return delayed
+
+
+def reverse_position(ex, symbol: str, trend: str, config: Dict) -> List[Dict]:
+    """The trend-flip branch of trading_bot.run(), without the logging and against any exchange object."""
+    orders = []
+    for pos in ex.fetch_positions([symbol]):
+        if float(pos['contracts']) > 0:
+            side, amount, position_side = close_order_params(pos)
+            orders.append(ex.create_market_order(symbol, side, amount, None, {
+                'reduceOnly': True,
+                'positionSide': position_side
+            }))
+            break
+    side, position_side = open_order_params(trend)
+    last_price = ex.fetch_ticker(symbol)['last']
+    contract_num = int(config["CONTRACT_NUM"])
+    usdt_balance = ex.fetch_balance()['total']['USDT'] if contract_num <= 0 else None
+    amount = position_amount(last_price, usdt_balance, contract_num, config["MARGIN_PERCENT"],
+                             config["LEVERAGE"], config["CONTRACT_SIZE"])
+    if amount > 0:
+        orders.append(ex.create_market_order(symbol, side, amount, None, {
+            'positionSide': position_side
+        }))
+    return orders
+
+
+def bar_spacing_ms(ohlcv: np.ndarray) -> int:
+    if len(ohlcv) < 2:
+        return 0
+    return int(np.median(np.diff(ohlcv[:, TS])))
+
+
+def strategy_signals(strategy: Strategy, data: np.ndarray, symbol: str = '',
+                     timeframe: str = '') -> List[Tuple[int, str]]:
+    """(row index, trend) for every bar on which `strategy` signals, in one pass over `data`."""
+    if type(strategy) is HAReversal:
+        # HAReversal signals exactly on the HA color flips, so NumPy can find them
+        _, _, _, _, flips, direction = ha_signals(data)
+        return [(i, 'up' if direction[i] == UP else 'down') for i in np.flatnonzero(flips).tolist()]
+    return replay(strategy, data.tolist(), symbol, timeframe)
+
+
+def backtest(ohlcv, config: Optional[Dict] = None) -> Dict:
+    """
+    Replay OHLCV rows (N x 6, ccxt layout) and return a result dict with
+    trades, equity curve, fees and summary statistics.
+    Rows finer than TIMEFRAME_SECONDS are resampled first.
+    """
+    cfg = {**DEFAULT_CONFIG, **(config or {})}
+    data = np.asarray(ohlcv, dtype=np.float64)
+    tf_ms = int(cfg["TIMEFRAME_SECONDS"]) * 1000
+    if len(data) and bar_spacing_ms(data) < tf_ms:
+        data = resample_ohlcv(data, int(cfg["TIMEFRAME_SECONDS"]))
+
+    symbol = cfg["SYMBOL"]
+    sim = SimulatedExchange(cfg["INITIAL_BALANCE"], cfg["CONTRACT_SIZE"], cfg["FEE_RATE"], cfg["SLIPPAGE"])
+    strategy = load_strategy(cfg["STRATEGY"], cfg["STRATEGY_PARAMS"])
+    strategy.bind(IndicatorGraph(symbol, int_to_timeframe(int(cfg["TIMEFRAME_SECONDS"])), history=2))
+    warmup = max(int(cfg["WARMUP_BARS"]), strategy.warmup)
+    n = len(data)
+    closes = data[:, CLOSE] if n else np.empty(0)
+    equity = np.empty(n, dtype=np.float64)
+
+    # strategies see every bar (stateful ones need the whole history); only signal bars trade
+    done = 0
+    for i, new_trend in strategy_signals(strategy, data, symbol, strategy.graph.timeframe):
+        if i < warmup:
+            continue
+        equity[done:i + 1] = sim.equity_curve(closes[done:i + 1])  # positions are fixed between signals
+        done = i + 1
+        if equity[i] > 0:
+            # the live bot acts just after the bar closes, i.e. around the next bar's open
+            fill = float(data[i + 1, OPEN]) if i + 1 < n else float(closes[i])
+            sim.set_price(fill, int(data[i, TS]) + tf_ms)
+            reverse_position(sim, symbol, new_trend, cfg)
+    equity[done:] = sim.equity_curve(closes[done:])
+
+    final_equity = float(equity[-1]) if n else float(cfg["INITIAL_BALANCE"])
+    if n:
+        peaks = np.maximum.accumulate(equity)
+        drawdown = float(np.max((peaks - equity) / np.where(peaks > 0, peaks, 1))) * 100
+    else:
+        drawdown = 0.0
+    return {
+        "config": cfg,
+        "trades": sim.trades,
+        "timestamps": data[:, TS].astype(np.int64) if n else np.empty(0, dtype=np.int64),
+        "equity": equity,
+        "fees": sim.fees_paid,
+        "num_trades": len(sim.trades),
+        "final_equity": final_equity,
+        "return_pct": (final_equity / cfg["INITIAL_BALANCE"] - 1) * 100,
+        "max_drawdown_pct": drawdown,
+    }
+
+
+def load_ohlcv_csv(path: str) -> np.ndarray:
+    """Read timestamp,open,high,low,close,volume rows; a header line is skipped if present."""
+    with open(path) as f:
+        first = f.readline()
+    skip = 0 if first[:1].isdigit() else 1
+    return np.loadtxt(path, delimiter=',', skiprows=skip, usecols=range(6), ndmin=2)
+
+
+def add_data_args(parser: argparse.ArgumentParser):
+    parser.add_argument("csv", nargs="?", help="CSV with timestamp,open,high,low,close,volume rows")
+    parser.add_argument("--store", nargs=3, metavar=("EXCHANGE", "SYMBOL", "TIMEFRAME"),
+                        help="read candles from the local candle store instead of a CSV")
+    parser.add_argument("--candle-dir", default=trading_bot.CANDLE_DIR)
+
+
+def load_data(args, parser: argparse.ArgumentParser) -> np.ndarray:
+    if args.store:
+        exchange_id, symbol, timeframe = args.store
+        return CandleStore(exchange_id=exchange_id, root=args.candle_dir).read(symbol, timeframe)
+    if not args.csv:
+        parser.error("either a CSV path or --store is required")
+    return load_ohlcv_csv(args.csv)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Backtest a strategy on OHLCV history")
+    add_data_args(parser)
+    parser.add_argument("--timeframe", type=int, default=DEFAULT_CONFIG["TIMEFRAME_SECONDS"])
+    parser.add_argument("--leverage", type=float, default=DEFAULT_CONFIG["LEVERAGE"])
+    parser.add_argument("--margin-percent", type=float, default=DEFAULT_CONFIG["MARGIN_PERCENT"])
+    parser.add_argument("--contract-num", type=int, default=DEFAULT_CONFIG["CONTRACT_NUM"])
+    parser.add_argument("--balance", type=float, default=DEFAULT_CONFIG["INITIAL_BALANCE"])
+    parser.add_argument("--fee-rate", type=float, default=DEFAULT_CONFIG["FEE_RATE"])
+    parser.add_argument("--strategy", default=DEFAULT_CONFIG["STRATEGY"],
+                        help="strategy name from strategies.STRATEGIES or module:Class")
+    parser.add_argument("--strategy-params", default=DEFAULT_CONFIG["STRATEGY_PARAMS"], help="JSON object")
+    args = parser.parse_args(argv)
+
+    result = backtest(load_data(args, parser), {
+        "TIMEFRAME_SECONDS": args.timeframe,
+        "LEVERAGE": args.leverage,
+        "MARGIN_PERCENT": args.margin_percent,
+        "CONTRACT_NUM": args.contract_num,
+        "INITIAL_BALANCE": args.balance,
+        "FEE_RATE": args.fee_rate,
+        "STRATEGY": args.strategy,
+        "STRATEGY_PARAMS": args.strategy_params,
+    })
+    print(f"Trades      : {result['num_trades']}")
+    print(f"Fees        : {result['fees']:.4f}")
+    print(f"Final equity: {result['final_equity']:.4f}")
+    print(f"Return      : {result['return_pct']:.2f}%")
+    print(f"Max drawdown: {result['max_drawdown_pct']:.2f}%")
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,282 @@
+# bench.py
+"""
+Offline benchmarks for the strategy hot path and the TradingBot lifecycle.
+
+Everything runs against backtest.SimulatedExchange on synthetic candles, so
+no network or API key is needed and runs are reproducible. Results are
+written as JSON; with --baseline the run is compared against a saved result
+and exits non-zero when a benchmark's median got slower than the tolerance.
+
+    python bench.py --out bench.json
+    python bench.py --baseline bench.json --tolerance 0.25
+"""
+import argparse
+import json
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+from account_cache import AccountCache
+from backtest import SimulatedExchange
+from execution import ReversalExecutor
+from indicators import IndicatorGraph
+from snapshot import DecisionJournal
+from strategies import DEFAULT_STRATEGY, feed, load_strategy
+from strategy import CONTRACT_SIZE, detect_trend_change, to_heikin_ashi
+from trading_bot import TradingBot, decide
+
+SYMBOL = "BTC/USDT:USDT"
+STEP_MS = 300_000
+SIZES = (10, 1_000, 100_000)
+TIMEFRAME = "5m"
+SETTINGS = {"CONTRACT_NUM": 0, "MARGIN_PERCENT": 50, "LEVERAGE": 5}
+
+
+def synthetic_ohlcv(n: int, seed: int = 1, start_price: float = 30000.0) -> List[List[float]]:
+    """Random-walk candles with a fixed seed."""
+    rng = random.Random(seed)
+    rows = []
+    price = start_price
+    for i in range(n):
+        o = price
+        c = o * (1 + rng.gauss(0, 0.002))
+        h = max(o, c) * (1 + abs(rng.gauss(0, 0.001)))
+        l = min(o, c) * (1 - abs(rng.gauss(0, 0.001)))
+        rows.append([i * STEP_MS, o, h, l, c, rng.uniform(1, 100)])
+        price = c
+    return rows
+
+
+def measure(fn: Callable[[], None], repeat: int, warmup: int = 1) -> Dict:
+    for _ in range(warmup):
+        fn()
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return _stats(times)
+
+
+def _stats(times: List[float]) -> Dict:
+    return {
+        'runs': len(times),
+        'median_s': statistics.median(times),
+        'mean_s': statistics.fmean(times),
+        'min_s': min(times),
+        'max_s': max(times),
+        'stdev_s': statistics.stdev(times) if len(times) > 1 else 0.0,
+    }
+
+
+def _repeat_for(n: int) -> int:
+    return max(5, min(200, 200_000 // max(n, 1)))
+
+
+def bench_heikin_ashi(sizes=SIZES) -> Dict[str, Dict]:
+    out = {}
+    for n in sizes:
+        candles = synthetic_ohlcv(n)
+        out[f"to_heikin_ashi[{n}]"] = measure(lambda: to_heikin_ashi(candles), _repeat_for(n))
+    return out
+
+
+def bench_detect_trend_change(sizes=SIZES) -> Dict[str, Dict]:
+    out = {}
+    for n in sizes:
+        ha = to_heikin_ashi(synthetic_ohlcv(n))
+        pairs = list(zip(ha, ha[1:]))
+
+        def scan():
+            for prev, cur in pairs:
+                detect_trend_change(prev, cur)
+
+        out[f"detect_trend_change[{n}]"] = measure(scan, _repeat_for(n))
+    return out
+
+
+class DecisionCycle:
+    """
+    The per-bar work of TradingBot._run_once() minus the candle wait, logging and snapshot files.
+    The strategy runs on a private graph, so repeated runs over the same candles start clean.
+    """
+
+    def __init__(self, exchange: SimulatedExchange, mode: str = 'sequential', strategy: str = DEFAULT_STRATEGY,
+                 params: Optional[Dict] = None):
+        self.exchange = exchange
+        self.strategy = load_strategy(strategy, params).bind(IndicatorGraph(SYMBOL, TIMEFRAME))
+        self.journal = DecisionJournal(None, 'sim', SYMBOL, TIMEFRAME, self.strategy)
+        self.account = AccountCache(exchange, [SYMBOL], CONTRACT_SIZE, log_cb=lambda s: None)
+        self.executor = ReversalExecutor(exchange, SYMBOL, self.account, SETTINGS, CONTRACT_SIZE,
+                                         mode=mode, log_cb=lambda s: None)
+        self.flips = 0
+
+    def seed(self, candles: List[List[float]]):
+        feed(self.strategy, candles)
+        self.journal.decided(None, [])
+
+    def step(self, window: List[List[float]]):
+        self.exchange.set_price(window[-1][4], int(window[-1][0]))
+        self.executor.prepare()
+        new_bars, trend = feed(self.strategy, window)
+        if not new_bars:
+            return
+        decide(self.journal, self.executor, trend)
+        if trend is not None:
+            self.flips += 1
+
+
+def bench_cycle(bars: int = 2_000) -> Dict[str, Dict]:
+    candles = synthetic_ohlcv(bars + 5)
+    cycle = DecisionCycle(SimulatedExchange())
+    cycle.seed(candles[:5])
+    times = []
+    for i in range(5, len(candles)):
+        window = candles[i - 4:i + 1]
+        start = time.perf_counter()
+        cycle.step(window)
+        times.append(time.perf_counter() - start)
+    stats = _stats(times)
+    stats['flips'] = cycle.flips
+    return {f"decision_cycle[{bars}]": stats}
+
+
+class _BenchExchange(SimulatedExchange):
+    """SimulatedExchange whose market is `candles`: fetch_ohlcv() ends with the forming bar, advance() moves one on."""
+
+    def __init__(self, candles: List[List[float]], bar: int):
+        super().__init__()
+        self.candles = candles
+        self.bar = bar
+        self.set_price(candles[bar][4], int(candles[bar][0]))
+
+    def market(self, symbol: str) -> Dict:
+        return {'symbol': symbol, 'contractSize': self.contract_size}
+
+    def fetch_ohlcv(self, symbol: str, timeframe: str = '1m', since=None, limit: Optional[int] = None):
+        rows = self.candles[:self.bar + 1]
+        return [list(r) for r in (rows[-limit:] if limit else rows)]
+
+    def advance(self):
+        self.bar = min(self.bar + 1, len(self.candles) - 1)
+        self.set_price(self.candles[self.bar][4], int(self.candles[self.bar][0]))
+
+
+class _BenchBot(TradingBot):
+    """
+    The real TradingBot cycle on a _BenchExchange. Only the wait is replaced: it moves the market
+    one bar on instead of sleeping until the next close, and records when the first decision was made.
+    """
+
+    def __init__(self, config: Dict, exchange: _BenchExchange):
+        super().__init__(config, log_cb=lambda s: None, exchange=exchange)
+        self.steps = 0
+        self.first_decision = threading.Event()
+        self.first_decision_at: Optional[float] = None
+
+    def _wait_next(self, started: float) -> bool:
+        self.steps += 1
+        self._client.advance()
+        if self.steps == 1:  # the first step only set up and seeded the strategy
+            return not self._stop_event.is_set()
+        if self.first_decision_at is None:
+            self.first_decision_at = time.perf_counter()
+            self.first_decision.set()
+        return super()._wait_next(started)
+
+
+def bench_lifecycle(iterations: int = 3) -> Dict[str, Dict]:
+    start_t, first_t, stop_t = [], [], []
+    candles = synthetic_ohlcv(60)
+    with tempfile.TemporaryDirectory() as snapshot_dir:
+        for i in range(iterations):
+            # a symbol per run: graph_for() graphs are process-wide, so a reused one would start warm
+            bot = _BenchBot({"SYMBOL": f"BENCH{i}/USDT:USDT", "TIMEFRAME_SECONDS": STEP_MS // 1000,
+                             "POLL_INTERVAL": 60, "HA_SEED_LIMIT": 50, "LOG_ASYNC": "false",
+                             "SNAPSHOT_DIR": snapshot_dir, **SETTINGS}, _BenchExchange(candles, 50))
+            t0 = time.perf_counter()
+            bot.start()
+            start_t.append(time.perf_counter() - t0)
+            bot.first_decision.wait(30)
+            first_t.append(bot.first_decision_at - t0)
+            t1 = time.perf_counter()
+            bot.stop()
+            stop_t.append(time.perf_counter() - t1)
+    return {
+        "bot_start": _stats(start_t),
+        "bot_time_to_first_decision": _stats(first_t),
+        "bot_stop": _stats(stop_t),
+    }
+
+
+def run_all(quick: bool = False) -> Dict:
+    sizes = SIZES[:2] if quick else SIZES
+    results: Dict[str, Dict] = {}
+    results.update(bench_heikin_ashi(sizes))
+    results.update(bench_detect_trend_change(sizes))
+    results.update(bench_cycle(200 if quick else 2_000))
+    results.update(bench_lifecycle(1 if quick else 3))
+    return {
+        'meta': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'created': time.strftime("%Y-%m-%dT%H:%M:%S"),
+            'quick': quick,
+        },
+        'results': results,
+    }
+
+
+def compare(current: Dict, baseline: Dict, tolerance: float, min_delta: float = 5e-5) -> List[str]:
+    """
+    Benchmarks whose median is more than `tolerance` (fraction) above the baseline.
+    Slowdowns under `min_delta` seconds are treated as timer noise.
+    """
+    regressions = []
+    for name, stats in current['results'].items():
+        base = baseline.get('results', {}).get(name)
+        if not base or base['median_s'] <= 0:
+            continue
+        ratio = stats['median_s'] / base['median_s']
+        stats['baseline_ratio'] = ratio
+        if ratio > 1 + tolerance and stats['median_s'] - base['median_s'] > min_delta:
+            regressions.append(f"{name}: {base['median_s'] * 1e3:.3f}ms -> {stats['median_s'] * 1e3:.3f}ms ({ratio:.2f}x)")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Offline benchmarks for the strategy and bot lifecycle")
+    parser.add_argument("--out", default=None, help="write results JSON here")
+    parser.add_argument("--baseline", default=None, help="results JSON to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed median slowdown, as a fraction")
+    parser.add_argument("--min-delta-ms", type=float, default=0.05, help="ignore slowdowns smaller than this")
+    parser.add_argument("--quick", action="store_true", help="smaller sizes and fewer runs")
+    args = parser.parse_args(argv)
+
+    report = run_all(args.quick)
+    regressions = []
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(report, json.load(f), args.tolerance, args.min_delta_ms / 1000)
+
+    for name, stats in report['results'].items():
+        ratio = f"  x{stats['baseline_ratio']:.2f}" if 'baseline_ratio' in stats else ""
+        print(f"{name:<36} median {stats['median_s'] * 1e3:10.3f}ms  min {stats['min_s'] * 1e3:10.3f}ms{ratio}")
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=2)
+    if regressions:
+        print("Regressions:")
+        for line in regressions:
+            print(f"  {line}")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
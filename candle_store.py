@@ -0,0 +1,170 @@
+# candle_store.py
+"""
+Local persistent OHLCV store.
+
+One flat binary file of float64 rows (timestamp, open, high, low, close, volume)
+per exchange/symbol/timeframe, sorted and unique by timestamp:
+
+    <root>/<exchange id>/<symbol>/<timeframe>.ohlcv
+
+Reads memory-map the file and binary-search the timestamp column, so a range
+query only touches the pages it returns. sync() fetches just the candles that
+are not on disk yet.
+"""
+import os
+import re
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from strategy import timeframe_to_seconds
+
+ROW_WIDTH = 6
+ROW_BYTES = ROW_WIDTH * 8
+PAGE_LIMIT = 1000
+
+
+def _safe_name(name: str) -> str:
+    return re.sub(r'[^A-Za-z0-9._-]', '_', name)
+
+
+class CandleStore:
+    """
+    On-disk candle cache bound to one ccxt exchange client.
+    - read(symbol, tf, since, until): rows in [since, until) as an (N, 6) array
+    - write(symbol, tf, rows): merge rows in, newer data wins on duplicate timestamps
+    - sync(symbol, tf, since): fetch only the missing head/tail from the exchange
+    - fill_gaps(symbol, tf): refetch holes inside the stored range
+    `exchange` may be None for offline use; pass `exchange_id` then.
+    """
+
+    def __init__(self, exchange=None, root: str = "candles", exchange_id: Optional[str] = None):
+        self.exchange = exchange
+        self.exchange_id = exchange_id or getattr(exchange, 'id', None) or 'unknown'
+        self.root = root
+        self._locks: Dict[Tuple[str, str], threading.Lock] = {}
+        self._locks_guard = threading.Lock()
+
+    def path(self, symbol: str, timeframe: str) -> str:
+        return os.path.join(self.root, _safe_name(self.exchange_id), _safe_name(symbol), f"{timeframe}.ohlcv")
+
+    def _lock(self, symbol: str, timeframe: str) -> threading.Lock:
+        with self._locks_guard:
+            return self._locks.setdefault((symbol, timeframe), threading.Lock())
+
+    def _map(self, symbol: str, timeframe: str) -> Optional[np.ndarray]:
+        path = self.path(symbol, timeframe)
+        try:
+            rows = os.path.getsize(path) // ROW_BYTES  # ignores a torn trailing row
+        except OSError:
+            return None
+        if rows == 0:
+            return None
+        return np.memmap(path, dtype=np.float64, mode='r', shape=(rows, ROW_WIDTH))
+
+    # ---- reads ----
+    def read(self, symbol: str, timeframe: str, since: Optional[int] = None, until: Optional[int] = None) -> np.ndarray:
+        mm = self._map(symbol, timeframe)
+        if mm is None:
+            return np.empty((0, ROW_WIDTH), dtype=np.float64)
+        ts = mm[:, 0]
+        lo = 0 if since is None else int(np.searchsorted(ts, since, 'left'))
+        hi = len(mm) if until is None else int(np.searchsorted(ts, until, 'left'))
+        return np.array(mm[lo:hi])
+
+    def latest(self, symbol: str, timeframe: str, n: int) -> np.ndarray:
+        mm = self._map(symbol, timeframe)
+        if mm is None:
+            return np.empty((0, ROW_WIDTH), dtype=np.float64)
+        return np.array(mm[-n:])
+
+    def bounds(self, symbol: str, timeframe: str) -> Optional[Tuple[int, int]]:
+        mm = self._map(symbol, timeframe)
+        if mm is None:
+            return None
+        return int(mm[0, 0]), int(mm[-1, 0])
+
+    def gaps(self, symbol: str, timeframe: str) -> List[Tuple[int, int]]:
+        """Missing [start, end) ranges between the first and last stored candle."""
+        mm = self._map(symbol, timeframe)
+        if mm is None:
+            return []
+        step = timeframe_to_seconds(timeframe) * 1000
+        ts = mm[:, 0]
+        holes = np.flatnonzero(np.diff(ts) > step)
+        return [(int(ts[i]) + step, int(ts[i + 1])) for i in holes]
+
+    # ---- writes ----
+    def write(self, symbol: str, timeframe: str, rows) -> int:
+        """Merge rows into the store and return how many new timestamps were added."""
+        new = np.asarray(rows, dtype=np.float64).reshape(-1, ROW_WIDTH)
+        if len(new) == 0:
+            return 0
+        path = self.path(symbol, timeframe)
+        with self._lock(symbol, timeframe):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            old = self._map(symbol, timeframe)
+            order = np.argsort(new[:, 0], kind='stable')
+            new = new[order]
+            if old is None or new[0, 0] > old[-1, 0]:
+                # fast path: pure tail append
+                _, idx = np.unique(new[::-1, 0], return_index=True)
+                new = new[::-1][idx]
+                with open(path, 'ab') as f:
+                    if old is not None:
+                        f.truncate(len(old) * ROW_BYTES)
+                    f.write(new.tobytes())
+                return len(new)
+            before = len(old)
+            # new rows first so np.unique keeps them over stale copies
+            merged = np.concatenate([new[::-1], np.asarray(old)])
+            _, idx = np.unique(merged[:, 0], return_index=True)
+            merged = merged[idx]
+            del old
+            tmp = path + '.tmp'
+            merged.tofile(tmp)
+            os.replace(tmp, path)
+            return len(merged) - before
+
+    # ---- exchange sync ----
+    def _fetch_range(self, symbol: str, timeframe: str, since: int, until: Optional[int] = None,
+                     limit: int = PAGE_LIMIT) -> int:
+        step = timeframe_to_seconds(timeframe) * 1000
+        now_ms = int(time.time() * 1000)
+        until = now_ms if until is None else until
+        added = 0
+        cursor = since
+        while cursor < until:
+            batch = self.exchange.fetch_ohlcv(symbol, timeframe=timeframe, since=cursor, limit=limit)
+            # keep finalized candles in the requested range only
+            batch = [c for c in batch if c[0] >= cursor and c[0] < until and c[0] + step <= now_ms]
+            if not batch:
+                break
+            added += self.write(symbol, timeframe, batch)
+            cursor = int(batch[-1][0]) + step
+        return added
+
+    def sync(self, symbol: str, timeframe: str, since: Optional[int] = None, limit: int = PAGE_LIMIT) -> int:
+        """
+        Bring the store up to the last finalized candle and return how many rows were added.
+        With `since`, also backfill the head so the store covers [since, now).
+        An empty store without `since` gets the most recent `limit` candles.
+        """
+        step = timeframe_to_seconds(timeframe) * 1000
+        bounds = self.bounds(symbol, timeframe)
+        if bounds is None:
+            if since is None:
+                since = (int(time.time() * 1000) // step - limit) * step
+            return self._fetch_range(symbol, timeframe, since, limit=limit)
+        first, last = bounds
+        added = 0
+        if since is not None and since < first:
+            added += self._fetch_range(symbol, timeframe, since, first, limit)
+        added += self._fetch_range(symbol, timeframe, last + step, limit=limit)
+        return added
+
+    def fill_gaps(self, symbol: str, timeframe: str, limit: int = PAGE_LIMIT) -> int:
+        return sum(self._fetch_range(symbol, timeframe, start, end, limit)
+                   for start, end in self.gaps(symbol, timeframe))
@@ -0,0 +1,240 @@
+# chart.py
+"""
+Live chart panel for the GUI: candles, Heikin-Ashi candles, trade markers
+and equity of the running bot, painted with QPainter from a ChartData.
+
+Only the visible bars are drawn. They come from the level of the min-max
+pyramid (chart_data.py) at which a bar is at least MIN_BAR_PX wide, so a
+repaint costs the same zoomed in on an hour or out on months. New bars
+are folded into the pyramid in O(log n), and the widget asks Qt for a
+repaint only if they land in view. Qt merges those requests into one paint
+per frame. Wheel zooms around the cursor, dragging pans, and a double click
+returns to following the last bar.
+"""
+import math
+import time
+from typing import Iterable, List, Optional, Tuple
+
+from PySide6.QtCore import QLineF, QPointF, QRectF, Qt
+from PySide6.QtGui import QColor, QPainter, QPen, QPolygonF
+from PySide6.QtWidgets import QWidget
+
+from chart_data import ChartData, LodSeries
+
+MIN_BAR_PX = 3          # narrowest bar drawn; wider spans switch to a coarser pyramid level
+DEFAULT_SPAN = 150      # bars across the view when following the last bar
+MIN_SPAN = 20
+AXIS_W = 70             # price labels on the right
+AXIS_H = 18             # time labels at the bottom
+PANELS = (("Candles", 0.45), ("Heikin-Ashi", 0.35), ("Equity", 0.20))
+
+UP = QColor(38, 166, 154)
+DOWN = QColor(239, 83, 80)
+GRID = QColor(60, 60, 60)
+TEXT = QColor(170, 170, 170)
+BACKGROUND = QColor(24, 24, 24)
+EQUITY = QColor(66, 135, 245)
+
+
+class ChartWidget(QWidget):
+    """
+    - apply(events): TradingBot chart events ('candles' / 'trade' / 'equity' tuples), oldest first
+    - span: bars across the view; right: bar index at the right edge, None while following the last bar
+    """
+
+    def __init__(self, parent: Optional[QWidget] = None):
+        super().__init__(parent)
+        self.data = ChartData()
+        self.span = float(DEFAULT_SPAN)
+        self.right: Optional[float] = None
+        self._drag: Optional[Tuple[float, float]] = None  # (mouse x, right) when the drag started
+        self.setMinimumHeight(260)
+        self.setAttribute(Qt.WidgetAttribute.WA_OpaquePaintEvent)
+
+    def clear(self):
+        self.data = ChartData()
+        self.span, self.right = float(DEFAULT_SPAN), None
+        self.update()
+
+    # ---- data ----
+    def apply(self, events: Iterable[tuple]):
+        start, end = self._range()
+        dirty = False
+        for event in events:
+            kind = event[0]
+            if kind == 'candles':
+                first = len(self.data)
+                if self.data.add_candles(event[1]):
+                    dirty = dirty or self.right is None or first < end
+            elif kind == 'trade':
+                self.data.add_trade(*event[1:])
+                dirty = dirty or start <= self.data.index_of(event[1]) < end
+            elif kind == 'equity':
+                self.data.add_equity(*event[1:])
+                dirty = dirty or start <= self.data.index_of(event[1]) < end
+        if dirty:
+            self.update()  # coalesced by Qt; nothing is drawn here
+
+    # ---- view ----
+    def _right(self) -> float:
+        return float(len(self.data)) if self.right is None else self.right
+
+    def _range(self) -> Tuple[int, int]:
+        right = self._right()
+        return max(0, math.floor(right - self.span)), math.ceil(right)
+
+    def _plot_width(self) -> float:
+        return max(1.0, self.width() - AXIS_W)
+
+    def _set_right(self, right: float):
+        n = len(self.data)
+        right = max(min(self.span, n) * 0.2, right)
+        self.right = None if right >= n else right
+        self.update()
+
+    def wheelEvent(self, event):
+        steps = event.angleDelta().y() / 120
+        if not steps or not len(self.data):
+            return
+        right = self._right()
+        anchor = right - self.span * (1 - event.position().x() / self._plot_width())
+        span = min(max(MIN_SPAN, self.span * 0.8 ** steps), max(MIN_SPAN, len(self.data) * 1.1))
+        factor, self.span = span / self.span, span
+        self._set_right(anchor + (right - anchor) * factor)
+
+    def mousePressEvent(self, event):
+        if event.button() == Qt.MouseButton.LeftButton:
+            self._drag = (event.position().x(), self._right())
+
+    def mouseMoveEvent(self, event):
+        if self._drag is not None:
+            x, right = self._drag
+            self._set_right(right - (event.position().x() - x) * self.span / self._plot_width())
+
+    def mouseReleaseEvent(self, event):
+        self._drag = None
+
+    def mouseDoubleClickEvent(self, event):
+        self.span, self.right = float(DEFAULT_SPAN), None
+        self.update()
+
+    # ---- painting ----
+    def paintEvent(self, event):
+        p = QPainter(self)
+        p.fillRect(self.rect(), BACKGROUND)
+        if not len(self.data):
+            p.setPen(TEXT)
+            p.drawText(self.rect(), Qt.AlignmentFlag.AlignCenter, "Waiting for candles...")
+            p.end()
+            return
+        left = self._right() - self.span
+        start, end = self._range()
+        width = self._plot_width()
+        top, height = 0.0, self.height() - AXIS_H
+        rects = []
+        for _, share in PANELS:
+            rects.append(QRectF(0, top + 4, width, height * share - 8))
+            top += height * share
+        self._candles(p, rects[0], self.data.candles, left, start, end, PANELS[0][0], markers=True)
+        self._candles(p, rects[1], self.data.ha, left, start, end, PANELS[1][0])
+        self._equity(p, rects[2], left, start, end)
+        self._time_axis(p, QRectF(0, self.height() - AXIS_H, width, AXIS_H), left)
+        p.end()
+
+    def _x(self, rect: QRectF, left: float, i: float) -> float:
+        return rect.left() + (i - left) * rect.width() / self.span
+
+    def _frame(self, p: QPainter, rect: QRectF, title: str, lo: float, hi: float):
+        p.setPen(GRID)
+        p.setBrush(Qt.BrushStyle.NoBrush)
+        p.drawRect(rect)
+        p.setPen(TEXT)
+        p.drawText(QPointF(rect.left() + 6, rect.top() + 14), title)
+        p.drawText(QPointF(rect.right() + 4, rect.top() + 10), f"{hi:.6g}")
+        p.drawText(QPointF(rect.right() + 4, rect.bottom()), f"{lo:.6g}")
+
+    @staticmethod
+    def _scale(rect: QRectF, lo: float, hi: float):
+        if hi <= lo:
+            hi, lo = hi + 1e-9, lo - 1e-9
+        k = rect.height() / (hi - lo)
+        return lambda v: rect.bottom() - (v - lo) * k
+
+    def _candles(self, p: QPainter, rect: QRectF, series: LodSeries, left: float, start: int, end: int,
+                 title: str, markers: bool = False):
+        size, bars = series.view(start, end, int(rect.width() // MIN_BAR_PX))
+        if not bars:
+            return
+        lo, hi = min(b[3] for b in bars), max(b[2] for b in bars)
+        self._frame(p, rect, title, lo, hi)
+        y = self._scale(rect, lo, hi)
+        bar_w = size * rect.width() / self.span
+        body_w = max(1.0, bar_w * 0.7)
+        wicks = {True: [], False: []}
+        bodies = {True: [], False: []}
+        p.save()
+        p.setClipRect(rect)
+        for i, o, h, l, c in bars:
+            x = self._x(rect, left, i + size / 2)
+            up = c >= o
+            wicks[up].append(QLineF(x, y(h), x, y(l)))
+            if bar_w >= MIN_BAR_PX:
+                top, bottom = y(max(o, c)), y(min(o, c))
+                bodies[up].append(QRectF(x - body_w / 2, top, body_w, max(1.0, bottom - top)))
+        for up, color in ((True, UP), (False, DOWN)):
+            p.setPen(QPen(color, 1))
+            p.drawLines(wicks[up])
+            p.setBrush(color)
+            p.drawRects(bodies[up])
+        if markers:
+            self._markers(p, rect, left, start, end, y)
+        p.restore()
+
+    def _markers(self, p: QPainter, rect: QRectF, left: float, start: int, end: int, y):
+        last_px: dict = {}
+        p.setPen(Qt.PenStyle.NoPen)
+        for i, side, price, leg in self.data.markers_between(start, end):
+            x = self._x(rect, left, i + 0.5)
+            if last_px.get(side) == int(x):
+                continue  # one marker per pixel column and side when zoomed out
+            last_px[side] = int(x)
+            yy = y(price)
+            if side == 'buy':
+                p.setBrush(UP)
+                p.drawPolygon(QPolygonF([QPointF(x, yy), QPointF(x - 5, yy + 9), QPointF(x + 5, yy + 9)]))
+            else:
+                p.setBrush(DOWN)
+                p.drawPolygon(QPolygonF([QPointF(x, yy), QPointF(x - 5, yy - 9), QPointF(x + 5, yy - 9)]))
+
+    def _equity(self, p: QPainter, rect: QRectF, left: float, start: int, end: int):
+        size, bars = self.data.equity.view(start, end, int(rect.width() // 2))
+        if not bars:
+            self._frame(p, rect, PANELS[2][0], 0.0, 0.0)
+            return
+        lo, hi = min(b[3] for b in bars), max(b[2] for b in bars)
+        self._frame(p, rect, PANELS[2][0], lo, hi)
+        y = self._scale(rect, lo, hi)
+        line: List[QPointF] = []
+        envelope: List[QLineF] = []
+        for i, o, h, l, c in bars:
+            x = self._x(rect, left, i + size / 2)
+            line.append(QPointF(x, y(c)))
+            if size > 1 and h > l:
+                envelope.append(QLineF(x, y(h), x, y(l)))  # min-max of the bars merged into this point
+        p.save()
+        p.setClipRect(rect)
+        p.setPen(QPen(EQUITY, 1))
+        p.drawLines(envelope)
+        p.drawPolyline(QPolygonF(line))
+        p.restore()
+
+    def _time_axis(self, p: QPainter, rect: QRectF, left: float):
+        ts = self.data.ts
+        p.setPen(TEXT)
+        labels = max(1, int(rect.width() // 140))
+        for k in range(labels + 1):
+            i = int(left + self.span * k / labels)
+            if 0 <= i < len(ts):
+                x = self._x(rect, left, i)
+                label = time.strftime("%m-%d %H:%M", time.localtime(ts[i] / 1000))
+                p.drawText(QPointF(x + 2, rect.bottom() - 4), label)
@@ -0,0 +1,153 @@
+# chart_data.py
+"""
+Chart-side storage for the GUI: candles, Heikin-Ashi candles, equity and
+trade markers, indexed by bar number.
+
+Each series is an LodSeries: a min-max level-of-detail pyramid. Level 0
+holds the bars as they arrive. Level k holds one bar per FACTOR**k level-0
+bars: the first open, the max high, the min low and the last close. So
+extremes are never lost when zoomed out. Appending a bar updates one entry
+per level. view() picks the finest level that fits the visible range into
+`max_points` bars, so a repaint costs O(pixels) however many months are
+loaded. Nothing here imports Qt.
+"""
+from array import array
+from bisect import bisect_left, bisect_right
+from typing import List, Optional, Sequence, Tuple
+
+from strategy import HeikinAshiEngine
+
+FACTOR = 4
+
+
+class LodSeries:
+    """OHLC values per bar index with a min-max pyramid; single values are stored with o = h = l = c."""
+
+    def __init__(self):
+        self.levels: List[Tuple[array, array, array, array]] = [self._level()]
+
+    @staticmethod
+    def _level() -> Tuple[array, array, array, array]:
+        return array('d'), array('d'), array('d'), array('d')
+
+    def __len__(self) -> int:
+        return len(self.levels[0][0])
+
+    def append(self, o: float, h: float, l: float, c: float):
+        self._fold(len(self), o, h, l, c)
+
+    def update(self, i: int, value: float):
+        """Fold another value into bar i (its high/low widen, its close moves)."""
+        if 0 <= i < len(self):
+            self._fold(i, value, value, value, value)
+
+    def update_last(self, value: float):
+        self.update(len(self) - 1, value)
+
+    def _fold(self, i: int, o: float, h: float, l: float, c: float):
+        n = max(len(self), i + 1)
+        k, size = 0, 1
+        while True:
+            if k == len(self.levels):
+                # a new top level starts from the old top's single bar, which covers everything before i
+                top = self._level()
+                for dst, src in zip(top, self.levels[-1]):
+                    dst.append(src[0])
+                self.levels.append(top)
+            opens, highs, lows, closes = self.levels[k]
+            j = i // size
+            if j == len(opens):
+                opens.append(o)
+                highs.append(h)
+                lows.append(l)
+                closes.append(c)
+            else:
+                if h > highs[j]:
+                    highs[j] = h
+                if l < lows[j]:
+                    lows[j] = l
+                if min((j + 1) * size, n) - 1 == i:
+                    closes[j] = c  # a coarse bar's close is its last bar's
+            if len(opens) == 1 and k > 0:
+                break  # the top level covers everything so far
+            k, size = k + 1, size * FACTOR
+
+    def value(self, i: int) -> float:
+        return self.levels[0][3][i]
+
+    def view(self, start: int, end: int, max_points: int) -> Tuple[int, List[Tuple[int, float, float, float, float]]]:
+        """
+        Bars covering indexes [start, end) at the finest level with at most max_points of them.
+        Returns (bar width in level-0 indexes, [(first index, o, h, l, c), ...]).
+        """
+        start, end = max(0, start), min(len(self), end)
+        if end <= start:
+            return 1, []
+        k, size = 0, 1
+        while k + 1 < len(self.levels) and (end - start) / size > max(1, max_points):
+            k, size = k + 1, size * FACTOR
+        opens, highs, lows, closes = self.levels[k]
+        j0, j1 = start // size, min(len(opens), -(-end // size))
+        return size, [(j * size, opens[j], highs[j], lows[j], closes[j]) for j in range(j0, j1)]
+
+    def range(self, start: int, end: int, max_points: int) -> Optional[Tuple[float, float]]:
+        """(min low, max high) over [start, end), read from the same level view() would use."""
+        _, bars = self.view(start, end, max_points)
+        if not bars:
+            return None
+        return min(b[3] for b in bars), max(b[2] for b in bars)
+
+
+class ChartData:
+    """
+    Everything the chart panel draws for one bot, one entry per closed bar.
+    - add_candles(rows): closed ccxt rows; HA is computed here the same way the bot does
+    - add_trade(ts, side, price, leg) / add_equity(ts, value): placed on the bar that opened at or before ts
+    """
+
+    def __init__(self):
+        self.ts = array('d')
+        self.candles = LodSeries()
+        self.ha = LodSeries()
+        self.equity = LodSeries()  # carried forward over bars without an update
+        self.markers: List[Tuple[int, str, float, str]] = []  # (bar index, side, price, leg), sorted
+        self._engine = HeikinAshiEngine(maxlen=0)
+
+    def __len__(self) -> int:
+        return len(self.ts)
+
+    def add_candles(self, rows: Sequence[Sequence[float]]) -> int:
+        """Append the rows newer than the last bar; returns how many were new."""
+        n = 0
+        for r in rows:
+            if self.ts and r[0] <= self.ts[-1]:
+                continue
+            self.ts.append(r[0])
+            self.candles.append(r[1], r[2], r[3], r[4])
+            ha = self._engine.update(r)
+            self.ha.append(ha.open, ha.high, ha.low, ha.close)
+            n += 1
+        return n
+
+    def index_of(self, ts: float) -> int:
+        return max(0, bisect_right(self.ts, ts) - 1)
+
+    def add_trade(self, ts: float, side: str, price: float, leg: str = ''):
+        i = self.index_of(ts)
+        self.markers.insert(bisect_left(self.markers, (i + 1,)), (i, side, price, leg))
+
+    def add_equity(self, ts: float, value: float):
+        if not self.ts:
+            return
+        i = self.index_of(ts)
+        equity = self.equity
+        if i < len(equity):
+            equity.update(i, value)  # a late or repeated update for a bar already drawn
+            return
+        last = equity.value(-1) if len(equity) else value
+        while len(equity) < i:
+            equity.append(last, last, last, last)
+        equity.append(value, value, value, value)
+
+    def markers_between(self, start: int, end: int) -> List[Tuple[int, str, float, str]]:
+        return self.markers[bisect_left(self.markers, (start,)):bisect_left(self.markers, (end,))]
@@ -1,11 +1,74 @@
 # cli.py
+import argparse
+import math
 import os
+import signal
+from strategy import int_to_timeframe
 from trading_bot import TradingBot
 import dotenv
 import time
 
+
+def run_supervised(config, symbols, per_worker, timeframes=None):
+    """One worker process per `per_worker` symbols; reads start/stop/status commands from stdin."""
+    from supervisor import BotSupervisor
+
+    sup = BotSupervisor(log_cb=lambda worker, line: print(f"[{worker}] {line}"))
+    groups = [symbols[i:i + per_worker] for i in range(0, len(symbols), per_worker)]
+    for group in groups:
+        sup.add("+".join(group), config, symbols=group, timeframes=timeframes)
+    sup.start_all()
+    print("Commands: status | start NAME | stop NAME | profile NAME start|stop [alloc] | quit")
+    try:
+        while True:
+            try:
+                line = input().strip()
+            except EOFError:
+                # no terminal attached: just keep the workers running
+                while True:
+                    time.sleep(1)
+            cmd, _, name = line.partition(" ")
+            try:
+                if cmd == "status":
+                    for worker, st in sup.status().items():
+                        print(f"{worker}: {st['state']} pid={st['pid']} restarts={st['restarts']} "
+                              f"uptime={st['uptime_s']:.0f}s last_exit={st['last_exit']}")
+                elif cmd == "start":
+                    sup.start(name)
+                elif cmd == "stop":
+                    sup.stop(name)
+                elif cmd == "profile":
+                    name, _, action = name.partition(" ")
+                    if action.startswith("start"):
+                        sup.call(name, "start_profiling", 0.01, action.endswith("alloc"))
+                    else:
+                        sup.call(name, "stop_profiling")
+                elif cmd == "quit":
+                    break
+                elif cmd:
+                    print(f"Unknown command: {cmd}")
+            except KeyError:
+                print(f"No worker named '{name}'. Workers: {', '.join(sup.names())}")
+            except RuntimeError as e:
+                print(e)
+    except KeyboardInterrupt:
+        pass
+    sup.close()
+
+
 if __name__ == "__main__":
     dotenv.load_dotenv()
+    parser = argparse.ArgumentParser(description="Run the trading bot")
+    parser.add_argument("--supervise", action="store_true",
+                        help="run bots in worker processes, restarted on crash")
+    parser.add_argument("--symbols", default=os.getenv("SYMBOLS", ""),
+                        help="comma-separated symbols for --supervise (default: SYMBOL)")
+    parser.add_argument("--symbols-per-worker", type=int, default=1)
+    parser.add_argument("--timeframes", default=os.getenv("TIMEFRAMES", ""),
+                        help="comma-separated timeframes in seconds to trade per symbol (default: TIMEFRAME_SECONDS); "
+                             "candles are resampled from BASE_TIMEFRAME, by default the smallest common one")
+    args = parser.parse_args()
+
     config = {
         "API_KEY": os.getenv("API_KEY"),
         "API_SECRET": os.getenv("API_SECRET"),
@@ -15,14 +78,32 @@ if __name__ == "__main__":
         "MARGIN_PERCENT": float(os.getenv("MARGIN_PERCENT", 50)),
         "TIMEFRAME_SECONDS": int(os.getenv("TIMEFRAME_SECONDS", 300)),  # default 5m
         "CONTRACT_NUM": int(os.getenv("CONTRACT_NUM", 0)),
+        "BASE_TIMEFRAME": os.getenv("BASE_TIMEFRAME", ""),
     }
+    timeframes = [int(t) for t in args.timeframes.split(",") if t.strip()]
+    if len(timeframes) > 1 and not config["BASE_TIMEFRAME"]:
+        config["BASE_TIMEFRAME"] = int_to_timeframe(math.gcd(*timeframes))
 
-    def print_log(s): print(s)
+    if args.supervise:
+        symbols = [s.strip() for s in args.symbols.split(",") if s.strip()] or [config["SYMBOL"]]
+        run_supervised(config, symbols, max(1, args.symbols_per_worker), timeframes)
+    else:
+        def print_log(s): print(s)
 
-    bot = TradingBot(config=config, log_cb=print_log)
-    bot.start()
-    try:
-        while True:
-            time.sleep(1)
-    except KeyboardInterrupt:
-        bot.stop()
+        bots = [TradingBot(config={**config, "TIMEFRAME_SECONDS": tf}, log_cb=print_log)
+                for tf in timeframes or [config["TIMEFRAME_SECONDS"]]]
+        for bot in bots:
+            bot.start()
+        def toggle_profiling(*_):
+            for bot in bots:
+                bot.toggle_profiling()
+
+        if hasattr(signal, "SIGUSR1"):
+            # kill -USR1 <pid> starts profiling, the next one writes the profile (PROFILE_DIR)
+            signal.signal(signal.SIGUSR1, toggle_profiling)
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            for bot in bots:
+                bot.stop()
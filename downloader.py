@@ -0,0 +1,183 @@
+# downloader.py
+"""
+Bulk historical OHLCV downloader into the local candle store.
+
+The requested range of every symbol is cut into chunks of a few pages; chunks
+are downloaded concurrently on a thread pool that shares one public
+exchange_factory client (no API keys, no leverage or symbol setup, so a
+download never touches the account). Request starts are paced by the client's rateLimit, so
+several requests can be in flight without exceeding the exchange's budget.
+Finished chunks are recorded in a checkpoint file and skipped on the next run.
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+import exchange_factory
+from candle_store import PAGE_LIMIT, CandleStore, timeframe_to_seconds
+from trading_bot import CACHE_DIR, CANDLE_DIR, EXCHANGE_NAME, MARKETS_TTL_SECONDS
+
+
+class RequestPacer:
+    """Spaces request starts at least `interval` seconds apart across threads."""
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._next = 0.0
+
+    def wait(self):
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next)
+            self._next = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+class Checkpoint:
+    """Set of finished chunk keys persisted as JSON, rewritten atomically."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self.done = set()
+        if os.path.exists(path):
+            with open(path) as f:
+                self.done = set(json.load(f).get("done", []))
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.done
+
+    def mark(self, key: str):
+        with self._lock:
+            self.done.add(key)
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            tmp = self.path + ".tmp"
+            with open(tmp, "w") as f:
+                json.dump({"done": sorted(self.done)}, f)
+            os.replace(tmp, self.path)
+
+
+def plan_chunks(symbol: str, timeframe: str, since: int, until: int,
+                chunk_pages: int, limit: int = PAGE_LIMIT) -> List[Tuple[str, str, int, int]]:
+    step = timeframe_to_seconds(timeframe) * 1000
+    width = step * limit * chunk_pages
+    start = since // step * step
+    return [(symbol, timeframe, s, min(s + width, until)) for s in range(start, until, width)]
+
+
+def chunk_key(chunk: Tuple[str, str, int, int]) -> str:
+    return "|".join(str(x) for x in chunk)
+
+
+class BulkDownloader:
+    def __init__(self, exchange, store: CandleStore, workers: int = 4,
+                 chunk_pages: int = 20, limit: int = PAGE_LIMIT, log_cb=print):
+        self.exchange = exchange
+        self.store = store
+        self.workers = workers
+        self.chunk_pages = chunk_pages
+        self.limit = limit
+        self.log = log_cb
+        self.pacer = RequestPacer(getattr(exchange, 'rateLimit', 0) / 1000
+                                  if getattr(exchange, 'enableRateLimit', True) else 0.0)
+        self.checkpoint = Checkpoint(os.path.join(store.root, store.exchange_id, "download-checkpoint.json"))
+
+    def _download_chunk(self, chunk: Tuple[str, str, int, int]) -> int:
+        symbol, timeframe, start, end = chunk
+        step = timeframe_to_seconds(timeframe) * 1000
+        now_ms = int(time.time() * 1000)
+        rows = []
+        cursor = start
+        while cursor < end:
+            self.pacer.wait()
+            batch = self.exchange.fetch_ohlcv(symbol, timeframe=timeframe, since=cursor, limit=self.limit)
+            batch = [c for c in batch if cursor <= c[0] < end and c[0] + step <= now_ms]
+            if not batch:
+                break
+            rows.extend(batch)
+            cursor = int(batch[-1][0]) + step
+        added = self.store.write(symbol, timeframe, rows)
+        # a chunk that reaches into the still-forming present is not final yet
+        if end + step <= now_ms:
+            self.checkpoint.mark(chunk_key(chunk))
+        return added
+
+    def download(self, symbols: List[str], timeframe: str, since: int, until: Optional[int] = None) -> Dict[str, int]:
+        until = until or int(time.time() * 1000)
+        chunks = []
+        for symbol in symbols:
+            chunks += plan_chunks(symbol, timeframe, since, until, self.chunk_pages, self.limit)
+        # interleave symbols, oldest chunks first, so most store writes are plain appends
+        chunks.sort(key=lambda c: c[2])
+        todo = [c for c in chunks if chunk_key(c) not in self.checkpoint]
+        self.log(f"{len(chunks)} chunks planned, {len(chunks) - len(todo)} already done")
+
+        added: Dict[str, int] = {s: 0 for s in symbols}
+        started = time.time()
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            futures = {pool.submit(self._download_chunk, c): c for c in todo}
+            for i, fut in enumerate(as_completed(futures), 1):
+                chunk = futures[fut]
+                try:
+                    added[chunk[0]] += fut.result()
+                except Exception as e:
+                    # leave it out of the checkpoint; the next run retries it
+                    self.log(f"[WARN] chunk {chunk_key(chunk)} failed: {e}")
+                if i % 10 == 0 or i == len(todo):
+                    self.log(f"{i}/{len(todo)} chunks, {time.time() - started:.1f}s")
+        return added
+
+    def missing(self, symbols: List[str], timeframe: str) -> Dict[str, List[Tuple[int, int]]]:
+        return {s: self.store.gaps(s, timeframe) for s in symbols}
+
+
+def parse_time(text: str) -> int:
+    if text.isdigit():
+        return int(text)
+    dt = datetime.fromisoformat(text)
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return int(dt.timestamp() * 1000)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Download OHLCV history into the local candle store")
+    parser.add_argument("symbols", nargs="+")
+    parser.add_argument("--exchange", default=EXCHANGE_NAME)
+    parser.add_argument("--timeframe", default="1m")
+    parser.add_argument("--since", required=True, help="ISO date/time (UTC) or epoch milliseconds")
+    parser.add_argument("--until", default=None, help="ISO date/time (UTC) or epoch milliseconds; default now")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--chunk-pages", type=int, default=20, help="pages per checkpointed chunk")
+    parser.add_argument("--limit", type=int, default=PAGE_LIMIT, help="candles per request")
+    parser.add_argument("--fill-gaps", action="store_true", help="refetch missing candles once after the download")
+    args = parser.parse_args(argv)
+
+    # public market data only: the bot's get_exchange() would also validate SYMBOL and set leverage
+    exchange = exchange_factory.get_exchange(args.exchange, cache_dir=CACHE_DIR, markets_ttl=MARKETS_TTL_SECONDS)
+    store = CandleStore(exchange, CANDLE_DIR)
+    downloader = BulkDownloader(exchange, store, args.workers, args.chunk_pages, args.limit)
+    until = parse_time(args.until) if args.until else None
+    added = downloader.download(args.symbols, args.timeframe, parse_time(args.since), until)
+    for symbol, n in added.items():
+        print(f"{symbol}: {n} new candles")
+
+    if args.fill_gaps:
+        for symbol in args.symbols:
+            store.fill_gaps(symbol, args.timeframe, args.limit)
+    for symbol, gaps in downloader.missing(args.symbols, args.timeframe).items():
+        step = timeframe_to_seconds(args.timeframe) * 1000
+        count = sum((end - start) // step for start, end in gaps)
+        print(f"{symbol}: {len(gaps)} gaps, {count} missing candles")
+
+
+if __name__ == '__main__':
+    sys.exit(main())
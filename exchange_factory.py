@@ -0,0 +1,127 @@
+# exchange_factory.py
+"""
+Lazy, reusable ccxt client construction with an on-disk cache.
+
+- get_exchange(): one client per (exchange, credentials) for the whole process, created on
+  first use; it shares one keep-alive session and one priority rate limiter (shared_exchange.py)
+- markets are loaded from <cache_dir>/markets-<exchange>.json while younger than the TTL,
+  so restarts skip the load_markets() download
+- ensure_leverage() skips set_leverage when the same value was set recently for that account
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Callable, Dict, Optional, Tuple
+
+from shared_exchange import PriorityRateLimiter, SharedExchange, configure_session
+
+MARKETS_TTL = 6 * 3600
+LEVERAGE_TTL = 24 * 3600
+CACHE_DIR = ".cache"
+
+_clients: Dict[Tuple[str, Optional[str], str], SharedExchange] = {}
+_clients_lock = threading.Lock()  # guards the dicts only; never held across a network call
+_key_locks: Dict[Tuple[str, Optional[str], str], threading.Lock] = {}
+_file_lock = threading.Lock()
+
+
+def _read_json(path: str) -> Optional[Dict]:
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_json(path: str, data: Dict):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(data, f, default=str)
+    os.replace(tmp, path)
+
+
+def load_markets_cached(exchange, cache_dir: str = CACHE_DIR, ttl: float = MARKETS_TTL) -> bool:
+    """Fill exchange.markets from the disk cache if fresh; returns True when it had to download."""
+    path = os.path.join(cache_dir, f"markets-{exchange.id}.json")
+    try:
+        fresh = time.time() - os.path.getmtime(path) < ttl
+    except OSError:
+        fresh = False
+    if fresh:
+        data = _read_json(path)
+        if data and data.get("markets"):
+            exchange.set_markets(data["markets"], data.get("currencies"))
+            return False
+    exchange.load_markets()
+    with _file_lock:
+        _write_json(path, {"markets": exchange.markets, "currencies": exchange.currencies})
+    return True
+
+
+def create_exchange(name: str, api_key: Optional[str] = None, secret: Optional[str] = None,
+                    cache_dir: str = CACHE_DIR, markets_ttl: float = MARKETS_TTL):
+    import ccxt  # deferred: importing ccxt alone takes a noticeable part of a second
+
+    exchange = getattr(ccxt, name)({
+        'apiKey': api_key,
+        'secret': secret,
+        'enableRateLimit': True,
+        'options': {'defaultType': 'future'},
+    })
+    load_markets_cached(exchange, cache_dir, markets_ttl)
+    return exchange
+
+
+def get_exchange(name: str, api_key: Optional[str] = None, secret: Optional[str] = None,
+                 cache_dir: str = CACHE_DIR, markets_ttl: float = MARKETS_TTL, burst: float = 1.0,
+                 pool_size: int = 32) -> SharedExchange:
+    """
+    Process-wide client for this account. ccxt's per-client throttle is replaced by a
+    limiter at the same rate (1000 / rateLimit requests/s, bursts up to `burst`) that
+    serves orders before account reads before market data.
+    """
+    key = (name, api_key, hashlib.sha256((secret or '').encode()).hexdigest()[:12])
+    with _clients_lock:
+        exchange = _clients.get(key)
+        if exchange is not None:
+            return exchange
+        key_lock = _key_locks.setdefault(key, threading.Lock())
+    # load_markets() may download: only callers of this same client wait for it
+    with key_lock:
+        with _clients_lock:
+            exchange = _clients.get(key)
+        if exchange is None:
+            inner = create_exchange(name, api_key, secret, cache_dir, markets_ttl)
+            rate = 1000 / inner.rateLimit if getattr(inner, 'rateLimit', 0) else 0.0
+            inner.enableRateLimit = False
+            configure_session(inner, pool_size)
+            exchange = SharedExchange(inner, PriorityRateLimiter(rate, burst))
+            with _clients_lock:
+                _clients[key] = exchange
+    return exchange
+
+
+def ensure_leverage(exchange, symbol: str, leverage: int, cache_dir: str = CACHE_DIR,
+                    ttl: float = LEVERAGE_TTL, log_cb: Optional[Callable[[str], None]] = None):
+    log = log_cb or (lambda s: print(s))
+    path = os.path.join(cache_dir, "leverage.json")
+    account = hashlib.sha256((getattr(exchange, 'apiKey', None) or '').encode()).hexdigest()[:12]
+    key = f"{exchange.id}|{account}|{symbol}"
+    with _file_lock:
+        cache = _read_json(path) or {}
+    entry = cache.get(key)
+    if entry and entry.get("leverage") == leverage and time.time() - entry.get("ts", 0) < ttl:
+        return
+    try:
+        exchange.set_leverage(leverage, symbol, {'positionSide': 'LONG'})
+        exchange.set_leverage(leverage, symbol, {'positionSide': 'SHORT'})
+    except Exception as e:
+        log(f"[WARN] Could not set leverage: {e}")
+        return
+    with _file_lock:
+        cache = _read_json(path) or {}
+        cache[key] = {"leverage": leverage, "ts": time.time()}
+        _write_json(path, cache)
@@ -0,0 +1,141 @@
+# execution.py
+"""
+Low-latency execution of position reversals.
+
+ReversalExecutor.prepare() runs shortly before the bar closes: it reads the
+position, price and balance from the AccountCache and works out both order
+legs, rounded with the cached market precision. When the flip is confirmed,
+execute() only sends orders:
+- sequential: close, then open (the original behaviour)
+- pipelined: close and open are independent in hedge mode, so both go out at once
+- reverse: one-way mode; a single order of close + open size flips the position
+Every order gets prepared/sent/acked timestamps in `history`.
+"""
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+
+from account_cache import AccountCache
+from strategy import close_order_params, open_order_params, position_amount
+
+MODES = ('sequential', 'pipelined', 'reverse')
+
+
+class ReversalPlan:
+    __slots__ = ('prepared_at', 'price', 'position', 'close_leg', 'open_amount')
+
+    def __init__(self, prepared_at: float, price: float, position: Optional[Dict],
+                 close_leg: Optional[tuple], open_amount: int):
+        self.prepared_at = prepared_at
+        self.price = price
+        self.position = position
+        self.close_leg = close_leg
+        self.open_amount = open_amount
+
+
+class ReversalExecutor:
+    """
+    - settings: CONTRACT_NUM, MARGIN_PERCENT, LEVERAGE for sizing
+    - contract_size: fallback when the market does not report contractSize
+    - max_plan_age: a plan older than this is rebuilt inside execute()
+    """
+
+    def __init__(self, exchange, symbol: str, account: AccountCache, settings: Dict, contract_size: float,
+                 mode: str = 'sequential', max_plan_age: float = 60.0,
+                 log_cb: Optional[Callable[[str], None]] = None):
+        if mode not in MODES:
+            raise ValueError(f"Unknown execution mode '{mode}', expected one of {MODES}")
+        self.exchange = exchange
+        self.symbol = symbol
+        self.account = account
+        self.contract_num = int(settings.get("CONTRACT_NUM", 0))
+        self.margin_percent = float(settings.get("MARGIN_PERCENT", 0))
+        self.leverage = float(settings.get("LEVERAGE", 1))
+        self.mode = mode
+        self.max_plan_age = max_plan_age
+        self.log = log_cb or (lambda s: print(s))
+        market = exchange.market(symbol) if hasattr(exchange, 'market') else {}
+        self.contract_size = float(market.get('contractSize') or contract_size)
+        self._can_round = bool(market) and hasattr(exchange, 'amount_to_precision')
+        self.plan: Optional[ReversalPlan] = None
+        self.history: deque = deque(maxlen=1000)
+        self._pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="execution") if mode == 'pipelined' else None
+
+    def _round(self, amount: float) -> float:
+        if not self._can_round:
+            return amount
+        return float(self.exchange.amount_to_precision(self.symbol, amount))
+
+    def prepare(self, refresh: bool = True) -> ReversalPlan:
+        """Refresh account state (refresh=False: the caller just did) and precompute the order legs."""
+        if refresh:
+            self.account.refresh(balance=self.contract_num <= 0)
+        pos = self.account.position(self.symbol)
+        price = self.account.last_price(self.symbol)
+        balance = None
+        if self.contract_num <= 0:
+            balance = self.account.balance()
+            if pos:
+                # size the new leg from the balance the close will leave behind
+                direction = 1 if pos['side'] == 'long' else -1
+                balance += direction * float(pos['contracts']) * self.contract_size * (price - float(pos['entryPrice']))
+        amount = position_amount(price, balance, self.contract_num, self.margin_percent,
+                                 self.leverage, self.contract_size)
+        self.plan = ReversalPlan(time.time(), price, pos, close_order_params(pos) if pos else None,
+                                 self._round(amount))
+        return self.plan
+
+    def _send(self, prepared_at: float, leg: str, side: str, amount: float, params: Dict) -> Dict:
+        rec = {'leg': leg, 'side': side, 'amount': amount, 'prepared_at': prepared_at,
+               'sent_at': time.time()}
+        order = self.exchange.create_market_order(self.symbol, side, amount, None, params)
+        rec['acked_at'] = time.time()
+        rec['rtt_ms'] = (rec['acked_at'] - rec['sent_at']) * 1000
+        rec['order'] = order
+        rec['order_id'] = (order or {}).get('id')
+        self.history.append(rec)
+        return rec
+
+    def execute(self, trend: str) -> List[Dict]:
+        """Close the open position (if any) and open `trend`, with the fewest round-trips the mode allows."""
+        if self.plan is None or time.time() - self.plan.prepared_at > self.max_plan_age:
+            self.prepare()
+        plan, self.plan = self.plan, None
+        side, position_side = open_order_params(trend)
+        records: List[Dict] = []
+
+        if plan.close_leg and self.mode == 'reverse':
+            close_side, close_amount, _ = plan.close_leg
+            if close_side == side and plan.open_amount > 0:
+                rec = self._send(plan.prepared_at, 'reverse', side, close_amount + plan.open_amount, {})
+                self.account.apply_fill(self.symbol, rec['order'], side, close_amount, reduce_only=True)
+                # the fee of the single order is already booked by the first call
+                self.account.apply_fill(self.symbol, {**(rec['order'] or {}), 'fee': None}, side, plan.open_amount)
+                return [rec]
+
+        # positionSide only exists in hedge mode; a one-way ('reverse') account rejects it
+        hedge = self.mode != 'reverse'
+        close_args = None
+        if plan.close_leg:
+            close_side, close_amount, close_position_side = plan.close_leg
+            close_params = {'reduceOnly': True, 'positionSide': close_position_side} if hedge else {'reduceOnly': True}
+            close_args = (plan.prepared_at, 'close', close_side, close_amount, close_params)
+        open_args = (plan.prepared_at, 'open', side, plan.open_amount, {'positionSide': position_side} if hedge else {})
+
+        if close_args and self._pool is not None:
+            close_fut = self._pool.submit(self._send, *close_args)
+            open_fut = self._pool.submit(self._send, *open_args) if plan.open_amount > 0 else None
+            records.append(close_fut.result())
+            if open_fut is not None:
+                records.append(open_fut.result())
+        else:
+            if close_args:
+                records.append(self._send(*close_args))
+            if plan.open_amount > 0:
+                records.append(self._send(*open_args))
+
+        for rec in records:
+            self.account.apply_fill(self.symbol, rec['order'], rec['side'], rec['amount'],
+                                    reduce_only=rec['leg'] == 'close')
+        return records
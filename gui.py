@@ -1,51 +1,140 @@
 # gui.py
 import sys
+from collections import deque
 from PySide6.QtWidgets import (
     QApplication, QWidget, QVBoxLayout, QHBoxLayout, QLabel, QLineEdit,
-    QTextEdit, QPushButton, QCheckBox, QFormLayout, QMessageBox
+    QPlainTextEdit, QPushButton, QCheckBox, QFormLayout, QMessageBox, QComboBox, QSplitter
 )
-from PySide6.QtCore import Qt, QObject, Signal, Slot
+from PySide6.QtCore import Qt, QObject, QTimer, Signal, Slot
 from typing import Dict
+from chart import ChartWidget
+from log_writer import LEVELS, LogBuffer
 from trading_bot import TradingBot
 
-# Bridge object to expose a Qt signal for logs and manage the TradingBot
+LOG_MAX_LINES = 5000    # lines kept in the log view (and in memory)
+LOG_FLUSH_MS = 100      # how often pending lines are pushed to the view
+CHART_EVENTS_MAX = 10000  # undrained chart events kept while the GUI thread is busy; older ones are dropped
+LEVEL_FILTERS = {"All levels": 'DEBUG', "Info+": 'INFO', "Warnings+": 'WARN', "Errors only": 'ERROR'}
+ALL_BOTS = "All bots"
+
+# Bridge object that manages the TradingBot; its log lines go into a shared LogBuffer
+# and its chart events into chart_events, both drained by the window's timer
 class BotRunner(QObject):
-    log_signal = Signal(str)
 
-    def __init__(self):
+    def __init__(self, log_buffer: LogBuffer):
         super().__init__()
         self.bot: TradingBot | None = None
+        self.log_buffer = log_buffer
+        # appended from the bot's thread, popped on the GUI thread
+        self.chart_events: deque = deque(maxlen=CHART_EVENTS_MAX)
+        self.supervisor = None  # created on first isolated start
+        self.worker: str | None = None
+        self.profiling = False
+
+    def start_bot(self, config: Dict, isolated: bool = False):
+        # no Qt signal per line: the window drains the buffer on a timer
+        source = config.get("SYMBOL", "")
+        if isolated:
+            # the bot runs in a worker process; a crash there is restarted instead of taking down the GUI
+            from supervisor import BotSupervisor
+            if self.supervisor is None:
+                # the worker name is the bot filter's source; the line keeps its level prefix
+                self.supervisor = BotSupervisor(log_cb=lambda worker, line: self.log_buffer.append(line, worker),
+                                                event_cb=lambda name, event: self.chart_events.append(event))
+            self.worker = source or "bot"
+            if self.worker in self.supervisor.names():
+                self.supervisor.remove(self.worker)
+            self.supervisor.add(self.worker, config)
+            self.supervisor.start(self.worker)
+            return
 
-    def start_bot(self, config: Dict):
-        # create bot with a callback that emits the Qt signal
         def log_cb(msg: str):
-            # emit must be from Python thread-safe emitter
-            self.log_signal.emit(msg)
+            self.log_buffer.append(msg, source)
 
-        self.bot = TradingBot(config=config, log_cb=log_cb)
+        self.bot = TradingBot(config=config, log_cb=log_cb, event_cb=self.chart_events.append)
         self.bot.start()
 
     def stop_bot(self):
+        self.profiling = False  # stopping the bot writes any open profile
         if self.bot:
             self.bot.stop()
             self.bot = None
+        if self.worker is not None:
+            self.supervisor.stop(self.worker)
+            self.worker = None
+
+    def toggle_profiling(self, allocations: bool = False) -> bool:
+        """Start or stop the bot's profiler; the output paths arrive as a log line. Returns the new state."""
+        method = "stop_profiling" if self.profiling else "start_profiling"
+        args = () if self.profiling else (0.01, allocations)
+        if self.worker is not None:
+            self.supervisor.call(self.worker, method, *args)
+        elif self.bot is not None:
+            getattr(self.bot, method)(*args)
+        else:
+            return False
+        self.profiling = not self.profiling
+        return self.profiling
 
     def is_running(self) -> bool:
+        if self.worker is not None:
+            return self.supervisor.status()[self.worker]['state'] != 'stopped'
         return self.bot is not None and self.bot.is_running()
 
+    def shutdown(self):
+        self.stop_bot()
+        if self.supervisor is not None:
+            self.supervisor.close()
+
 
 class TradingBotWindow(QWidget):
     def __init__(self):
         super().__init__()
         self.setWindowTitle("Trading Bot GUI")
-        self.setGeometry(200, 200, 1000, 600)
+        self.setGeometry(200, 200, 1200, 800)
 
         main_layout = QHBoxLayout(self)
 
-        # Left - log output
-        self.log_output = QTextEdit()
+        # Left - log filters and output
+        log_layout = QVBoxLayout()
+        filter_layout = QHBoxLayout()
+        self.level_filter = QComboBox()
+        self.level_filter.addItems(list(LEVEL_FILTERS))
+        self.bot_filter = QComboBox()
+        self.bot_filter.addItem(ALL_BOTS)
+        self.level_filter.currentIndexChanged.connect(self.refilter_log)
+        self.bot_filter.currentIndexChanged.connect(self.refilter_log)
+        filter_layout.addWidget(QLabel("Level:"))
+        filter_layout.addWidget(self.level_filter)
+        filter_layout.addWidget(QLabel("Bot:"))
+        filter_layout.addWidget(self.bot_filter)
+        filter_layout.addStretch()
+        log_layout.addLayout(filter_layout)
+
+        # plain text with a block cap: appends are cheap and old lines fall off the top
+        self.log_output = QPlainTextEdit()
         self.log_output.setReadOnly(True)
-        main_layout.addWidget(self.log_output, 2)
+        self.log_output.setMaximumBlockCount(LOG_MAX_LINES)
+        log_layout.addWidget(self.log_output)
+
+        # chart above the log; the user can trade space between them
+        self.chart = ChartWidget()
+        log_panel = QWidget()
+        log_panel.setLayout(log_layout)
+        log_layout.setContentsMargins(0, 0, 0, 0)
+        splitter = QSplitter(Qt.Orientation.Vertical)
+        splitter.addWidget(self.chart)
+        splitter.addWidget(log_panel)
+        splitter.setSizes([500, 300])
+        main_layout.addWidget(splitter, 2)
+
+        # (level, source, line) for the last LOG_MAX_LINES lines, used when a filter changes
+        self.log_history: deque = deque(maxlen=LOG_MAX_LINES)
+        self.log_buffer = LogBuffer()
+        self.log_timer = QTimer(self)
+        self.log_timer.timeout.connect(self.flush_log)
+        self.log_timer.timeout.connect(self.flush_chart)
+        self.log_timer.start(LOG_FLUSH_MS)
 
         # Right - config panel
         config_layout = QVBoxLayout()
@@ -63,6 +152,7 @@ class TradingBotWindow(QWidget):
 
         self.fixed_amount = QCheckBox("Fixed amount?")
         self.fixed_amount.stateChanged.connect(self.toggle_fixed_amount)
+        self.isolated = QCheckBox("Run in separate process")
 
         form_layout.addRow("API Key:", self.api_key)
         form_layout.addRow("API Secret:", self.api_secret)
@@ -73,6 +163,7 @@ class TradingBotWindow(QWidget):
         form_layout.addRow("Timeframe (sec):", self.timeframe_seconds)
         form_layout.addRow("Contract Num:", self.contract_num)
         form_layout.addRow("", self.fixed_amount)
+        form_layout.addRow("", self.isolated)
 
         config_layout.addLayout(form_layout)
 
@@ -80,17 +171,22 @@ class TradingBotWindow(QWidget):
         self.start_btn = QPushButton("Start")
         self.stop_btn = QPushButton("Stop")
         self.stop_btn.setEnabled(False)
+        self.profile_btn = QPushButton("Start profiling")
+        self.profile_btn.setEnabled(False)
+        self.profile_alloc = QCheckBox("Track allocations (slower)")
 
         self.start_btn.clicked.connect(self.on_start)
         self.stop_btn.clicked.connect(self.on_stop)
+        self.profile_btn.clicked.connect(self.on_profile)
 
         config_layout.addWidget(self.start_btn)
         config_layout.addWidget(self.stop_btn)
+        config_layout.addWidget(self.profile_btn)
+        config_layout.addWidget(self.profile_alloc)
         main_layout.addLayout(config_layout, 1)
 
         # Bot runner bridge
-        self.runner = BotRunner()
-        self.runner.log_signal.connect(self.append_log)
+        self.runner = BotRunner(self.log_buffer)
 
         # require validation of inputs before start
         # simple approach: connect textChanged to a validator
@@ -156,14 +252,17 @@ class TradingBotWindow(QWidget):
         for w in (
             self.api_key, self.api_secret, self.exchange_name, self.symbol,
             self.leverage, self.margin_percent, self.timeframe_seconds, self.contract_num,
-            self.fixed_amount
+            self.fixed_amount, self.isolated
         ):
             w.setEnabled(False)
         self.start_btn.setEnabled(False)
         self.stop_btn.setEnabled(True)
+        self.profile_btn.setEnabled(True)
 
         self.append_log("Starting bot...")
-        self.runner.start_bot(config)
+        self.runner.chart_events.clear()
+        self.chart.clear()
+        self.runner.start_bot(config, isolated=self.isolated.isChecked())
 
     @Slot()
     def on_stop(self):
@@ -173,14 +272,72 @@ class TradingBotWindow(QWidget):
         for w in (
             self.api_key, self.api_secret, self.exchange_name, self.symbol,
             self.leverage, self.margin_percent, self.timeframe_seconds, self.contract_num,
-            self.fixed_amount
+            self.fixed_amount, self.isolated
         ):
             w.setEnabled(True)
         self.stop_btn.setEnabled(False)
         self.start_btn.setEnabled(True)
+        self.profile_btn.setEnabled(False)
+        self.profile_btn.setText("Start profiling")
+        self.profile_alloc.setEnabled(True)
+
+    @Slot()
+    def on_profile(self):
+        try:
+            profiling = self.runner.toggle_profiling(self.profile_alloc.isChecked())
+        except RuntimeError as e:
+            QMessageBox.warning(self, "Profiler", str(e))
+            return
+        self.profile_btn.setText("Stop profiling" if profiling else "Start profiling")
+        self.profile_alloc.setEnabled(not profiling)
+
+    def closeEvent(self, event):
+        self.runner.shutdown()
+        super().closeEvent(event)
 
     @Slot(str)
     def append_log(self, message: str):
-        self.log_output.append(message)
-        # auto-scroll
-        self.log_output.verticalScrollBar().setValue(self.log_output.verticalScrollBar().maximum())
+        self.log_buffer.append(message)
+
+    def _visible(self, level: str, source: str) -> bool:
+        min_level = LEVEL_FILTERS[self.level_filter.currentText()]
+        if LEVELS.index(level) < LEVELS.index(min_level):
+            return False
+        bot = self.bot_filter.currentText()
+        return bot == ALL_BOTS or source == bot
+
+    def _show(self, lines, replace: bool = False):
+        bar = self.log_output.verticalScrollBar()
+        # only follow the tail if the user has not scrolled up
+        at_bottom = replace or bar.value() >= bar.maximum() - 2
+        if replace:
+            self.log_output.setPlainText("\n".join(lines))
+        elif lines:
+            self.log_output.appendPlainText("\n".join(lines))
+        if at_bottom:
+            bar.setValue(bar.maximum())
+
+    @Slot()
+    def flush_log(self):
+        entries = self.log_buffer.drain()
+        if not entries:
+            return
+        self.log_history.extend(entries)
+        for _, source, _ in entries:
+            if source and self.bot_filter.findText(source) < 0:
+                self.bot_filter.addItem(source)
+        # a burst larger than the view would only be trimmed again
+        self._show([line for level, source, line in entries[-LOG_MAX_LINES:] if self._visible(level, source)])
+
+    @Slot()
+    def flush_chart(self):
+        events = self.runner.chart_events
+        # take only what is there now; the bot may keep appending meanwhile
+        batch = [events.popleft() for _ in range(len(events))]
+        if batch:
+            self.chart.apply(batch)
+
+    @Slot()
+    def refilter_log(self):
+        # re-renders the capped in-memory window only, never the whole session
+        self._show([line for level, source, line in self.log_history if self._visible(level, source)], replace=True)
@@ -0,0 +1,304 @@
+# indicators.py
+"""
+Incremental indicators for pluggable strategies.
+
+Every indicator folds in one finalized bar in O(1): it keeps running sums or
+smoothed averages instead of recomputing over a window. An IndicatorGraph
+owns the indicators of one symbol/timeframe. Each indicator is created once
+per (name, params) and is updated after the indicators it depends on. For
+example, ATR reads TrueRange, and EMA(source='ha_close') reads HeikinAshi.
+
+graph_for(symbol, timeframe) returns the process-wide graph for a series.
+Strategies on the same symbol therefore share one computation, memoized by
+(symbol, timeframe, name, params). When several bots feed the same bar, only
+the first push computes it. Bulk replay uses a private IndicatorGraph, so
+the same strategy code runs unchanged on history.
+
+An indicator added after bars were pushed is first replayed over the bars
+the graph still holds (`history`), so a strategy bound late to a live shared
+graph starts warm. graph_for() graphs keep GRAPH_HISTORY bars for this.
+`ready` tells whether one has seen enough bars to be used.
+"""
+import inspect
+import threading
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from series import OHLCV_FIELDS, Candle, RecordView, RingBuffer
+from strategy import HeikinAshiEngine
+
+PRICE_FIELDS = ('open', 'high', 'low', 'close', 'volume')
+GRAPH_HISTORY = 200  # bars a shared graph keeps to seed indicators bound after it went live
+HA_ROWS = 6  # Heikin-Ashi rows HeikinAshi keeps; trend_change() needs the last two
+
+
+class Indicator:
+    """
+    Base class: `name` identifies the kind, `params` the instance.
+    - update(graph): fold in the graph's current bar
+    - value: latest output, None until ready
+    - state()/restore(): the running fields listed in `_state`
+    """
+    name = ''
+    _state: Tuple[str, ...] = ('value',)
+
+    def __init__(self, graph: 'IndicatorGraph', **params):
+        self.params = params
+        self.value: Optional[float] = None
+
+    def update(self, graph: 'IndicatorGraph'):
+        raise NotImplementedError
+
+    @property
+    def ready(self) -> bool:
+        return self.value is not None
+
+    def state(self) -> Dict:
+        return {k: getattr(self, k) for k in self._state}
+
+    def restore(self, state: Dict):
+        for k in self._state:
+            setattr(self, k, state[k])
+
+
+def source_reader(graph: 'IndicatorGraph', source: str) -> Callable[[], float]:
+    """Getter for a bar field ('close', ...) or a Heikin-Ashi field ('ha_close', ...)."""
+    if source in PRICE_FIELDS:
+        return lambda: getattr(graph, source)
+    if source.startswith('ha_') and source[3:] in PRICE_FIELDS[:4]:
+        ha, field = graph.get(HeikinAshi), source[3:]
+        return lambda: getattr(ha, field)
+    raise ValueError(f"Unknown indicator source '{source}'")
+
+
+class HeikinAshi(Indicator):
+    """HA open/high/low/close of the last bar plus its trend; `changed` is the two-bar color flip."""
+    name = 'ha'
+
+    def __init__(self, graph: 'IndicatorGraph'):
+        super().__init__(graph)
+        self.engine = HeikinAshiEngine(maxlen=max(2, min(graph.history, HA_ROWS)))
+        self.open = self.high = self.low = self.close = None
+        self.changed = False
+        self.trend: Optional[str] = None
+
+    def update(self, graph: 'IndicatorGraph'):
+        self.engine.push(graph.ts, graph.open, graph.high, graph.low, graph.close, graph.volume)
+        buf = self.engine.ha_buffer
+        if len(buf):
+            self.open, self.high, self.low, self.close = buf.row(-1)
+            self.value = self.close
+        self.changed, self.trend = self.engine.trend_change()
+
+    def state(self) -> Dict:
+        return {'engine': self.engine.state(), 'changed': self.changed, 'trend': self.trend}
+
+    def restore(self, state: Dict):
+        self.engine.restore(state['engine'])
+        self.changed, self.trend = state['changed'], state['trend']
+        if len(self.engine.ha_buffer):
+            self.open, self.high, self.low, self.close = self.engine.ha_buffer.row(-1)
+            self.value = self.close
+
+
+class EMA(Indicator):
+    """Exponential moving average seeded with the SMA of the first `period` values."""
+    name = 'ema'
+    _state = ('value', '_count', '_sum')
+
+    def __init__(self, graph: 'IndicatorGraph', period: int = 20, source: str = 'close'):
+        super().__init__(graph, period=period, source=source)
+        self.period = period
+        self.alpha = 2.0 / (period + 1)
+        self._read = source_reader(graph, source)
+        self._count = 0
+        self._sum = 0.0
+
+    def update(self, graph: 'IndicatorGraph'):
+        x = self._read()
+        if self._count < self.period:
+            self._count += 1
+            self._sum += x
+            if self._count == self.period:
+                self.value = self._sum / self.period
+            return
+        self.value += self.alpha * (x - self.value)
+
+
+class TrueRange(Indicator):
+    name = 'tr'
+    _state = ('value', '_prev_close')
+
+    def __init__(self, graph: 'IndicatorGraph'):
+        super().__init__(graph)
+        self._prev_close: Optional[float] = None
+
+    def update(self, graph: 'IndicatorGraph'):
+        h, l, pc = graph.high, graph.low, self._prev_close
+        self.value = h - l if pc is None else max(h - l, abs(h - pc), abs(l - pc))
+        self._prev_close = graph.close
+
+
+class ATR(Indicator):
+    """Average true range with Wilder smoothing."""
+    name = 'atr'
+    _state = ('value', '_count', '_sum')
+
+    def __init__(self, graph: 'IndicatorGraph', period: int = 14):
+        super().__init__(graph, period=period)
+        self.period = period
+        self.tr = graph.get(TrueRange)
+        self._count = 0
+        self._sum = 0.0
+
+    def update(self, graph: 'IndicatorGraph'):
+        tr = self.tr.value
+        if self._count < self.period:
+            self._count += 1
+            self._sum += tr
+            if self._count == self.period:
+                self.value = self._sum / self.period
+            return
+        self.value = (self.value * (self.period - 1) + tr) / self.period
+
+
+class RSI(Indicator):
+    """Relative strength index (0-100) with Wilder smoothing."""
+    name = 'rsi'
+    _state = ('value', '_prev', '_count', '_gain', '_loss')
+
+    def __init__(self, graph: 'IndicatorGraph', period: int = 14, source: str = 'close'):
+        super().__init__(graph, period=period, source=source)
+        self.period = period
+        self._read = source_reader(graph, source)
+        self._prev: Optional[float] = None
+        self._count = 0
+        self._gain = 0.0
+        self._loss = 0.0
+
+    def update(self, graph: 'IndicatorGraph'):
+        x = self._read()
+        prev, self._prev = self._prev, x
+        if prev is None:
+            return
+        gain, loss = max(x - prev, 0.0), max(prev - x, 0.0)
+        n = self.period
+        if self._count < n:
+            self._count += 1
+            self._gain += gain / n
+            self._loss += loss / n
+            if self._count < n:
+                return
+        else:
+            self._gain = (self._gain * (n - 1) + gain) / n
+            self._loss = (self._loss * (n - 1) + loss) / n
+        self.value = 100.0 if self._loss == 0 else 100.0 - 100.0 / (1.0 + self._gain / self._loss)
+
+
+class IndicatorGraph:
+    """
+    Indicators of one symbol/timeframe, updated in dependency order on every new bar.
+    - history: bars kept in `candles`; indicators created after the first bar are seeded from them
+    The current bar is readable as graph.ts / open / high / low / close / volume.
+    """
+
+    def __init__(self, symbol: str = '', timeframe: str = '', history: int = 6):
+        self.symbol = symbol
+        self.timeframe = timeframe
+        self.history = history
+        self.ts = 0
+        self.open = self.high = self.low = self.close = self.volume = 0.0
+        self.bars = 0
+        self.ohlcv = RingBuffer(history, OHLCV_FIELDS)
+        self.candles = RecordView(self.ohlcv, Candle)
+        self._nodes: Dict[tuple, Indicator] = {}
+        self._order: List[Indicator] = []
+        self.lock = threading.RLock()
+
+    @property
+    def last_ts(self):
+        return self.ts
+
+    @staticmethod
+    def key(cls, params: Dict) -> tuple:
+        """(name, *sorted params) with defaults filled in, so EMA(period=9) and EMA(period=9, source='close') match."""
+        bound = inspect.signature(cls).bind(None, **params)
+        bound.apply_defaults()
+        items = sorted((k, v) for k, v in bound.arguments.items() if k != 'graph')
+        return (cls.name,) + tuple(items)
+
+    def get(self, cls, **params) -> Indicator:
+        """The shared `cls(**params)` instance, created (after its dependencies) on first use."""
+        key = self.key(cls, params)
+        with self.lock:
+            node = self._nodes.get(key)
+            if node is None:
+                node = cls(self, **params)  # dependencies register themselves (and are seeded) first
+                if self.bars:
+                    self._seed(node, cls, params)
+                self._nodes[key] = node
+                self._order.append(node)
+            return node
+
+    def _seed(self, node: Indicator, cls, params: Dict):
+        """Bring a node created on a live graph up to date by replaying the stored bars on a scratch graph."""
+        scratch = IndicatorGraph(self.symbol, self.timeframe, self.history)
+        twin = scratch.get(cls, **params)
+        scratch.ingest(list(self.ohlcv.rows()))
+        node.restore(twin.state())
+
+    def push(self, ts: float, o: float, h: float, l: float, cl: float, volume: float = 0.0) -> bool:
+        """Fold in one finalized bar; False if this bar (or a newer one) was already pushed."""
+        with self.lock:
+            if ts <= self.ts:
+                return False
+            self.ts, self.open, self.high, self.low, self.close, self.volume = ts, o, h, l, cl, volume
+            self.ohlcv.append(ts, o, h, l, cl, volume)
+            for node in self._order:
+                node.update(self)
+            self.bars += 1
+            return True
+
+    def ingest(self, candles: Sequence[Sequence[float]]) -> int:
+        """Push the ccxt rows newer than the last bar; returns how many were new."""
+        n = 0
+        for c in candles:
+            if self.push(*c[:6]):
+                n += 1
+        return n
+
+    def state(self) -> Dict:
+        """JSON-serializable state of the bar counter and every indicator."""
+        with self.lock:
+            return {
+                'last_ts': self.ts,
+                'bar': [self.open, self.high, self.low, self.close, self.volume],
+                'bars': self.bars,
+                'candles': [list(row) for row in self.ohlcv.rows()],
+                'nodes': {repr(key): node.state() for key, node in self._nodes.items()},
+            }
+
+    def restore(self, state: Dict):
+        """Restore the indicators that exist now; ones missing from `state` start fresh."""
+        with self.lock:
+            self.ts = state['last_ts']
+            self.open, self.high, self.low, self.close, self.volume = state['bar']
+            self.bars = state['bars']
+            self.ohlcv.clear()
+            for row in state['candles']:
+                self.ohlcv.append(*row)
+            for key, node in self._nodes.items():
+                if repr(key) in state['nodes']:
+                    node.restore(state['nodes'][repr(key)])
+
+
+_graphs: Dict[Tuple[str, str], IndicatorGraph] = {}
+_graphs_lock = threading.Lock()
+
+
+def graph_for(symbol: str, timeframe: str, history: int = GRAPH_HISTORY) -> IndicatorGraph:
+    """Process-wide graph for a series, shared by every strategy trading it; `history` applies on creation."""
+    with _graphs_lock:
+        graph = _graphs.get((symbol, timeframe))
+        if graph is None:
+            graph = _graphs[(symbol, timeframe)] = IndicatorGraph(symbol, timeframe, history)
+        return graph
@@ -0,0 +1,263 @@
+# log_writer.py
+"""
+Non-blocking, buffered log sink.
+
+write() stamps the message and puts it on a bounded queue; it never touches
+the disk and never blocks. A background thread drains the queue in batches,
+appends them to the log file with one write, echoes them to stdout and hands
+them to any callbacks. When the queue is full new lines are dropped and
+counted rather than stalling the caller.
+
+A line written with sink=fn goes to fn only, instead of the file, stdout and
+sinks. Many bots can therefore share the process-wide get_writer() thread
+and each still gets its own callback.
+"""
+import atexit
+import json
+import os
+import queue
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from datetime import datetime
+from typing import Callable, List, Optional, Tuple
+
+LEVELS = ('DEBUG', 'INFO', 'WARN', 'ERROR', 'FATAL')
+SINK_TIME_FORMAT = "%Y-%m-%d %H:%M:%S"  # text lines handed to a per-line sink, as TradingBot.log prints them
+
+
+def level_of(msg: str) -> str:
+    """Infer the level from the '[WARN] ...' style prefixes used across the bot, after an optional '[timestamp] '."""
+    for _ in range(2):
+        if not msg.startswith('['):
+            break
+        end = msg.find(']')
+        if msg[1:end] in LEVELS:
+            return msg[1:end]
+        msg = msg[end + 2:]
+    return 'INFO'
+
+
+class LogWriter:
+    """
+    - path_pattern: file name with a {date} field (YYYYMMDD), or None for no file
+    - max_bytes / backups: size rotation to <file>.1 ... <file>.<backups>; 0 disables it
+    - json_lines: write {"ts", "level", "msg"} objects instead of text lines
+    - sinks: callables receiving each formatted text line on the writer thread
+    - echo: also print lines to stdout
+    - time_format: strftime format for the text timestamp; ISO 8601 by default
+    """
+
+    def __init__(self, path_pattern: Optional[str] = "logging-{date}.log", max_bytes: int = 0, backups: int = 5,
+                 json_lines: bool = False, queue_size: int = 10000, batch_size: int = 500,
+                 flush_interval: float = 0.2, echo: bool = True,
+                 sinks: Optional[List[Callable[[str], None]]] = None, time_format: Optional[str] = None):
+        self.path_pattern = path_pattern
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.json_lines = json_lines
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.echo = echo
+        self.sinks = list(sinks or [])
+        self.time_format = time_format
+        self.dropped = 0
+        self._reported_drops = 0
+        self._queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        self._file = None
+        self._file_path: Optional[str] = None
+        self._file_date: Optional[str] = None
+
+    # ---- producer side ----
+    def write(self, msg: str, level: Optional[str] = None, sink: Optional[Callable[[str], None]] = None) -> bool:
+        """Queue a line (for `sink` alone, if given); returns False if it was dropped because the queue is full."""
+        if self._thread is None or not self._thread.is_alive():
+            self._start()
+        try:
+            self._queue.put_nowait((time.time(), level or level_of(msg), msg, sink))
+            return True
+        except queue.Full:
+            self.dropped += 1
+            return False
+
+    def flush(self, timeout: float = 5.0):
+        """Block until everything queued so far has been written."""
+        done = threading.Event()
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            try:
+                self._queue.put(done, timeout=0.1)
+                break
+            except queue.Full:
+                continue
+        if self._thread is not None and self._thread.is_alive():
+            done.wait(max(0.0, deadline - time.time()))
+
+    def close(self, timeout: float = 5.0):
+        self.flush(timeout)
+        try:
+            self._queue.put(None, timeout=timeout)
+        except queue.Full:
+            pass
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    # ---- writer thread ----
+    def _start(self):
+        with self._start_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._loop, name="log-writer", daemon=True)
+                self._thread.start()
+
+    def _loop(self):
+        running = True
+        while running:
+            try:
+                first = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                continue
+            batch = [first]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            records, events = [], []
+            for item in batch:
+                if item is None:
+                    running = False
+                elif isinstance(item, threading.Event):
+                    events.append(item)
+                else:
+                    records.append(item)
+            if self.dropped != self._reported_drops:
+                records.append((time.time(), 'WARN', f"[WARN] {self.dropped - self._reported_drops} log lines dropped",
+                                None))
+                self._reported_drops = self.dropped
+            try:
+                self._emit(records)
+            except Exception:
+                print("Log writer error:", traceback.format_exc(), file=sys.stderr)
+            for ev in events:
+                ev.set()
+        self._close_file()
+
+    def _format(self, ts: float, level: str, msg: str) -> str:
+        dt = datetime.fromtimestamp(ts)
+        stamp = dt.strftime(self.time_format) if self.time_format else dt.isoformat()
+        if self.json_lines:
+            return json.dumps({"ts": stamp, "level": level, "msg": msg})
+        return f"[{stamp}] {msg}"
+
+    def _emit(self, records):
+        routed = [r for r in records if r[3] is not None]
+        if routed:
+            records = [r for r in records if r[3] is None]
+            for ts, _, msg, sink in routed:
+                try:
+                    sink(f"[{datetime.fromtimestamp(ts).strftime(SINK_TIME_FORMAT)}] {msg}")
+                except Exception:
+                    print("Log callback error:", traceback.format_exc(), file=sys.stderr)
+        if not records:
+            return
+        lines = [self._format(*r[:3]) for r in records]
+        if self.path_pattern:
+            # group by day so a batch spanning midnight lands in both files
+            start = 0
+            for i in range(1, len(records) + 1):
+                if i == len(records) or _day(records[i][0]) != _day(records[start][0]):
+                    self._write_file(_day(records[start][0]), "\n".join(lines[start:i]) + "\n")
+                    start = i
+        if self.echo:
+            print("\n".join(lines))
+        for sink in self.sinks:
+            for line in lines:
+                try:
+                    sink(line)
+                except Exception:
+                    print("Log callback error:", traceback.format_exc(), file=sys.stderr)
+
+    def _write_file(self, day: str, data: str):
+        if self._file is None or day != self._file_date:
+            self._open(day)
+        elif self.max_bytes and self._file.tell() + len(data) > self.max_bytes:
+            self._rotate()
+        self._file.write(data)
+        self._file.flush()
+
+    def _open(self, day: str):
+        self._close_file()
+        self._file_date = day
+        self._file_path = self.path_pattern.format(date=day)
+        os.makedirs(os.path.dirname(self._file_path) or ".", exist_ok=True)
+        self._file = open(self._file_path, 'a')
+
+    def _rotate(self):
+        self._close_file()
+        for i in range(self.backups - 1, 0, -1):
+            src = f"{self._file_path}.{i}"
+            if os.path.exists(src):
+                os.replace(src, f"{self._file_path}.{i + 1}")
+        if self.backups > 0:
+            os.replace(self._file_path, f"{self._file_path}.1")
+        else:
+            open(self._file_path, 'w').close()
+        self._file = open(self._file_path, 'a')
+
+    def _close_file(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class LogBuffer:
+    """
+    Thread-safe hand-off of log lines to a UI: any thread append()s, the UI
+    thread drain()s everything pending in one call on a timer. At most
+    `max_pending` undrained lines are kept; older ones are dropped.
+    """
+
+    def __init__(self, max_pending: int = 50000):
+        self._pending: deque = deque(maxlen=max_pending)
+        self._lock = threading.Lock()
+
+    def append(self, line: str, source: str = ""):
+        with self._lock:
+            self._pending.append((level_of(line), source, line))
+
+    def drain(self) -> List[Tuple[str, str, str]]:
+        """Return and clear pending (level, source, line) entries."""
+        with self._lock:
+            if not self._pending:
+                return []
+            items = list(self._pending)
+            self._pending.clear()
+        return items
+
+
+def _day(ts: float) -> str:
+    return datetime.fromtimestamp(ts).strftime('%Y%m%d')
+
+
+_default: Optional[LogWriter] = None
+_default_lock = threading.Lock()
+
+
+def get_writer() -> LogWriter:
+    """Process-wide writer configured from LOG_* environment variables; flushed at exit."""
+    global _default
+    with _default_lock:
+        if _default is None:
+            _default = LogWriter(
+                path_pattern=os.getenv("LOG_FILE", "logging-{date}.log"),
+                max_bytes=int(os.getenv("LOG_MAX_BYTES", 0)),
+                backups=int(os.getenv("LOG_BACKUPS", 5)),
+                json_lines=os.getenv("LOG_JSON", "false").lower() == "true",
+                queue_size=int(os.getenv("LOG_QUEUE_SIZE", 10000)),
+            )
+            atexit.register(_default.close)
+        return _default
@@ -0,0 +1,226 @@
+# metrics.py
+"""
+Latency histograms for the trading loop.
+
+Stages are timed with `REGISTRY.timer("stage", stage="candle_wait")` and
+exchange calls through InstrumentedExchange. The registry can be read as a
+dict (summary()), rendered in the Prometheus text format, written to a file
+or served over HTTP on localhost.
+
+When the registry is disabled, timer() returns a shared no-op context
+manager and observe() returns at once, so instrumented code costs only one
+attribute check.
+"""
+import bisect
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional, Tuple
+
+# seconds; spans sub-millisecond local work up to a full 5m candle wait
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+                   1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0)
+
+# ccxt methods that go over the network; everything else is passed through untimed
+TIMED_PREFIXES = ('fetch', 'create', 'cancel', 'edit', 'set_', 'load_markets', 'watch')
+
+
+class Histogram:
+    __slots__ = ('buckets', 'counts', 'count', 'sum', 'min', 'max', '_lock')
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # last slot is +Inf
+        self.count = 0
+        self.sum = 0.0
+        self.min = float('inf')
+        self.max = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[i] += 1
+            self.count += 1
+            self.sum += value
+            if value < self.min:
+                self.min = value
+            if value > self.max:
+                self.max = value
+
+    def percentile(self, q: float) -> float:
+        """Upper bucket bound containing the q-quantile (0..1), capped by the max seen."""
+        if self.count == 0:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for bound, n in zip(self.buckets, self.counts):
+            seen += n
+            if seen >= rank:
+                return min(bound, self.max)
+        return self.max
+
+    def snapshot(self) -> Dict:
+        return {
+            'count': self.count,
+            'sum': self.sum,
+            'mean': self.sum / self.count if self.count else 0.0,
+            'min': self.min if self.count else 0.0,
+            'max': self.max,
+            'p50': self.percentile(0.5),
+            'p90': self.percentile(0.9),
+            'p99': self.percentile(0.99),
+        }
+
+
+class _Timer:
+    __slots__ = ('hist', 'start')
+
+    def __init__(self, hist: Histogram):
+        self.hist = hist
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.hist.observe(time.perf_counter() - self.start)
+        return False
+
+
+class _NullTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class Registry:
+    """Histograms keyed by (metric name, sorted label pairs)."""
+
+    def __init__(self, enabled: bool = False, prefix: str = "tradingbot"):
+        self.enabled = enabled
+        self.prefix = prefix
+        self._hists: Dict[Tuple[str, Tuple[Tuple[str, str], ...]], Histogram] = {}
+        self._lock = threading.Lock()
+        self._server: Optional[ThreadingHTTPServer] = None
+
+    def histogram(self, name: str, **labels) -> Histogram:
+        key = (name, tuple(sorted((k, str(v)) for k, v in labels.items())))
+        hist = self._hists.get(key)
+        if hist is None:
+            with self._lock:
+                hist = self._hists.setdefault(key, Histogram())
+        return hist
+
+    def timer(self, name: str, **labels):
+        if not self.enabled:
+            return _NULL_TIMER
+        return _Timer(self.histogram(name, **labels))
+
+    def observe(self, name: str, seconds: float, **labels):
+        if self.enabled:
+            self.histogram(name, **labels).observe(seconds)
+
+    def reset(self):
+        with self._lock:
+            self._hists.clear()
+
+    def summary(self) -> Dict[str, Dict]:
+        """{'name{label="v"}': {count, sum, mean, min, max, p50, p90, p99}} in seconds."""
+        return {_series(name, labels): hist.snapshot() for (name, labels), hist in sorted(self._hists.items())}
+
+    def prometheus_text(self) -> str:
+        out = []
+        typed = set()
+        for (name, labels), hist in sorted(self._hists.items()):
+            metric = f"{self.prefix}_{name}_seconds"
+            if metric not in typed:
+                out.append(f"# TYPE {metric} histogram")
+                typed.add(metric)
+            cumulative = 0
+            for bound, n in zip(hist.buckets, hist.counts):
+                cumulative += n
+                out.append(f"{_series(metric + '_bucket', labels + (('le', repr(bound)),))} {cumulative}")
+            out.append(f"{_series(metric + '_bucket', labels + (('le', '+Inf'),))} {hist.count}")
+            out.append(f"{_series(metric + '_sum', labels)} {hist.sum}")
+            out.append(f"{_series(metric + '_count', labels)} {hist.count}")
+        return "\n".join(out) + "\n"
+
+    def write_file(self, path: str):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp = f"{path}.tmp"
+        with open(tmp, "w") as f:
+            f.write(self.prometheus_text())
+        os.replace(tmp, path)
+
+    def serve(self, port: int, host: str = "127.0.0.1") -> ThreadingHTTPServer:
+        """Serve /metrics on a daemon thread; calling it again returns the running server."""
+        if self._server is not None:
+            return self._server
+        registry = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                body = registry.prometheus_text().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=self._server.serve_forever, name="metrics-http", daemon=True).start()
+        return self._server
+
+    def stop_server(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+
+def _series(name: str, labels) -> str:
+    if not labels:
+        return name
+    return name + "{" + ",".join(f'{k}="{v}"' for k, v in labels) + "}"
+
+
+class InstrumentedExchange:
+    """Proxy that times every network call of a ccxt client as exchange_call{method=...}."""
+
+    def __init__(self, inner, registry: 'Registry'):
+        self.__dict__['_inner'] = inner
+        self.__dict__['_registry'] = registry
+
+    def __getattr__(self, name):
+        attr = getattr(self._inner, name)
+        if not callable(attr) or not name.startswith(TIMED_PREFIXES):
+            return attr
+        hist = self._registry.histogram("exchange_call", method=name)
+
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return attr(*args, **kwargs)
+            finally:
+                hist.observe(time.perf_counter() - start)
+
+        self.__dict__[name] = timed  # later lookups skip __getattr__
+        return timed
+
+    def __setattr__(self, name, value):
+        setattr(self._inner, name, value)
+
+
+REGISTRY = Registry(enabled=os.getenv("METRICS_ENABLED", "false").lower() == "true")
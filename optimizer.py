@@ -0,0 +1,221 @@
+# optimizer.py
+"""
+Parallel parameter sweep over the backtest of the Heikin-Ashi strategy.
+
+Candles are loaded once into shared memory; worker processes map it instead
+of receiving a pickled copy with every task. Each finished run is appended to
+a JSON-lines journal, so an interrupted sweep resumes where it stopped, and a
+ranked CSV table is written at the end.
+"""
+import argparse
+import csv
+import itertools
+import json
+import os
+import random
+import sys
+from multiprocessing import Pool, shared_memory
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+from backtest import DEFAULT_CONFIG, add_data_args, backtest, bar_spacing_ms, load_data
+from vectorized import resample_ohlcv
+
+SUMMARY_FIELDS = ["return_pct", "max_drawdown_pct", "final_equity", "fees", "num_trades"]
+LOWER_IS_BETTER = {"max_drawdown_pct", "fees"}
+
+# per-worker state, filled by _init_worker
+_worker = {}
+
+
+def grid_space(space: Dict[str, list]) -> List[Dict]:
+    keys = list(space)
+    return [dict(zip(keys, values)) for values in itertools.product(*(space[k] for k in keys))]
+
+
+def random_space(space: Dict[str, object], n: int, seed: Optional[int] = None) -> List[Dict]:
+    """
+    Draw n parameter sets. A list value is sampled as a choice, a (lo, hi) tuple uniformly
+    (as an int when both bounds are ints).
+    """
+    rng = random.Random(seed)
+    out = []
+    for _ in range(n):
+        params = {}
+        for key, spec in space.items():
+            if isinstance(spec, tuple):
+                lo, hi = spec
+                params[key] = rng.randint(lo, hi) if isinstance(lo, int) and isinstance(hi, int) else rng.uniform(lo, hi)
+            else:
+                params[key] = rng.choice(list(spec))
+        out.append(params)
+    return out
+
+
+def params_key(params: Dict) -> str:
+    return json.dumps(params, sort_keys=True)
+
+
+def load_journal(path: str) -> Dict[str, Dict]:
+    done = {}
+    if not os.path.exists(path):
+        return done
+    with open(path) as f:
+        for line in f:
+            try:
+                rec = json.loads(line)
+            except ValueError:
+                # a torn last line from a crash; that run is simply redone
+                continue
+            done[params_key(rec["params"])] = rec
+    return done
+
+
+def _ends_with_newline(path: str) -> bool:
+    with open(path, "rb") as f:
+        f.seek(-1, os.SEEK_END)
+        return f.read(1) == b"\n"
+
+
+def _init_worker(shm_name: str, shape, dtype: str, base_config: Dict):
+    shm = shared_memory.SharedMemory(name=shm_name)
+    _worker["shm"] = shm  # keep the mapping alive for the life of the worker
+    _worker["data"] = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+    _worker["base_config"] = base_config
+    _worker["resampled"] = {}
+
+
+def _candles_for(seconds: int) -> np.ndarray:
+    data = _worker["data"]
+    if bar_spacing_ms(data) >= seconds * 1000:
+        return data
+    cache = _worker["resampled"]
+    if seconds not in cache:
+        cache.clear()  # tasks arrive grouped by timeframe; keep just one copy
+        cache[seconds] = resample_ohlcv(data, seconds)
+    return cache[seconds]
+
+
+def _run_one(params: Dict) -> Dict:
+    config = {**_worker["base_config"], **params}
+    seconds = int(config.get("TIMEFRAME_SECONDS", DEFAULT_CONFIG["TIMEFRAME_SECONDS"]))
+    result = backtest(_candles_for(seconds), config)
+    rec = {"params": params}
+    rec.update({k: result[k] for k in SUMMARY_FIELDS})
+    return rec
+
+
+def sweep(ohlcv, param_sets: Iterable[Dict], out: str, workers: Optional[int] = None,
+          rank_by: str = "return_pct", base_config: Optional[Dict] = None,
+          progress_cb=None) -> List[Dict]:
+    """
+    Backtest every parameter set and return records ranked by `rank_by`, best first.
+    Writes <out>.jsonl as results arrive and <out>.csv with the ranked table. Runs already in the
+    journal are reused; only those of the current param_sets are ranked and counted for progress.
+    """
+    journal_path = f"{out}.jsonl"
+    journal_recs = load_journal(journal_path)
+    done, todo = {}, []
+    grid = {params_key(params): params for params in param_sets}
+    for key, params in grid.items():
+        if key in journal_recs:
+            done[key] = journal_recs[key]  # runs of another grid in the same journal are kept but not ranked
+        else:
+            todo.append(params)
+    # group by timeframe so consecutive tasks in a worker reuse the same resampled data
+    todo.sort(key=lambda p: p.get("TIMEFRAME_SECONDS", 0))
+
+    if todo:
+        data = np.ascontiguousarray(ohlcv, dtype=np.float64)
+        shm = shared_memory.SharedMemory(create=True, size=max(data.nbytes, 1))
+        try:
+            np.ndarray(data.shape, dtype=data.dtype, buffer=shm.buf)[:] = data
+            initargs = (shm.name, data.shape, data.dtype.str, base_config or {})
+            with Pool(workers or os.cpu_count(), _init_worker, initargs) as pool, \
+                    open(journal_path, "a") as journal:
+                if journal.tell() and not _ends_with_newline(journal_path):
+                    journal.write("\n")  # keep the first new run off a torn last line
+                for rec in pool.imap_unordered(_run_one, todo):
+                    journal.write(json.dumps(rec) + "\n")
+                    journal.flush()
+                    done[params_key(rec["params"])] = rec
+                    if progress_cb:
+                        progress_cb(len(done), len(grid))
+        finally:
+            shm.close()
+            shm.unlink()
+
+    ranked = sorted(done.values(), key=lambda r: r[rank_by], reverse=rank_by not in LOWER_IS_BETTER)
+    write_table(f"{out}.csv", ranked)
+    return ranked
+
+
+def write_table(path: str, ranked: List[Dict]):
+    param_names = sorted({k for rec in ranked for k in rec["params"]})
+    tmp = path + ".tmp"
+    with open(tmp, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["rank"] + param_names + SUMMARY_FIELDS)
+        for i, rec in enumerate(ranked, 1):
+            writer.writerow([i] + [rec["params"].get(k) for k in param_names] + [rec[k] for k in SUMMARY_FIELDS])
+    os.replace(tmp, path)
+
+
+def _parse_value(text: str):
+    for cast in (int, float):
+        try:
+            return cast(text)
+        except ValueError:
+            pass
+    return text
+
+
+def parse_space(specs: List[str]) -> Dict[str, object]:
+    """KEY=a,b,c gives a list of choices; KEY=lo:hi gives a range for random search."""
+    space = {}
+    for spec in specs:
+        key, _, values = spec.partition("=")
+        if ":" in values:
+            lo, hi = values.split(":", 1)
+            space[key] = (_parse_value(lo), _parse_value(hi))
+        else:
+            space[key] = [_parse_value(v) for v in values.split(",")]
+    return space
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Parallel parameter sweep of the Heikin-Ashi strategy backtest")
+    add_data_args(parser)
+    parser.add_argument("--space", nargs="+", required=True,
+                        help="e.g. TIMEFRAME_SECONDS=60,300 LEVERAGE=1,3,5 (or LEVERAGE=1:10 with --random)")
+    parser.add_argument("--random", type=int, default=0, help="sample N random sets instead of the full grid")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--rank-by", default="return_pct", choices=SUMMARY_FIELDS)
+    parser.add_argument("--out", default="sweep", help="output prefix for <out>.jsonl and <out>.csv")
+    args = parser.parse_args(argv)
+
+    space = parse_space(args.space)
+    if args.random:
+        param_sets = random_space(space, args.random, args.seed)
+    else:
+        ranges = [k for k, v in space.items() if isinstance(v, tuple)]
+        if ranges:
+            parser.error(f"ranges need --random: {', '.join(ranges)}")
+        param_sets = grid_space(space)
+
+    def progress(done, total):
+        print(f"\r{done}/{total} runs", end="", flush=True)
+
+    ranked = sweep(load_data(args, parser), param_sets, args.out, args.workers, args.rank_by,
+                   progress_cb=progress)
+    print()
+    for i, rec in enumerate(ranked[:10], 1):
+        print(f"{i:>3}. {rec['params']} -> return {rec['return_pct']:.2f}%, "
+              f"drawdown {rec['max_drawdown_pct']:.2f}%, trades {rec['num_trades']}")
+    print(f"Ranked table written to {args.out}.csv")
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,187 @@
+# profiler.py
+"""
+On-demand sampling profiler for a running bot.
+
+SamplingProfiler wakes every `interval` seconds and records the current
+stack of the threads it watches through sys._current_frames(). The bot is
+not instrumented and nothing runs on its thread, so the profiler can be
+started and stopped while the bot trades. At the default 100 Hz it costs
+well under 1% CPU. With allocations=True, tracemalloc also runs between
+start and stop, and the report lists the lines that allocated the most.
+tracemalloc slows every allocation in the process, so it is opt-in.
+
+The result is written as folded stacks ("a;b;c count" lines), which
+flamegraph.pl, speedscope and inferno read directly, plus a text report.
+The report lists the top functions by self and total samples, with each
+stack sorted into the bot's step (_run_once), exchange calls (ccxt), the
+log callback and time spent waiting. Those frames carry the same [tag] in
+the flame graph.
+"""
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from typing import Callable, Dict, List, Optional, Tuple
+
+DEFAULT_INTERVAL = 0.01
+MAX_DEPTH = 128
+
+_CCXT_DIR = f"{os.sep}ccxt{os.sep}"
+_WAIT_FUNCS = {'wait', 'wait_monotonic', 'wait_until', 'wait_for', 'sleep', 'select', 'poll', 'recv', 'recv_into',
+               'readinto', 'read'}
+
+
+def _default_tag(code) -> Optional[str]:
+    if code.co_name == '_run_once':
+        return 'run_once'
+    if _CCXT_DIR in code.co_filename or os.path.basename(code.co_filename) == 'shared_exchange.py':
+        return 'ccxt'
+    return None
+
+
+class ProfileResult:
+    """
+    - stacks: Counter of root-first frame tuples
+    - samples / duration: sample count and wall seconds covered
+    - allocations: [(location, size_bytes, count)] largest first, when tracked
+    """
+
+    def __init__(self, stacks: Counter, samples: int, duration: float, interval: float,
+                 allocations: Optional[List[Tuple[str, int, int]]] = None):
+        self.stacks = stacks
+        self.samples = samples
+        self.duration = duration
+        self.interval = interval
+        self.allocations = allocations
+
+    def folded(self) -> str:
+        return "".join(f"{';'.join(stack)} {n}\n" for stack, n in self.stacks.most_common())
+
+    def write_folded(self, path: str):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w") as f:
+            f.write(self.folded())
+
+    def report(self, top: int = 25) -> str:
+        self_counts: Counter = Counter()
+        total_counts: Counter = Counter()
+        tags: Counter = Counter()
+        threads: Counter = Counter()
+        for stack, n in self.stacks.items():
+            threads[stack[0]] += n
+            self_counts[stack[-1]] += n
+            for frame in set(stack):
+                total_counts[frame] += n
+            for tag in {f[1:f.index(']')] for f in stack if f.startswith('[')}:
+                tags[tag] += n
+        total = max(1, self.samples)
+        lines = [f"{self.samples} samples over {self.duration:.1f}s "
+                 f"(every {self.interval * 1000:.0f}ms)", "", "Share of samples:"]
+        for label, n in threads.most_common():
+            lines.append(f"  thread {label:<16} {100 * n / total:6.1f}%")
+        for tag in ('run_once', 'ccxt', 'log', 'wait'):
+            lines.append(f"  [{tag}]{'':<{16 - len(tag)}}{100 * tags[tag] / total:6.1f}%")
+        for title, counts in (("self", self_counts), ("total", total_counts)):
+            lines += ["", f"Top {top} by {title} samples:"]
+            for frame, n in counts.most_common(top):
+                lines.append(f"  {100 * n / total:6.1f}%  {n:>7}  {frame}")
+        if self.allocations is not None:
+            lines += ["", f"Top {top} allocation sites (net, since start):"]
+            for where, size, count in self.allocations[:top]:
+                lines.append(f"  {size / 1024:10.1f} KiB  {count:>8}  {where}")
+        return "\n".join(lines) + "\n"
+
+
+class SamplingProfiler:
+    """
+    - threads(): {thread ident: label} to sample, re-read on every tick so restarted threads are followed
+    - interval: seconds between samples
+    - tags: {code object: tag} marking frames such as the log callback; _run_once and ccxt are built in
+    - allocations: also run tracemalloc (process-wide, noticeably slower) between start and stop
+    """
+
+    def __init__(self, threads: Callable[[], Dict[int, str]], interval: float = DEFAULT_INTERVAL,
+                 tags: Optional[Dict] = None, allocations: bool = False, alloc_frames: int = 8):
+        self.threads = threads
+        self.interval = interval
+        self.tags = tags or {}
+        self.allocations = allocations
+        self.alloc_frames = alloc_frames
+        self._stacks: Counter = Counter()
+        self._samples = 0
+        self._names: Dict = {}  # code object -> folded frame name
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._started_at = 0.0
+        self._alloc_base = None
+        self._own_tracemalloc = False
+
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        if self.running():
+            return
+        if self.allocations:
+            self._own_tracemalloc = not tracemalloc.is_tracing()
+            if self._own_tracemalloc:
+                tracemalloc.start(self.alloc_frames)
+            self._alloc_base = self._snapshot()
+        self._stop.clear()
+        self._started_at = time.perf_counter()
+        self._thread = threading.Thread(target=self._loop, name="sampling-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> ProfileResult:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        allocations = None
+        if self._alloc_base is not None:
+            stats = self._snapshot().compare_to(self._alloc_base, 'lineno')
+            allocations = [(str(s.traceback[0]), s.size_diff, s.count_diff) for s in stats if s.size_diff > 0]
+            self._alloc_base = None
+            if self._own_tracemalloc:
+                tracemalloc.stop()
+        result = ProfileResult(self._stacks, self._samples, time.perf_counter() - self._started_at,
+                               self.interval, allocations)
+        self._stacks, self._samples = Counter(), 0
+        return result
+
+    @staticmethod
+    def _snapshot():
+        # leave out the profiler's own bookkeeping
+        return tracemalloc.take_snapshot().filter_traces([tracemalloc.Filter(False, __file__),
+                                                          tracemalloc.Filter(False, tracemalloc.__file__)])
+
+    def _name(self, code) -> str:
+        name = self._names.get(code)
+        if name is None:
+            tag = self.tags.get(code) or _default_tag(code)
+            name = f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+            if tag:
+                name = f"[{tag}] {name}"
+            name = self._names[code] = name.replace(';', ':')
+        return name
+
+    def _loop(self):
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            watched = self.threads()
+            frames = sys._current_frames()
+            for ident, label in watched.items():
+                frame = frames.get(ident)
+                if frame is None or ident == own:
+                    continue
+                stack = []
+                while frame is not None and len(stack) < MAX_DEPTH:
+                    stack.append(self._name(frame.f_code))
+                    frame = frame.f_back
+                if stack and stack[0].split(' ', 1)[0] in _WAIT_FUNCS:
+                    stack[0] = f"[wait] {stack[0]}"
+                stack.append(label)
+                stack.reverse()
+                self._stacks[tuple(stack)] += 1
+                self._samples += 1
@@ -0,0 +1,215 @@
+# resampler.py
+"""
+Higher timeframes built locally from one base candle series.
+
+Resampler folds closed base bars (1m, or sub-minute "Ns" bars) into every
+registered timeframe incrementally, aligned to the epoch like
+vectorized.resample_ohlcv() and the exchange. A higher bar is emitted as
+soon as the base bar that ends it arrives. Exchanges skip bars with no
+trades, so flush(ts) also closes any bar that ends at or before `ts`. Every
+close is reported as (timeframe, candle), base timeframe included, in
+ascending timeframe order.
+
+CandleFeed polls the base timeframe of one symbol at most once per base bar
+and feeds a Resampler. Any number of bots on that symbol, at any timeframe,
+read their closed bars from it. They all see the same bars, with one REST
+request per symbol instead of one per timeframe.
+"""
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from strategy import timeframe_to_seconds
+
+
+class _Aggregate:
+    __slots__ = ('timeframe', 'step', 'bar', 'closed')
+
+    def __init__(self, timeframe: str, step: int, history: int):
+        self.timeframe = timeframe
+        self.step = step  # ms
+        self.bar: Optional[list] = None  # [ts, o, h, l, c, v] still being built
+        self.closed: deque = deque(maxlen=history)
+
+
+class Resampler:
+    """
+    - base: timeframe of the candles passed to push()
+    - on_close(timeframe, candle): called for every bar that closes, on the pushing thread
+    - history: closed bars kept per timeframe for closed(); the base keeps enough to rebuild
+      the current bar of a timeframe added later
+    """
+
+    def __init__(self, base: str, timeframes: Sequence[str] = (), history: int = 500,
+                 on_close: Optional[Callable[[str, list], None]] = None):
+        self.base = base
+        self.base_step = timeframe_to_seconds(base) * 1000
+        self.history = history
+        self.on_close = on_close
+        self.last_ts = 0
+        self._aggs: List[_Aggregate] = [_Aggregate(base, self.base_step, history)]
+        for tf in timeframes:
+            self.add(tf)
+
+    @property
+    def timeframes(self) -> List[str]:
+        return [agg.timeframe for agg in self._aggs]
+
+    def _agg(self, timeframe: str) -> _Aggregate:
+        for agg in self._aggs:
+            if agg.timeframe == timeframe:
+                return agg
+        raise KeyError(f"Timeframe '{timeframe}' is not resampled from {self.base}")
+
+    def add(self, timeframe: str, seed: Optional[Sequence[Sequence[float]]] = None):
+        """
+        Start building `timeframe`. `seed` holds closed bars of it from elsewhere (e.g. one history
+        fetch at start-up); the bar in progress is rebuilt from the base bars already pushed.
+        """
+        if timeframe in self.timeframes:
+            return
+        step = timeframe_to_seconds(timeframe) * 1000
+        if step % self.base_step:
+            raise ValueError(f"{timeframe} is not a multiple of the base timeframe {self.base}")
+        base = self._aggs[0]
+        base.closed = deque(base.closed, maxlen=max(base.closed.maxlen, step // self.base_step))
+        agg = _Aggregate(timeframe, step, self.history)
+        if seed:
+            agg.closed.extend(list(c[:6]) for c in seed)
+        done = agg.closed[-1][0] + step if agg.closed else 0
+        for c in base.closed:
+            if c[0] >= done:
+                self._add_base(agg, c)  # closes of bars before now are not reported
+        self._aggs.append(agg)
+        self._aggs.sort(key=lambda a: a.step)
+
+    def _add_base(self, agg: _Aggregate, c: Sequence[float]) -> List[list]:
+        """Fold base bar c into agg; returns the bars of agg it closed (oldest first)."""
+        closed = []
+        start = c[0] // agg.step * agg.step
+        bar = agg.bar
+        if bar is not None and bar[0] != start:
+            # c is already past this bar: the base bars for its tail were skipped
+            agg.closed.append(bar)
+            closed.append(bar)
+            bar = None
+        if bar is None:
+            bar = agg.bar = [start, c[1], c[2], c[3], c[4], c[5]]
+        else:
+            if c[2] > bar[2]:
+                bar[2] = c[2]
+            if c[3] < bar[3]:
+                bar[3] = c[3]
+            bar[4] = c[4]
+            bar[5] += c[5]
+        if (c[0] + self.base_step) % agg.step == 0:  # c is the last base bar of this one
+            agg.closed.append(bar)
+            closed.append(bar)
+            agg.bar = None
+        return closed
+
+    def push(self, candle: Sequence[float]) -> List[Tuple[str, list]]:
+        """Fold in one closed base candle; returns (timeframe, candle) for every bar that closed."""
+        if candle[0] <= self.last_ts:
+            return []
+        self.last_ts = candle[0]
+        events = []
+        for agg in self._aggs:
+            events.extend((agg.timeframe, bar) for bar in self._add_base(agg, candle))
+        self._report(events)
+        return events
+
+    def flush(self, ts: float) -> List[Tuple[str, list]]:
+        """Close every bar that ends at or before `ts` (no base bar for its tail will come)."""
+        events = []
+        for agg in self._aggs:
+            if agg.bar is not None and agg.bar[0] + agg.step <= ts:
+                agg.closed.append(agg.bar)
+                events.append((agg.timeframe, agg.bar))
+                agg.bar = None
+        self._report(events)
+        return events
+
+    def _report(self, events: List[Tuple[str, list]]):
+        if self.on_close is not None:
+            for tf, c in events:
+                self.on_close(tf, c)
+
+    def closed(self, timeframe: str, since: float = 0) -> List[list]:
+        """Kept closed bars of `timeframe` newer than `since`, oldest first."""
+        return [c for c in self._agg(timeframe).closed if c[0] > since]
+
+    def current(self, timeframe: str) -> Optional[list]:
+        """The bar still being built, or None right after a close."""
+        bar = self._agg(timeframe).bar
+        return list(bar) if bar is not None else None
+
+
+class CandleFeed:
+    """
+    One symbol's base timeframe, polled over REST at most once per base bar.
+    - exchange: ccxt-like client with fetch_ohlcv
+    - base: base timeframe, e.g. '1m' or '15s'
+    """
+
+    def __init__(self, exchange, symbol: str, base: str = '1m', history: int = 500):
+        self.exchange = exchange
+        self.symbol = symbol
+        self.resampler = Resampler(base, history=history)
+        self.requests = 0
+        self._forming = 0  # open time of the base bar that was in progress at the last poll
+        self._lock = threading.Lock()
+
+    @property
+    def base(self) -> str:
+        return self.resampler.base
+
+    def add_timeframe(self, timeframe: str, seed: Optional[Sequence[Sequence[float]]] = None):
+        with self._lock:
+            self.resampler.add(timeframe, seed)
+
+    def poll(self, now: Optional[float] = None) -> List[Tuple[str, list]]:
+        """
+        Fetch the base bars closed since the last poll, unless that poll already saw the current
+        base bar forming; returns the closes it caused. Safe to call from every bot at every wake-up.
+        """
+        step = self.resampler.base_step
+        with self._lock:
+            now_ms = (time.time() if now is None else now) * 1000
+            if self._forming and now_ms < self._forming + step:
+                return []
+            missed = (now_ms - self._forming) // step if self._forming else self.resampler.history
+            rows = self.exchange.fetch_ohlcv(self.symbol, self.base, limit=int(min(1000, missed + 2)))
+            self.requests += 1
+            if not rows:
+                return []
+            events = []
+            for c in rows[:-1]:
+                events += self.resampler.push(c)
+            forming = rows[-1][0]
+            if rows[-1][0] + step <= now_ms:
+                # last row already ended: no trades since, so it is closed as well
+                events += self.resampler.push(rows[-1])
+                forming = now_ms // step * step
+            events += self.resampler.flush(forming)
+            self._forming = forming
+            return events
+
+    def closed(self, timeframe: str, since: float = 0) -> List[list]:
+        with self._lock:
+            return self.resampler.closed(timeframe, since)
+
+
+_feeds: Dict[Tuple[str, str, str], CandleFeed] = {}
+_feeds_lock = threading.Lock()
+
+
+def get_feed(exchange, symbol: str, base: str) -> CandleFeed:
+    """Process-wide feed for (exchange, symbol, base), shared by every bot trading the symbol."""
+    key = (str(getattr(exchange, 'id', id(exchange))), symbol, base)
+    with _feeds_lock:
+        feed = _feeds.get(key)
+        if feed is None:
+            feed = _feeds[key] = CandleFeed(exchange, symbol, base)
+        return feed
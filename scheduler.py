@@ -0,0 +1,141 @@
+# scheduler.py
+"""
+Shared timer for candle-boundary wake-ups.
+
+One scheduler thread keeps a heap of monotonic deadlines and sets each
+waiter's event when its time comes, so any number of bots can block until
+their next bar boundary without each polling its own sleep loop. Bar
+boundaries are wall-clock aligned (epoch % timeframe), converted once to a
+monotonic deadline so clock adjustments during the wait don't shift it.
+
+Waits also end when the caller's StopEvent is set, so stopping a bot is
+instant. A plain threading.Event also works, but it is only checked every
+`poll` seconds.
+"""
+import heapq
+import itertools
+import threading
+import time
+from typing import List, Optional, Set, Tuple
+
+DEFAULT_OFFSET = 2.0  # seconds after the boundary before a bar is treated as final on the exchange
+
+
+class StopEvent(threading.Event):
+    """threading.Event that also wakes scheduler waits blocked on its behalf."""
+
+    def __init__(self):
+        super().__init__()
+        self._waiters: Set[threading.Event] = set()
+        self._waiters_lock = threading.Lock()
+
+    def set(self):
+        super().set()
+        with self._waiters_lock:
+            waiters = list(self._waiters)
+        for ev in waiters:
+            ev.set()
+
+    def _attach(self, ev: threading.Event):
+        with self._waiters_lock:
+            self._waiters.add(ev)
+        if self.is_set():
+            ev.set()
+
+    def _detach(self, ev: threading.Event):
+        with self._waiters_lock:
+            self._waiters.discard(ev)
+
+
+class CandleScheduler:
+    """
+    - offset: default delay after each boundary (exchange finalization)
+    - poll: how often a plain threading.Event stop flag is checked
+    """
+
+    def __init__(self, offset: float = DEFAULT_OFFSET, poll: float = 0.5):
+        self.offset = offset
+        self.poll = poll
+        self._heap: List[Tuple[float, int, threading.Event]] = []
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+
+    @staticmethod
+    def next_boundary(seconds: float, offset: float = 0.0, now: Optional[float] = None) -> float:
+        """Wall-clock time of the next bar boundary plus offset, strictly after `now`."""
+        now = time.time() if now is None else now
+        target = (now - offset) // seconds * seconds + seconds + offset
+        return target
+
+    # ---- waiting ----
+    def wait_until(self, wall_time: float, stop_event: Optional[threading.Event] = None) -> bool:
+        """Block until `wall_time`; False if stop_event was set first."""
+        return self.wait_monotonic(time.monotonic() + (wall_time - time.time()), stop_event)
+
+    def wait_for(self, seconds: float, stop_event: Optional[threading.Event] = None) -> bool:
+        return self.wait_monotonic(time.monotonic() + seconds, stop_event)
+
+    def wait_for_boundary(self, seconds: float, stop_event: Optional[threading.Event] = None,
+                          offset: Optional[float] = None, lead: float = 0.0) -> bool:
+        """Wait for the next `seconds` bar boundary + offset - lead; False if stopped."""
+        offset = self.offset if offset is None else offset
+        target = self.next_boundary(seconds, offset - lead)
+        return self.wait_until(target, stop_event)
+
+    def wait_monotonic(self, deadline: float, stop_event: Optional[threading.Event] = None) -> bool:
+        if stop_event is not None and stop_event.is_set():
+            return False
+        if deadline <= time.monotonic():
+            return True
+        ev = threading.Event()
+        self._schedule(deadline, ev)
+        if isinstance(stop_event, StopEvent):
+            stop_event._attach(ev)
+            try:
+                ev.wait()
+            finally:
+                stop_event._detach(ev)
+        elif stop_event is not None:
+            while not ev.wait(self.poll):
+                if stop_event.is_set():
+                    break
+        else:
+            ev.wait()
+        return not (stop_event is not None and stop_event.is_set())
+
+    # ---- timer thread ----
+    def _schedule(self, deadline: float, ev: threading.Event):
+        with self._cond:
+            heapq.heappush(self._heap, (deadline, next(self._seq), ev))
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._loop, name="candle-scheduler", daemon=True)
+                self._thread.start()
+            elif self._heap[0][2] is ev:
+                self._cond.notify()  # new earliest deadline
+
+    def _loop(self):
+        with self._cond:
+            while True:
+                now = time.monotonic()
+                while self._heap and self._heap[0][0] <= now:
+                    heapq.heappop(self._heap)[2].set()
+                # stopped waiters leave stale entries; setting them later is harmless
+                self._cond.wait(self._heap[0][0] - now if self._heap else None)
+
+    def pending(self) -> int:
+        with self._cond:
+            return len(self._heap)
+
+
+_default: Optional[CandleScheduler] = None
+_default_lock = threading.Lock()
+
+
+def get_scheduler() -> CandleScheduler:
+    """Process-wide scheduler shared by every bot."""
+    global _default
+    with _default_lock:
+        if _default is None:
+            _default = CandleScheduler()
+        return _default
@@ -0,0 +1,156 @@
+# series.py
+"""
+Compact storage for candle and Heikin-Ashi series.
+
+RingBuffer keeps the last `capacity` rows of a fixed set of float columns in
+one flat array('d'), so appending a bar writes a few doubles in place and
+allocates nothing. A 6-bar OHLCV + HA pair costs about half a kilobyte, so
+thousands of series fit easily in one process.
+
+Candle is a __slots__ record and HACandle a dict subclass, created only when
+a caller asks for a whole row (logging, snapshots, charts). They can
+be indexed like the ccxt lists and HA dicts they replace: candle[4] and
+ha['close'].
+"""
+from array import array
+from operator import itemgetter
+from typing import Iterator, List, Sequence, Tuple
+
+OHLCV_FIELDS = ('ts', 'open', 'high', 'low', 'close', 'volume')
+HA_FIELDS = ('open', 'high', 'low', 'close')
+
+
+class Candle:
+    __slots__ = OHLCV_FIELDS
+
+    def __init__(self, ts: float, open: float, high: float, low: float, close: float, volume: float = 0.0):
+        self.ts = ts
+        self.open = open
+        self.high = high
+        self.low = low
+        self.close = close
+        self.volume = volume
+
+    def __getitem__(self, i):
+        # ccxt row layout: [ts, open, high, low, close, volume]
+        if isinstance(i, str):
+            return getattr(self, i)
+        return getattr(self, OHLCV_FIELDS[i]) if isinstance(i, int) else [getattr(self, f) for f in OHLCV_FIELDS[i]]
+
+    def __len__(self) -> int:
+        return 6
+
+    def __iter__(self):
+        return (getattr(self, f) for f in OHLCV_FIELDS)
+
+    def __eq__(self, other) -> bool:
+        return list(self) == list(other)
+
+    def __repr__(self) -> str:
+        return f"Candle({', '.join(repr(getattr(self, f)) for f in OHLCV_FIELDS)})"
+
+    def as_list(self) -> List[float]:
+        return [self.ts, self.open, self.high, self.low, self.close, self.volume]
+
+
+class HACandle(dict):
+    """
+    The HA dict the bot has always passed around ({'open', 'high', 'low', 'close'}), so
+    ha['close'] stays a C-level lookup on the hot path; ha.close also works.
+    """
+    __slots__ = ()
+
+    open = property(itemgetter('open'))
+    high = property(itemgetter('high'))
+    low = property(itemgetter('low'))
+    close = property(itemgetter('close'))
+
+    def __repr__(self) -> str:
+        return f"HACandle(open={self['open']!r}, high={self['high']!r}, low={self['low']!r}, close={self['close']!r})"
+
+    def as_dict(self) -> dict:
+        return dict(self)
+
+
+def ha_record(open: float, high: float, low: float, close: float) -> HACandle:
+    """HACandle from positional values (the HA_FIELDS order of a RingBuffer row)."""
+    return HACandle({'open': open, 'high': high, 'low': low, 'close': close})
+
+
+class RingBuffer:
+    """Last `capacity` rows of `len(fields)` floats; index 0 is the oldest kept row, -1 the newest."""
+
+    __slots__ = ('capacity', 'fields', 'width', '_data', '_next', '_len')
+
+    def __init__(self, capacity: int, fields: Sequence[str]):
+        self.capacity = capacity
+        self.fields = tuple(fields)
+        self.width = len(self.fields)
+        self._data = array('d', bytes(8 * capacity * self.width))
+        self._next = 0  # slot the next row goes into
+        self._len = 0
+
+    def __len__(self) -> int:
+        return self._len
+
+    def append(self, *values: float):
+        if self.capacity == 0:
+            return
+        data, base = self._data, self._next * self.width
+        for j, v in enumerate(values):
+            data[base + j] = v
+        self._next = (self._next + 1) % self.capacity
+        if self._len < self.capacity:
+            self._len += 1
+
+    def clear(self):
+        self._next = 0
+        self._len = 0
+
+    def _slot(self, i: int) -> int:
+        if i < 0:
+            i += self._len
+        if not 0 <= i < self._len:
+            raise IndexError("ring buffer index out of range")
+        return (self._next - self._len + i) % self.capacity
+
+    def value(self, i: int, col: int) -> float:
+        """Single float of row i, column index col: no row object is built."""
+        return self._data[self._slot(i) * self.width + col]
+
+    def row(self, i: int) -> Tuple[float, ...]:
+        base = self._slot(i) * self.width
+        return tuple(self._data[base:base + self.width])
+
+    def rows(self) -> Iterator[Tuple[float, ...]]:
+        return (self.row(i) for i in range(self._len))
+
+    def column(self, col: int) -> List[float]:
+        return [self.value(i, col) for i in range(self._len)]
+
+    def to_numpy(self):
+        """Rows oldest first as an (n, width) float64 array (copy)."""
+        import numpy as np  # deferred: only bulk readers need it
+
+        data = np.frombuffer(self._data, dtype=np.float64).reshape(self.capacity, self.width)
+        start = (self._next - self._len) % self.capacity if self.capacity else 0
+        return np.roll(data, -start, axis=0)[:self._len].copy()
+
+
+class RecordView:
+    """Read-only sequence over a RingBuffer that builds `record_type` rows on access."""
+
+    __slots__ = ('buffer', 'record_type')
+
+    def __init__(self, buffer: RingBuffer, record_type):
+        self.buffer = buffer
+        self.record_type = record_type
+
+    def __len__(self) -> int:
+        return len(self.buffer)
+
+    def __getitem__(self, i: int):
+        return self.record_type(*self.buffer.row(i))
+
+    def __iter__(self):
+        return (self.record_type(*row) for row in self.buffer.rows())
@@ -0,0 +1,139 @@
+# shared_exchange.py
+"""
+One request budget per exchange account, shared by every bot in the process.
+
+SharedExchange wraps a ccxt client whose own throttle is switched off. Every
+network call takes a token from a PriorityRateLimiter first. When calls queue
+up, orders go before account reads, and account reads go before market data.
+Identical ticker/OHLCV calls that are in flight at the same time are merged:
+the first caller does the request and the others get their own copy of its
+result, so one bot changing what it got back cannot affect the others.
+"""
+import copy
+import heapq
+import itertools
+import threading
+import time
+from concurrent.futures import Future
+from typing import Dict, List, Optional, Tuple
+
+ORDER = 0
+ACCOUNT = 1
+MARKET_DATA = 2
+
+COALESCED = ('fetch_ticker', 'fetch_tickers', 'fetch_ohlcv')
+
+
+def priority_of(method: str) -> Optional[int]:
+    """Limiter class for a ccxt method, or None if it does not hit the network."""
+    if method.startswith(('create_', 'cancel_', 'edit_')):
+        return ORDER
+    if method in ('fetch_positions', 'fetch_position', 'fetch_balance', 'fetch_order', 'fetch_orders',
+                  'fetch_open_orders', 'fetch_closed_orders', 'fetch_my_trades', 'set_leverage',
+                  'set_margin_mode', 'set_position_mode'):
+        return ACCOUNT
+    if method.startswith('fetch') or method == 'load_markets':
+        return MARKET_DATA
+    return None
+
+
+class PriorityRateLimiter:
+    """
+    Token bucket: `rate` requests/s with bursts up to `burst`. Waiters are served
+    lowest priority value first, FIFO within a priority.
+    """
+
+    def __init__(self, rate: float, burst: float = 1.0):
+        self.rate = rate
+        self.burst = max(1.0, burst)
+        self.tokens = self.burst
+        self.stamp = time.monotonic()
+        self._waiters: List[Tuple[int, int]] = []
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+
+    def acquire(self, priority: int = MARKET_DATA):
+        if self.rate <= 0:
+            return
+        with self._cond:
+            me = (priority, next(self._seq))
+            heapq.heappush(self._waiters, me)
+            try:
+                while True:
+                    now = time.monotonic()
+                    self.tokens = min(self.burst, self.tokens + (now - self.stamp) * self.rate)
+                    self.stamp = now
+                    if self._waiters[0] == me and self.tokens >= 1:
+                        self.tokens -= 1
+                        return
+                    wait = (1 - self.tokens) / self.rate if self._waiters[0] == me else None
+                    self._cond.wait(wait)
+            finally:
+                self._waiters.remove(me)
+                heapq.heapify(self._waiters)
+                self._cond.notify_all()
+
+
+class SharedExchange:
+    """Proxy around a ccxt client: shared limiter, priorities and merging of identical in-flight reads."""
+
+    def __init__(self, inner, limiter: PriorityRateLimiter):
+        self.__dict__['_inner'] = inner
+        self.__dict__['_limiter'] = limiter
+        self.__dict__['_inflight']: Dict[tuple, Future] = {}
+        self.__dict__['_inflight_lock'] = threading.Lock()
+        self.__dict__['merged'] = 0
+
+    def __getattr__(self, name):
+        attr = getattr(self._inner, name)
+        priority = priority_of(name) if callable(attr) else None
+        if priority is None:
+            return attr
+
+        def limited(*args, **kwargs):
+            self._limiter.acquire(priority)
+            return attr(*args, **kwargs)
+
+        if name in COALESCED:
+            def call(*args, **kwargs):
+                return self._coalesce((name, repr(args), repr(sorted(kwargs.items()))), limited, args, kwargs)
+        else:
+            call = limited
+        self.__dict__[name] = call  # later lookups skip __getattr__
+        return call
+
+    def __setattr__(self, name, value):
+        setattr(self._inner, name, value)
+
+    def _coalesce(self, key: tuple, fn, args, kwargs):
+        with self._inflight_lock:
+            fut = self._inflight.get(key)
+            owner = fut is None
+            if owner:
+                fut = self._inflight[key] = Future()
+            else:
+                self.__dict__['merged'] += 1
+        if not owner:
+            return copy.deepcopy(fut.result())
+        try:
+            result = fn(*args, **kwargs)
+            fut.set_result(result)
+            return result
+        except BaseException as e:
+            fut.set_exception(e)
+            raise
+        finally:
+            with self._inflight_lock:
+                self._inflight.pop(key, None)
+
+
+def configure_session(exchange, pool_size: int = 32):
+    """Give a sync ccxt client a keep-alive connection pool big enough for concurrent bots."""
+    session = getattr(exchange, 'session', None)
+    if session is None or not hasattr(session, 'mount'):
+        return
+    from requests.adapters import HTTPAdapter  # ccxt's sync client is built on requests
+
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
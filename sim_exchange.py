@@ -0,0 +1,533 @@
+# sim_exchange.py
+"""
+Local stand-in exchange for load-testing TradingBot without a live account.
+
+SimExchangeServer serves synthetic markets over HTTP/JSON:
+
+    GET  /ohlcv?symbol=&timeframe=&since=&limit=    GET /ticker?symbol=    GET /tickers?symbols=a,b
+    GET  /positions?symbols=a,b                      GET /balance          POST /order
+    GET  /stats
+
+Prices follow a seeded random walk per symbol, one bar per `bar_seconds`.
+Accounts are keyed by the X-API-KEY header and backed by
+backtest.SimulatedExchange. Each request can be delayed (latency/jitter),
+failed at random (error_rate) or refused by a per-key token bucket
+(rate_limit requests/s).
+
+SimExchangeClient speaks the subset of the ccxt unified API the bot uses,
+so it can be passed wherever a ccxt client is expected. `python
+sim_exchange.py load --bots 300` starts a server and that many TradingBots
+against it, then reports threads, memory, request rate and latencies.
+"""
+import argparse
+import http.client
+import json
+import random
+import resource
+import sys
+import threading
+import time
+from collections import Counter, deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+from urllib.parse import parse_qs, urlencode, urlparse
+
+from account_cache import AccountCache
+from backtest import SimulatedExchange
+from execution import ReversalExecutor
+from indicators import graph_for
+from metrics import Histogram
+from snapshot import DecisionJournal
+from strategies import DEFAULT_STRATEGY, feed, load_strategy
+from strategy import CONTRACT_SIZE, timeframe_to_seconds
+from trading_bot import TradingBot, decide
+
+DEFAULT_SYMBOLS = ("BTC/USDT:USDT", "ETH/USDT:USDT", "SOL/USDT:USDT")
+START_PRICES = {"BTC/USDT:USDT": 30000.0, "ETH/USDT:USDT": 2000.0, "SOL/USDT:USDT": 100.0}
+
+
+class ExchangeError(Exception):
+    pass
+
+
+class RateLimitExceeded(ExchangeError):
+    pass
+
+
+class ExchangeNotAvailable(ExchangeError):
+    pass
+
+
+ERRORS = {cls.__name__: cls for cls in (ExchangeError, RateLimitExceeded, ExchangeNotAvailable)}
+
+
+class PricePath:
+    """Seeded random-walk bars of `bar_ms`; bar i is the same on every run with the same seed."""
+
+    def __init__(self, start_price: float, bar_ms: int, seed: int, volatility: float = 0.002,
+                 history: int = 1000):
+        self.bar_ms = bar_ms
+        self.volatility = volatility
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        now_bar = int(time.time() * 1000) // bar_ms
+        self.first = now_bar - history
+        self.bars: List[List[float]] = []
+        self._price = start_price
+
+    def _extend(self, upto: int):
+        while self.first + len(self.bars) <= upto:
+            o = self._price
+            c = o * (1 + self._rng.gauss(0, self.volatility))
+            h = max(o, c) * (1 + abs(self._rng.gauss(0, self.volatility / 2)))
+            l = min(o, c) * (1 - abs(self._rng.gauss(0, self.volatility / 2)))
+            self.bars.append([(self.first + len(self.bars)) * self.bar_ms, o, h, l, c, self._rng.uniform(1, 100)])
+            self._price = c
+
+    def ohlcv(self, step_ms: int, since: Optional[int], limit: int) -> List[List[float]]:
+        """Bars resampled to `step_ms`, including the one still forming."""
+        now = int(time.time() * 1000)
+        with self._lock:
+            self._extend(now // self.bar_ms)
+            per = max(1, step_ms // self.bar_ms)
+            last = now // step_ms * step_ms
+            start = last - (limit - 1) * step_ms if since is None else since // step_ms * step_ms
+            start = max(start, -(-self.first * self.bar_ms // step_ms) * step_ms)
+            out = []
+            ts = start
+            while ts <= last and len(out) < limit:
+                i = ts // self.bar_ms - self.first
+                chunk = self.bars[i:i + per]
+                if chunk:
+                    if ts == last:
+                        chunk = self._forming(chunk, now)
+                    out.append([ts, chunk[0][1], max(b[2] for b in chunk), min(b[3] for b in chunk),
+                                chunk[-1][4], sum(b[5] for b in chunk)])
+                ts += step_ms
+            return out
+
+    def _forming(self, chunk: List[List[float]], now: int) -> List[List[float]]:
+        # the current bar moves from its open towards its close as time passes
+        last = chunk[-1]
+        frac = min(1.0, (now - last[0]) / self.bar_ms)
+        price = last[1] + (last[4] - last[1]) * frac
+        return chunk[:-1] + [[last[0], last[1], max(last[1], price), min(last[1], price), price, last[5] * frac]]
+
+    def price(self) -> float:
+        return self.ohlcv(self.bar_ms, None, 1)[-1][4]
+
+
+class TokenBucket:
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.stamp = time.monotonic()
+        self._lock = threading.Lock()
+
+    def take(self) -> bool:
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.stamp) * self.rate)
+            self.stamp = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return True
+            return False
+
+
+class SimExchangeServer:
+    """
+    - bar_seconds: length of the base bars the price paths are built from
+    - latency / jitter: seconds added to every request
+    - error_rate: fraction of requests answered with ExchangeNotAvailable (HTTP 503)
+    - rate_limit: requests per second per API key (0 = unlimited), bursting up to 2x
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, symbols=DEFAULT_SYMBOLS, bar_seconds: int = 1,
+                 latency: float = 0.0, jitter: float = 0.0, error_rate: float = 0.0, rate_limit: float = 0.0,
+                 balance: float = 1000.0, seed: int = 1):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rate_limit = rate_limit
+        self.balance = balance
+        self.paths = {s: PricePath(START_PRICES.get(s, 100.0), bar_seconds * 1000, seed + i)
+                      for i, s in enumerate(symbols)}
+        self.accounts: Dict[str, SimulatedExchange] = {}
+        self.buckets: Dict[str, TokenBucket] = {}
+        self.stats: Counter = Counter()
+        self._lock = threading.Lock()
+        self._rng = random.Random(seed)
+        self.httpd = ThreadingHTTPServer((host, port), self._handler())
+        self.httpd.daemon_threads = True
+        self.port = self.httpd.server_address[1]
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> 'SimExchangeServer':
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name="sim-exchange", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def request_count(self) -> int:
+        with self._lock:
+            return sum(n for k, n in self.stats.items() if k.startswith('/'))
+
+    def account(self, key: str) -> SimulatedExchange:
+        with self._lock:
+            acc = self.accounts.get(key)
+            if acc is None:
+                acc = SimulatedExchange(self.balance, CONTRACT_SIZE)
+                acc.trades = deque(maxlen=100)  # keep memory flat over long runs
+                self.accounts[key] = acc
+            return acc
+
+    def _bucket(self, key: str) -> TokenBucket:
+        with self._lock:
+            bucket = self.buckets.get(key)
+            if bucket is None:
+                bucket = self.buckets[key] = TokenBucket(self.rate_limit, self.rate_limit * 2)
+            return bucket
+
+    # ---- request handling ----
+    def handle(self, method: str, path: str, query: Dict[str, str], body: Dict, key: str):
+        """Return (status, payload)."""
+        with self._lock:
+            self.stats[path] += 1
+        if self.latency or self.jitter:
+            time.sleep(self.latency + self._rng.random() * self.jitter)
+        if self.rate_limit and not self._bucket(key).take():
+            with self._lock:
+                self.stats['rate_limited'] += 1
+            return 429, {'error': 'RateLimitExceeded', 'message': 'too many requests'}
+        if self.error_rate and self._rng.random() < self.error_rate:
+            with self._lock:
+                self.stats['injected_errors'] += 1
+            return 503, {'error': 'ExchangeNotAvailable', 'message': 'injected failure'}
+        try:
+            return 200, self._route(method, path, query, body, key)
+        except KeyError as e:
+            return 400, {'error': 'ExchangeError', 'message': f"unknown symbol or field {e}"}
+        except ValueError as e:
+            return 400, {'error': 'ExchangeError', 'message': str(e)}
+
+    def _route(self, method: str, path: str, query: Dict[str, str], body: Dict, key: str):
+        if path == '/ohlcv':
+            step = timeframe_to_seconds(query.get('timeframe', '1m')) * 1000
+            since = int(query['since']) if query.get('since') else None
+            return self.paths[query['symbol']].ohlcv(step, since, int(query.get('limit', 100)))
+        if path == '/ticker':
+            return self._ticker(query['symbol'])
+        if path == '/tickers':
+            symbols = query['symbols'].split(',') if query.get('symbols') else list(self.paths)
+            return {s: self._ticker(s) for s in symbols}
+        if path == '/stats':
+            with self._lock:
+                return {'requests': dict(self.stats), 'accounts': len(self.accounts)}
+        acc = self.account(key)
+        if path == '/positions':
+            symbols = query['symbols'].split(',') if query.get('symbols') else list(self.paths)
+            out = []
+            with acc._lock:
+                for s in symbols:
+                    acc.set_price(self.paths[s].price())
+                    out += acc.fetch_positions([s])
+            return out
+        if path == '/balance':
+            with acc._lock:
+                return acc.fetch_balance()
+        if path == '/order' and method == 'POST':
+            symbol = body['symbol']
+            with acc._lock:
+                acc.set_price(self.paths[symbol].price(), int(time.time() * 1000))
+                return acc._fill(symbol, body['side'], body['amount'], body.get('params') or {})
+        raise ValueError(f"no route {method} {path}")
+
+    def _ticker(self, symbol: str) -> Dict:
+        return {'symbol': symbol, 'last': self.paths[symbol].price(), 'timestamp': int(time.time() * 1000)}
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # keep-alive, like a pooled ccxt session
+
+            def _serve(self, method: str):
+                url = urlparse(self.path)
+                query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+                body = {}
+                length = int(self.headers.get('Content-Length') or 0)
+                if length:
+                    body = json.loads(self.rfile.read(length))
+                status, payload = server.handle(method, url.path, query, body, self.headers.get('X-API-KEY', ''))
+                data = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self):
+                self._serve('GET')
+
+            def do_POST(self):
+                self._serve('POST')
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+
+class SimExchangeClient:
+    """Minimal ccxt-style client for SimExchangeServer; one keep-alive connection per client."""
+
+    id = 'sim'
+
+    def __init__(self, url: str, api_key: str = 'default', timeout: float = 10.0):
+        parsed = urlparse(url)
+        self.host, self.port = parsed.hostname, parsed.port
+        self.apiKey = api_key
+        self.timeout = timeout
+        self.markets: Dict[str, Dict] = {}
+        self.currencies: Dict = {}
+        self._conn: Optional[http.client.HTTPConnection] = None
+        self._lock = threading.Lock()
+
+    def _request(self, method: str, path: str, query: Optional[Dict] = None, body: Optional[Dict] = None):
+        if query:
+            path += "?" + urlencode({k: v for k, v in query.items() if v is not None})
+        data = json.dumps(body).encode() if body is not None else None
+        headers = {'X-API-KEY': self.apiKey, 'Content-Type': 'application/json'}
+        with self._lock:
+            for attempt in range(2):
+                if self._conn is None:
+                    self._conn = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+                try:
+                    self._conn.request(method, path, body=data, headers=headers)
+                    resp = self._conn.getresponse()
+                    payload = json.loads(resp.read())
+                    break
+                except (http.client.HTTPException, OSError):
+                    # stale keep-alive socket: reconnect once
+                    self._conn.close()
+                    self._conn = None
+                    if attempt:
+                        raise ExchangeNotAvailable(f"{method} {path} failed")
+        if resp.status != 200:
+            raise ERRORS.get(payload.get('error'), ExchangeError)(payload.get('message', ''))
+        return payload
+
+    # ---- ccxt-compatible surface ----
+    def load_markets(self, reload: bool = False) -> Dict[str, Dict]:
+        if not self.markets or reload:
+            symbols = list(self._request('GET', '/tickers'))
+            self.set_markets({s: {'symbol': s, 'contract': True, 'linear': True, 'contractSize': CONTRACT_SIZE,
+                                  'precision': {'amount': 1}} for s in symbols})
+        return self.markets
+
+    def set_markets(self, markets: Dict, currencies=None):
+        self.markets = markets
+        self.currencies = currencies or {}
+
+    def market(self, symbol: str) -> Dict:
+        return self.load_markets()[symbol]
+
+    def amount_to_precision(self, symbol: str, amount) -> str:
+        return str(int(float(amount)))
+
+    def set_leverage(self, leverage, symbol: str, params=None):
+        return {'leverage': leverage, 'symbol': symbol}
+
+    def fetch_ohlcv(self, symbol: str, timeframe: str = '1m', since: Optional[int] = None,
+                    limit: Optional[int] = None, params=None) -> List[List[float]]:
+        return self._request('GET', '/ohlcv', {'symbol': symbol, 'timeframe': timeframe, 'since': since,
+                                               'limit': limit or 100})
+
+    def fetch_ticker(self, symbol: str, params=None) -> Dict:
+        return self._request('GET', '/ticker', {'symbol': symbol})
+
+    def fetch_tickers(self, symbols: Optional[List[str]] = None, params=None) -> Dict[str, Dict]:
+        return self._request('GET', '/tickers', {'symbols': ','.join(symbols) if symbols else None})
+
+    def fetch_positions(self, symbols: Optional[List[str]] = None, params=None) -> List[Dict]:
+        return self._request('GET', '/positions', {'symbols': ','.join(symbols) if symbols else None})
+
+    def fetch_balance(self, params=None) -> Dict:
+        return self._request('GET', '/balance')
+
+    def create_market_order(self, symbol: str, side: str, amount, price=None, params: Optional[Dict] = None) -> Dict:
+        return self._request('POST', '/order', body={'symbol': symbol, 'side': side, 'amount': float(amount),
+                                                     'params': params or {}})
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+# ========== Load test harness ==========
+
+class SimBot(TradingBot):
+    """
+    TradingBot whose step is the _run_once() decision cycle against a SimExchangeClient. Bots on the same
+    symbol share one graph_for() graph, as live bots do; snapshots are kept in memory only.
+    """
+
+    def __init__(self, config: Dict, client: SimExchangeClient, log_cb=None):
+        super().__init__(config, log_cb=log_cb or (lambda s: None))
+        self.client = client
+        self.symbol = config["SYMBOL"]
+        self.timeframe = config["TIMEFRAME"]
+        self.strategy = load_strategy(config.get("STRATEGY", DEFAULT_STRATEGY), config.get("STRATEGY_PARAMS"))
+        self.strategy.bind(graph_for(self.symbol, self.timeframe))
+        self.journal = DecisionJournal(None, 'sim', self.symbol, self.timeframe, self.strategy)
+        self.account = AccountCache(client, [self.symbol], CONTRACT_SIZE, max_age=0, log_cb=self.log)
+        self.executor = ReversalExecutor(client, self.symbol, self.account, config, CONTRACT_SIZE,
+                                         mode=config.get("EXECUTION_MODE", "sequential"), log_cb=self.log)
+        self.cycle_time = Histogram()
+        self.decisions = 0
+        self.orders = 0
+        self.errors = 0
+
+    def _run_once(self):
+        start = time.perf_counter()
+        try:
+            candles = self.client.fetch_ohlcv(self.symbol, self.timeframe, limit=7)[:-1]
+            if not self.strategy.last_ts:
+                feed(self.strategy, candles)
+                self.journal.decided(None, [])
+                return
+            self.executor.prepare()
+            new_bars, trend = feed(self.strategy, candles)
+            if new_bars:
+                self.orders += len(decide(self.journal, self.executor, trend))
+            self.decisions += 1
+        except ExchangeError:
+            self.errors += 1
+        finally:
+            self.cycle_time.observe(time.perf_counter() - start)
+
+
+def _rss_mb() -> float:
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / 1024 / (1024 if sys.platform == 'darwin' else 1)
+
+
+def load_test(bots: int = 100, duration: float = 60.0, timeframe: str = '1m', poll_interval: float = 1.0,
+              server: Optional[SimExchangeServer] = None, url: Optional[str] = None, log_cb=print) -> Dict:
+    """Start `bots` SimBots (spread over the server's symbols), run for `duration` seconds and report."""
+    own = server is None and url is None
+    if own:
+        server = SimExchangeServer().start()
+    url = url or server.url()
+    symbols = list(server.paths) if server else list(DEFAULT_SYMBOLS)
+    baseline_threads = threading.active_count()
+
+    fleet: List[SimBot] = []
+    started = time.perf_counter()
+    for i in range(bots):
+        config = {"SYMBOL": symbols[i % len(symbols)], "TIMEFRAME": timeframe, "POLL_INTERVAL": poll_interval,
+                  "CONTRACT_NUM": 1, "MARGIN_PERCENT": 50, "LEVERAGE": 5}
+        bot = SimBot(config, SimExchangeClient(url, api_key=f"bot-{i}"))
+        bot.start()
+        fleet.append(bot)
+    ramp = time.perf_counter() - started
+    log_cb(f"{bots} bots started in {ramp:.2f}s, {threading.active_count()} threads")
+
+    requests_before = server.request_count() if server else 0
+    time.sleep(duration)
+    requests = (server.request_count() if server else 0) - requests_before
+    peak_threads = threading.active_count()
+
+    stop_started = time.perf_counter()
+    for bot in fleet:
+        bot._stop_event.set()
+    for bot in fleet:
+        bot.stop(timeout=15)
+        bot.client.close()
+    stop_time = time.perf_counter() - stop_started
+
+    cycles = Histogram()
+    for bot in fleet:
+        for i, n in enumerate(bot.cycle_time.counts):
+            cycles.counts[i] += n
+        cycles.count += bot.cycle_time.count
+        cycles.sum += bot.cycle_time.sum
+        cycles.min = min(cycles.min, bot.cycle_time.min)
+        cycles.max = max(cycles.max, bot.cycle_time.max)
+    report = {
+        'bots': bots,
+        'duration_s': duration,
+        'ramp_s': ramp,
+        'stop_s': stop_time,
+        'threads_baseline': baseline_threads,
+        'threads_peak': peak_threads,
+        'max_rss_mb': _rss_mb(),
+        'requests': requests,
+        'requests_per_s': requests / duration,
+        'decisions': sum(b.decisions for b in fleet),
+        'orders': sum(b.orders for b in fleet),
+        'errors': sum(b.errors for b in fleet),
+        'cycle_s': cycles.snapshot(),
+        'server': dict(server.stats) if server else {},
+    }
+    if own:
+        server.stop()
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Simulated exchange server and TradingBot load test")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    for name in ("serve", "load"):
+        p = sub.add_parser(name)
+        p.add_argument("--port", type=int, default=8765 if name == "serve" else 0)
+        p.add_argument("--bar-seconds", type=int, default=1)
+        p.add_argument("--latency", type=float, default=0.0)
+        p.add_argument("--jitter", type=float, default=0.0)
+        p.add_argument("--error-rate", type=float, default=0.0)
+        p.add_argument("--rate-limit", type=float, default=0.0, help="requests/s per API key, 0 = unlimited")
+        p.add_argument("--seed", type=int, default=1)
+        if name == "load":
+            p.add_argument("--bots", type=int, default=100)
+            p.add_argument("--duration", type=float, default=60.0)
+            p.add_argument("--timeframe", default="1m")
+            p.add_argument("--poll-interval", type=float, default=1.0)
+            p.add_argument("--out", default=None, help="write the report as JSON")
+    args = parser.parse_args(argv)
+
+    server = SimExchangeServer(port=args.port, bar_seconds=args.bar_seconds, latency=args.latency,
+                               jitter=args.jitter, error_rate=args.error_rate, rate_limit=args.rate_limit,
+                               seed=args.seed).start()
+    if args.command == "serve":
+        print(f"Simulated exchange on {server.url()}")
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            server.stop()
+        return 0
+
+    report = load_test(args.bots, args.duration, args.timeframe, args.poll_interval, server=server)
+    server.stop()
+    print(json.dumps(report, indent=2))
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,156 @@
+# snapshot.py
+"""
+Warm-restart snapshots for the live loop.
+
+After each decision run() saves one small JSON file per symbol/timeframe.
+It holds the indicator graph and strategy state, the last bar that was
+acted on, the expected position side and any order intent that had not
+been confirmed yet. The file is replaced atomically, so a crash leaves
+either the old snapshot or the new one.
+
+On start run() restores the graph from the snapshot and only processes
+bars newer than it. It checks the recorded position against the exchange
+and never re-sends orders for a bar it already decided on.
+"""
+import json
+import os
+import time
+from typing import Dict, List, Optional
+
+from indicators import IndicatorGraph
+
+VERSION = 3
+
+
+class SnapshotStore:
+    def __init__(self, root: str = ".state"):
+        self.root = root
+
+    def path(self, exchange_id: str, symbol: str, timeframe: str) -> str:
+        name = f"{exchange_id}-{symbol}-{timeframe}".replace('/', '_').replace(':', '_')
+        return os.path.join(self.root, f"{name}.json")
+
+    def save(self, path: str, snapshot: Dict):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp = f"{path}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(snapshot, f, separators=(',', ':'))
+        os.replace(tmp, path)
+
+    def load(self, path: str) -> Optional[Dict]:
+        try:
+            with open(path) as f:
+                snapshot = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if snapshot.get('version') != VERSION:
+            return None
+        return snapshot
+
+
+def make_snapshot(symbol: str, timeframe: str, graph: IndicatorGraph, decided_ts: int,
+                  trend: Optional[str], position_side: Optional[str], pending: Optional[Dict] = None,
+                  orders: Optional[List[Dict]] = None, strategy=None) -> Dict:
+    """
+    - decided_ts: open time of the last bar the bot made its decision on
+    - position_side: 'long' / 'short' / None as the bot believes it to be
+    - pending: order intent written before sending ({'bar', 'trend'}), cleared once acked
+    - orders: ids and sides of the orders sent for decided_ts
+    - strategy: the bound Strategy; its class, params and own state are saved with the graph
+    """
+    return {
+        'version': VERSION,
+        'saved_at': time.time(),
+        'symbol': symbol,
+        'timeframe': timeframe,
+        'graph': graph.state(),
+        'strategy': strategy_key(strategy) + [strategy.state()] if strategy is not None else None,
+        'decided_ts': decided_ts,
+        'trend': trend,
+        'position_side': position_side,
+        'pending': pending,
+        'orders': orders or [],
+    }
+
+
+class DecisionJournal:
+    """
+    Snapshot bookkeeping of one live loop, shared by trading_bot.run() and TradingBot.
+    - restore(since): load a snapshot of the same symbol/timeframe/strategy into the bound strategy and
+      its graph; returns it, or None (nothing changed) if there is none or it is older than `since`
+    - is_new(): the strategy's last bar has not been decided on yet (never act twice on a bar)
+    - intent(trend): write-ahead save before the orders for the last bar are sent
+    - decided(trend, records): save once the last bar is decided; `records` are the orders sent for it
+    With store=None the bookkeeping is kept in memory only (bench.py, the sim_exchange load test).
+    """
+
+    def __init__(self, store: Optional[SnapshotStore], exchange_id: str, symbol: str, timeframe: str, strategy,
+                 position_side: Optional[str] = None):
+        self.store = store
+        self.path = store.path(exchange_id, symbol, timeframe) if store is not None else None
+        self.symbol = symbol
+        self.timeframe = timeframe
+        self.strategy = strategy
+        self.position_side = position_side
+        self.decided_ts = 0
+        self._pending: Optional[str] = None
+
+    def restore(self, since: int = 0) -> Optional[Dict]:
+        snap = self.store.load(self.path) if self.store is not None else None
+        if not (snap and snap['symbol'] == self.symbol and snap['timeframe'] == self.timeframe
+                and snap['graph']['last_ts'] >= since and snap['strategy']
+                and snap['strategy'][:2] == strategy_key(self.strategy)):
+            return None
+        self.strategy.graph.restore(snap['graph'])
+        self.strategy.restore(snap['strategy'][2])
+        self.decided_ts = snap['decided_ts']
+        self.position_side = snap['position_side']
+        return snap
+
+    def is_new(self) -> bool:
+        return self.strategy.last_ts > self.decided_ts
+
+    def _save(self, trend: Optional[str], **extra):
+        if self.store is None:
+            return
+        self.store.save(self.path, make_snapshot(self.symbol, self.timeframe, self.strategy.graph, self.decided_ts,
+                                                 trend, self.position_side, strategy=self.strategy, **extra))
+
+    def intent(self, trend: str):
+        self._pending = trend
+        self._save(trend, pending={'bar': self.strategy.last_ts, 'trend': trend})
+
+    def decided(self, trend: Optional[str], records: List[Dict]):
+        if self._pending is not None:
+            self.position_side = 'long' if self._pending == 'up' else 'short'
+            self._pending = None
+        self.decided_ts = self.strategy.last_ts
+        self._save(trend, orders=order_summary(records))
+
+
+def strategy_key(strategy) -> List:
+    """[class path, params]; a snapshot is only restored into the same strategy."""
+    cls = type(strategy)
+    return [f"{cls.__module__}:{cls.__name__}", strategy.params]
+
+
+def order_summary(records: List[Dict]) -> List[Dict]:
+    return [{'leg': r['leg'], 'side': r['side'], 'amount': r['amount'], 'id': r.get('order_id')} for r in records]
+
+
+def check_against_exchange(snapshot: Dict, position: Optional[Dict]) -> List[str]:
+    """Differences between the snapshot and the live position, as log-ready warnings."""
+    issues = []
+    live_side = position['side'] if position else None
+    pending = snapshot.get('pending')
+    if pending:
+        want = 'long' if pending['trend'] == 'up' else 'short'
+        if live_side == want:
+            issues.append(f"orders for bar {pending['bar']} were sent before the restart and are filled")
+        else:
+            issues.append(f"[WARN] orders for bar {pending['bar']} may not have completed "
+                          f"(expected {want}, exchange has {live_side}); not resending")
+    elif snapshot.get('position_side') != live_side:
+        issues.append(f"[WARN] position changed while stopped: snapshot {snapshot.get('position_side')}, "
+                      f"exchange {live_side}")
+    return issues
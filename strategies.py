@@ -0,0 +1,203 @@
+# strategies.py
+"""
+Pluggable strategies built on the incremental indicators in indicators.py.
+
+A strategy declares its indicators in setup() and decides in on_bar(), which
+runs once per finalized bar after every indicator has been updated. on_bar()
+returns 'up' / 'down' when the position should be reversed to long / short,
+or None to keep it. The same class runs live (TradingBot, trading_bot.run())
+on the shared graph_for() graph and in bulk replay (replay(), backtest.py)
+on a private graph.
+
+Strategies are chosen with STRATEGY: a name from STRATEGIES or
+"module:Class". STRATEGY_PARAMS is a JSON object of params.
+"""
+import importlib
+import json
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+from indicators import ATR, EMA, RSI, HeikinAshi, IndicatorGraph
+
+
+class Strategy:
+    """
+    - params: overrides for `defaults`
+    - warmup: bars the indicators need before on_bar() signals are meaningful
+    - last_ts: open time of the last bar on_bar() ran for
+    - state()/restore(): last_ts and the fields listed in `_state` (indicators are saved by the graph)
+    """
+    name = ''
+    defaults: Dict = {}
+    _state: Tuple[str, ...] = ()
+
+    def __init__(self, params: Optional[Dict] = None):
+        self.params = {**self.defaults, **(params or {})}
+        self.graph: Optional[IndicatorGraph] = None
+        self.last_ts = 0
+
+    def bind(self, graph: IndicatorGraph) -> 'Strategy':
+        self.graph = graph
+        self.setup()
+        return self
+
+    def indicator(self, cls, **params):
+        return self.graph.get(cls, **params)
+
+    def setup(self):
+        pass
+
+    @property
+    def warmup(self) -> int:
+        return 0
+
+    def on_bar(self) -> Optional[str]:
+        raise NotImplementedError
+
+    def describe(self) -> str:
+        """One log line with the indicator values the last decision was based on."""
+        return ""
+
+    def state(self) -> Dict:
+        return {k: getattr(self, k) for k in ('last_ts',) + self._state}
+
+    def restore(self, state: Dict):
+        for k in ('last_ts',) + self._state:
+            if k in state:
+                setattr(self, k, state[k])
+
+
+class HAReversal(Strategy):
+    """Reverse whenever the Heikin-Ashi candle changes color (the original bot logic)."""
+    name = 'ha_reversal'
+
+    def setup(self):
+        self.ha = self.indicator(HeikinAshi)
+
+    @property
+    def warmup(self) -> int:
+        return 2
+
+    def on_bar(self) -> Optional[str]:
+        return self.ha.trend if self.ha.changed else None
+
+    def describe(self) -> str:
+        if self.ha.value is None:
+            return ""
+        return f"HA: O={self.ha.open:.2f} C={self.ha.close:.2f} trend={self.ha.trend}"
+
+
+class EMACross(Strategy):
+    """
+    Reverse when the fast EMA crosses the slow one.
+    - min_atr_percent: skip crosses while ATR is below this % of price (0 = no filter)
+    """
+    name = 'ema_cross'
+    defaults = {'fast': 9, 'slow': 21, 'source': 'close', 'atr_period': 14, 'min_atr_percent': 0.0}
+    _state = ('_above',)
+
+    def setup(self):
+        p = self.params
+        self.fast = self.indicator(EMA, period=p['fast'], source=p['source'])
+        self.slow = self.indicator(EMA, period=p['slow'], source=p['source'])
+        self.atr = self.indicator(ATR, period=p['atr_period']) if p['min_atr_percent'] > 0 else None
+        self._above: Optional[bool] = None
+
+    @property
+    def warmup(self) -> int:
+        return max(self.params['fast'], self.params['slow']) + 1
+
+    def on_bar(self) -> Optional[str]:
+        if not (self.fast.ready and self.slow.ready):
+            return None
+        above, prev = self.fast.value > self.slow.value, self._above
+        self._above = above
+        if prev is None or above == prev:
+            return None
+        if self.atr is not None and (not self.atr.ready or
+                                     self.atr.value < self.graph.close * self.params['min_atr_percent'] / 100):
+            return None
+        return 'up' if above else 'down'
+
+    def describe(self) -> str:
+        if not self.slow.ready:
+            return ""
+        return f"EMA{self.params['fast']}={self.fast.value:.2f} EMA{self.params['slow']}={self.slow.value:.2f}"
+
+
+class RSIReversal(Strategy):
+    """Go long when RSI leaves the oversold zone, short when it leaves the overbought zone."""
+    name = 'rsi_reversal'
+    defaults = {'period': 14, 'lower': 30.0, 'upper': 70.0}
+    _state = ('_prev',)
+
+    def setup(self):
+        self.rsi = self.indicator(RSI, period=self.params['period'])
+        self._prev: Optional[float] = None
+
+    @property
+    def warmup(self) -> int:
+        return self.params['period'] + 2
+
+    def on_bar(self) -> Optional[str]:
+        value, prev = self.rsi.value, self._prev
+        self._prev = value
+        if value is None or prev is None:
+            return None
+        if prev < self.params['lower'] <= value:
+            return 'up'
+        if prev > self.params['upper'] >= value:
+            return 'down'
+        return None
+
+    def describe(self) -> str:
+        return f"RSI{self.params['period']}={self.rsi.value:.1f}" if self.rsi.ready else ""
+
+
+STRATEGIES = {cls.name: cls for cls in (HAReversal, EMACross, RSIReversal)}
+DEFAULT_STRATEGY = HAReversal.name
+
+
+def load_strategy(spec: str = DEFAULT_STRATEGY, params: Union[None, str, Dict] = None) -> Strategy:
+    """Build a strategy from a STRATEGIES name or "module:Class"; params may be a JSON string."""
+    if isinstance(params, str):
+        params = json.loads(params) if params.strip() else None
+    cls = STRATEGIES.get(spec)
+    if cls is None:
+        module, _, name = spec.partition(':')
+        if not name:
+            raise ValueError(f"Unknown strategy '{spec}', expected one of {sorted(STRATEGIES)} or module:Class")
+        cls = getattr(importlib.import_module(module), name)
+    return cls(params)
+
+
+def feed(strategy: Strategy, candles: Sequence[Sequence[float]]) -> Tuple[int, Optional[str]]:
+    """
+    Run on_bar() for every ccxt row newer than strategy.last_ts; returns (bars seen, signal of the last one).
+    A bar another strategy already pushed into the shared graph is used as is, provided the graph has
+    not moved past it.
+    """
+    graph, n, signal = strategy.graph, 0, None
+    for row in candles:
+        ts = row[0]
+        if ts <= strategy.last_ts:
+            continue
+        with graph.lock:
+            graph.push(*row[:6])
+            if graph.ts != ts:
+                continue
+            strategy.last_ts = ts
+            signal = strategy.on_bar()
+        n += 1
+    return n, signal
+
+
+def replay(strategy: Strategy, candles: Sequence[Sequence[float]], symbol: str = '',
+           timeframe: str = '') -> List[Tuple[int, str]]:
+    """Run `strategy` over ccxt rows on a private graph; returns (row index, trend) for every signal."""
+    strategy.bind(IndicatorGraph(symbol, timeframe))
+    signals = []
+    for i, row in enumerate(candles):
+        _, trend = feed(strategy, (row,))
+        if trend is not None:
+            signals.append((i, trend))
+    return signals
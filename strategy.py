@@ -0,0 +1,157 @@
+# strategy.py
+"""
+Pure pieces of the Heikin-Ashi reversal strategy, shared by the live loop in
+trading_bot.py, the backtester and the execution pipeline. Nothing here
+touches the network.
+"""
+from typing import List, Tuple, Optional, Sequence
+
+from series import HA_FIELDS, OHLCV_FIELDS, Candle, HACandle, RecordView, RingBuffer, ha_record
+
+CONTRACT_SIZE = 0.0001
+
+_UNITS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400, 'w': 604800}
+
+
+def int_to_timeframe(seconds: int) -> str:
+    if seconds < 60:
+        return f"{seconds}s"
+    elif seconds % 60 == 0:
+        minutes = seconds // 60
+        return f"{minutes}m"
+    else:
+        raise ValueError(
+            "Timeframe must be divisible by 60 or less than 60 seconds.")
+
+
+def timeframe_to_seconds(timeframe: str) -> int:
+    return int(timeframe[:-1]) * _UNITS[timeframe[-1]]
+
+
+class HeikinAshiEngine:
+    """
+    Streaming Heikin-Ashi calculator.
+    - push(ts, o, h, l, c, v): fold one finalized bar in O(1) without allocating
+    - update(candle): same for a ccxt row, returning the HA candle as a record
+    - ingest(candles): update with the rows newer than the last processed timestamp
+    - trend_change(): detect_trend_change() on the last two HA bars, read straight from the buffers
+    The HA open carries over the whole history fed in, so once seeded from a
+    long fetch the values match the exchange charts instead of a short window.
+    The last `maxlen` bars are kept in ring buffers, exposed as `candles` and `ha`.
+    """
+
+    def __init__(self, maxlen: int = 6):
+        self.ohlcv = RingBuffer(maxlen, OHLCV_FIELDS)
+        self.ha_buffer = RingBuffer(maxlen, HA_FIELDS)
+        self.candles = RecordView(self.ohlcv, Candle)
+        self.ha = RecordView(self.ha_buffer, ha_record)
+        self.last_ts = 0
+        self._prev_open: Optional[float] = None
+        self._prev_close: Optional[float] = None
+
+    def push(self, ts: float, o: float, h: float, l: float, cl: float, volume: float = 0.0):
+        ha_close = (o + h + l + cl) / 4
+        if self._prev_open is None:
+            ha_open = (o + cl) / 2
+        else:
+            ha_open = (self._prev_open + self._prev_close) / 2
+        self._prev_open, self._prev_close = ha_open, ha_close
+        self.last_ts = ts
+        self.ohlcv.append(ts, o, h, l, cl, volume)
+        self.ha_buffer.append(ha_open, max(h, ha_open, ha_close), min(l, ha_open, ha_close), ha_close)
+
+    def update(self, candle: Sequence[float]) -> HACandle:
+        ts, o, h, l, cl = candle[:5]
+        self.push(ts, o, h, l, cl, candle[5] if len(candle) > 5 else 0.0)
+        ha_open, ha_close = self._prev_open, self._prev_close
+        return HACandle({'open': ha_open, 'high': max(h, ha_open, ha_close), 'low': min(l, ha_open, ha_close),
+                         'close': ha_close})
+
+    def seed(self, candles: List[Sequence[float]]) -> int:
+        return self.ingest(candles)
+
+    def ingest(self, candles: List[Sequence[float]]) -> int:
+        """Fold in the rows newer than last_ts and return how many there were."""
+        n = 0
+        for c in candles:
+            if c[0] > self.last_ts:
+                self.push(c[0], c[1], c[2], c[3], c[4], c[5] if len(c) > 5 else 0.0)
+                n += 1
+        return n
+
+    def trend(self, i: int = -1) -> str:
+        buf = self.ha_buffer
+        return 'up' if buf.value(i, 3) > buf.value(i, 0) else 'down'
+
+    def trend_change(self) -> Tuple[bool, Optional[str]]:
+        """(changed, trend of the last bar); (False, None) until two bars are kept."""
+        if len(self.ha_buffer) < 2:
+            return False, None
+        trend = self.trend(-1)
+        return trend != self.trend(-2), trend
+
+    def state(self) -> dict:
+        """JSON-serializable state; restore() continues the HA chain exactly where it stopped."""
+        return {
+            'last_ts': self.last_ts,
+            'prev_open': self._prev_open,
+            'prev_close': self._prev_close,
+            'candles': [list(row) for row in self.ohlcv.rows()],
+            'ha': [list(row) for row in self.ha_buffer.rows()],
+        }
+
+    def restore(self, state: dict):
+        self.ohlcv.clear()
+        self.ha_buffer.clear()
+        for row in state['candles']:
+            self.ohlcv.append(*row)
+        for row in state['ha']:
+            self.ha_buffer.append(*row)
+        self.last_ts = state['last_ts']
+        self._prev_open = state['prev_open']
+        self._prev_close = state['prev_close']
+
+
+def to_heikin_ashi(candles: List[List[float]]) -> List[dict]:
+    # same arithmetic as HeikinAshiEngine.push, inlined: this runs over whole histories, and
+    # plain dicts keep the detect_trend_change() scan over the result on the fast subscript path
+    out = []
+    append = out.append
+    prev_open = prev_close = None
+    for c in candles:
+        o, h, l, cl = c[1], c[2], c[3], c[4]
+        ha_close = (o + h + l + cl) / 4
+        ha_open = (o + cl) / 2 if prev_open is None else (prev_open + prev_close) / 2
+        append({'open': ha_open, 'high': max(h, ha_open, ha_close), 'low': min(l, ha_open, ha_close),
+                'close': ha_close})
+        prev_open, prev_close = ha_open, ha_close
+    return out
+
+
+def detect_trend_change(c1: dict, c2: dict) -> Tuple[bool, str]:
+    trend1 = 'up' if c1['close'] > c1['open'] else 'down'
+    trend2 = 'up' if c2['close'] > c2['open'] else 'down'
+    return trend1 != trend2, trend2
+
+
+def close_order_params(pos) -> Tuple[str, float, str]:
+    side = 'sell' if pos['side'] == 'long' else 'buy'
+    amount = float(pos['contracts'])
+    position_side = 'LONG' if side == 'sell' else 'SHORT'
+    return side, amount, position_side
+
+
+def open_order_params(trend: str) -> Tuple[str, str]:
+    side = 'buy' if trend == 'up' else 'sell'
+    position_side = 'LONG' if side == 'buy' else 'SHORT'
+    return side, position_side
+
+
+def position_amount(last_price: float, usdt_balance: Optional[float], contract_num: int,
+                    margin_percent: float, leverage: float, contract_size: float = CONTRACT_SIZE) -> int:
+    """Contracts to open: CONTRACT_NUM if fixed, else MARGIN_PERCENT of the balance times LEVERAGE."""
+    if contract_num > 0:  # fixed
+        return contract_num
+    margin = usdt_balance * (margin_percent / 100)
+    position_size = margin * leverage
+    return int(position_size / (last_price * contract_size))
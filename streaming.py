@@ -0,0 +1,159 @@
+# streaming.py
+"""
+WebSocket candle streaming with REST fallback.
+
+CandleStream subscribes to kline updates through a ccxt.pro client on a
+background asyncio loop. A bar is final as soon as the first update of the
+next bar arrives, so the "candle closed" event fires right at the boundary
+instead of after a fixed sleep. When the stream is down, or a bar has no
+next-bar update by its deadline (no trades yet), next_closed() falls back to
+a REST fetch_ohlcv for that bar.
+"""
+import asyncio
+import threading
+import time
+import traceback
+from collections import deque
+from typing import Callable, List, Optional
+
+from strategy import timeframe_to_seconds
+
+
+class CandleStream:
+    """
+    - ws_factory(): returns a ccxt.pro exchange; called on the stream thread
+    - rest_exchange: synchronous ccxt client used for the fallback fetch
+    - grace: seconds past the bar boundary to wait for the stream before falling back
+    """
+
+    def __init__(self, ws_factory: Callable, rest_exchange, symbol: str, timeframe: str,
+                 log_cb: Optional[Callable[[str], None]] = None, grace: float = 1.5,
+                 rest_delay: float = 2.0, reconnect_delay: float = 1.0):
+        self.ws_factory = ws_factory
+        self.rest_exchange = rest_exchange
+        self.symbol = symbol
+        self.timeframe = timeframe
+        self.step = timeframe_to_seconds(timeframe) * 1000
+        self.log = log_cb or (lambda s: print(s))
+        self.grace = grace
+        self.rest_delay = rest_delay
+        self.reconnect_delay = reconnect_delay
+        self.connected = False
+        self.last_emitted = 0
+        self.last_close_latency: Optional[float] = None
+        self._current: Optional[list] = None
+        self._closed: deque = deque(maxlen=100)
+        self._cond = threading.Condition()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._task: Optional[asyncio.Task] = None
+
+    # ---- stream thread ----
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._thread_main, name=f"stream-{self.symbol}", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        self._stop.set()
+        if self._loop and self._task:
+            try:
+                self._loop.call_soon_threadsafe(self._task.cancel)
+            except RuntimeError:
+                pass  # loop already closed
+        with self._cond:
+            self._cond.notify_all()
+        if self._thread:
+            self._thread.join(timeout)
+
+    def _thread_main(self):
+        self._loop = asyncio.new_event_loop()
+        self._task = self._loop.create_task(self._watch())
+        try:
+            self._loop.run_until_complete(self._task)
+        except asyncio.CancelledError:
+            pass
+        finally:
+            self._loop.close()
+
+    async def _watch(self):
+        ws = self.ws_factory()
+        try:
+            while not self._stop.is_set():
+                try:
+                    ohlcvs = await asyncio.wait_for(
+                        ws.watch_ohlcv(self.symbol, self.timeframe), timeout=self.step / 1000 + 30)
+                    if not self.connected:
+                        self.log(f"[STREAM] {self.symbol} {self.timeframe} connected")
+                    self.connected = True
+                    self._on_update(ohlcvs)
+                except Exception as e:
+                    if self.connected:
+                        self.log(f"[STREAM] {self.symbol} disconnected, using REST until it recovers: {e}")
+                    self.connected = False
+                    await asyncio.sleep(self.reconnect_delay)
+        except Exception:
+            self.log(f"[STREAM] fatal: {traceback.format_exc()}")
+        finally:
+            self.connected = False
+            try:
+                await ws.close()
+            except Exception:
+                pass
+
+    def _on_update(self, ohlcvs: List[list]):
+        for c in ohlcvs:
+            if self._current is None or c[0] == self._current[0]:
+                self._current = list(c)
+            elif c[0] > self._current[0]:
+                # first tick of a new bar: the previous one is final
+                self._emit(self._current)
+                self._current = list(c)
+
+    def _emit(self, candle: list):
+        with self._cond:
+            if candle[0] <= self.last_emitted:
+                return
+            self._closed.append(candle)
+            self.last_close_latency = time.time() - (candle[0] + self.step) / 1000
+            self._cond.notify_all()
+
+    # ---- consumer side ----
+    def _fetch_rest(self) -> List[list]:
+        now_ms = int(time.time() * 1000)
+        ohlcv = self.rest_exchange.fetch_ohlcv(self.symbol, timeframe=self.timeframe, limit=3)
+        return [c for c in ohlcv if c[0] + self.step <= now_ms]
+
+    def next_closed(self, stop_event: Optional[threading.Event] = None) -> List[list]:
+        """
+        Block until at least one bar newer than the last returned one is final and return
+        the finalized candles. Returns [] if stop_event is set while waiting.
+        """
+        if self.last_emitted:
+            expected_close = (self.last_emitted + 2 * self.step) / 1000
+        else:
+            expected_close = (int(time.time() * 1000) // self.step + 1) * self.step / 1000
+
+        with self._cond:
+            while True:
+                if stop_event is not None and stop_event.is_set():
+                    return []
+                fresh = [c for c in self._closed if c[0] > self.last_emitted]
+                if fresh:
+                    self.last_emitted = fresh[-1][0]
+                    return fresh
+                # the stream gets `grace` to deliver; without a stream use the old REST delay
+                deadline = expected_close + (self.grace if self.connected else self.rest_delay)
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    break
+                self._cond.wait(min(remaining, 0.5))
+
+        fresh = [c for c in self._fetch_rest() if c[0] > self.last_emitted]
+        if fresh:
+            self.last_emitted = fresh[-1][0]
+            self.last_close_latency = time.time() - expected_close
+        return fresh
@@ -0,0 +1,278 @@
+# supervisor.py
+"""
+Runs TradingBot instances in worker processes.
+
+Each worker is a separate process, so bots don't share a GIL and a crash
+takes down only its own worker. A worker hosts the bots for its assigned
+symbols. Workers send log lines and periodic metrics summaries to the
+parent over one multiprocessing queue. A reader thread in the parent hands
+them to log_cb (and chart events to event_cb) and keeps the latest metrics
+per worker. A monitor thread
+restarts workers that die, with exponential backoff.
+
+    sup = BotSupervisor(log_cb=lambda worker, line: print(f"[{worker}] {line}"))
+    sup.add("btc", config, symbols=["BTC/USDT:USDT"])
+    sup.start("btc")
+    sup.status()
+    sup.stop_all()
+"""
+import importlib
+import multiprocessing as mp
+import queue
+import threading
+import time
+import traceback
+from typing import Callable, Dict, List, Optional
+
+DEFAULT_FACTORY = "trading_bot:TradingBot"
+
+STOPPED = 'stopped'
+RUNNING = 'running'
+BACKOFF = 'backoff'
+
+
+def _load(path: str):
+    module, _, name = path.partition(':')
+    return getattr(importlib.import_module(module), name)
+
+
+def _worker_main(name: str, factory: str, configs: List[Dict], events, commands, metrics_interval: float,
+                 with_events: bool = False):
+    """Entry point of a worker process; exits non-zero when its bots die on their own."""
+    def emit(kind: str, payload):
+        try:
+            events.put_nowait((kind, name, payload))
+        except queue.Full:
+            pass  # the parent is behind; dropping beats blocking the bots
+
+    try:
+        cls = _load(factory)
+        kwargs = {'event_cb': lambda event: emit('event', event)} if with_events else {}
+        bots = [cls(cfg, log_cb=lambda line: emit('log', line), **kwargs) for cfg in configs]
+        for bot in bots:
+            bot.start()
+    except Exception:
+        emit('log', f"[FATAL] worker {name} failed to start: {traceback.format_exc()}")
+        raise SystemExit(2)
+
+    exit_code = 0
+    while True:
+        if commands.poll(metrics_interval):
+            cmd = commands.recv()
+            if cmd == 'stop':
+                break
+            if isinstance(cmd, tuple) and cmd[0] == 'call':
+                _, method, args = cmd
+                for bot in bots:
+                    try:
+                        getattr(bot, method)(*args)  # the bot logs its own outcome
+                    except Exception as e:
+                        emit('log', f"[ERROR] {method}{args} failed: {e}")
+        if hasattr(bots[0], 'metrics_summary'):
+            emit('metrics', bots[0].metrics_summary())
+        if not any(bot.is_running() for bot in bots):
+            exit_code = 1
+            break
+    for bot in bots:
+        bot.stop()
+        if hasattr(bot, 'flush_log'):
+            bot.flush_log()
+    raise SystemExit(exit_code)
+
+
+class _Worker:
+    __slots__ = ('name', 'configs', 'factory', 'process', 'commands', 'desired', 'state',
+                 'started_at', 'restarts', 'failures', 'retry_at', 'last_exit', 'metrics')
+
+    def __init__(self, name: str, configs: List[Dict], factory: str):
+        self.name = name
+        self.configs = configs
+        self.factory = factory
+        self.process: Optional[mp.process.BaseProcess] = None
+        self.commands = None
+        self.desired = False
+        self.state = STOPPED
+        self.started_at = 0.0
+        self.restarts = 0
+        self.failures = 0  # consecutive crashes, drives the backoff
+        self.retry_at = 0.0
+        self.last_exit: Optional[int] = None
+        self.metrics: Dict = {}
+
+
+class BotSupervisor:
+    """
+    - log_cb: log_cb(worker, line) for the workers' log lines and the supervisor's own notes about a worker,
+      on the supervisor's reader / monitor threads; the line keeps its '[ts] [LEVEL]' prefix for level_of()
+    - event_cb: receives (worker, event) for TradingBot chart events, same thread; the bots only
+      send them when it is set
+    - backoff / max_backoff: restart delay after the first crash and its cap (doubles per crash)
+    - stable_after: uptime after which a worker's crash counter resets
+    """
+
+    def __init__(self, log_cb: Optional[Callable[[str, str], None]] = None, backoff: float = 1.0,
+                 max_backoff: float = 60.0, stable_after: float = 120.0, metrics_interval: float = 5.0,
+                 queue_size: int = 10000, event_cb: Optional[Callable[[str, tuple], None]] = None):
+        self.log = log_cb or (lambda worker, line: print(f"[{worker}] {line}"))
+        self.event_cb = event_cb
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.stable_after = stable_after
+        self.metrics_interval = metrics_interval
+        self._ctx = mp.get_context('spawn')  # no inherited locks or threads from the parent
+        self._events = self._ctx.Queue(maxsize=queue_size)
+        self._workers: Dict[str, _Worker] = {}
+        self._lock = threading.RLock()
+        self._closed = threading.Event()
+        self._reader = threading.Thread(target=self._read_events, name="supervisor-events", daemon=True)
+        self._monitor = threading.Thread(target=self._watch, name="supervisor-monitor", daemon=True)
+        self._reader.start()
+        self._monitor.start()
+
+    # ---- management API ----
+    def add(self, name: str, config: Dict, symbols: Optional[List[str]] = None, factory: str = DEFAULT_FACTORY,
+            timeframes: Optional[List[int]] = None):
+        """Register a worker running one bot per symbol and timeframe (or one bot with `config` as is)."""
+        configs = [{**config, "SYMBOL": s} for s in symbols] if symbols else [dict(config)]
+        if timeframes:
+            # same process, so bots on one symbol share its CandleFeed when BASE_TIMEFRAME is set
+            configs = [{**c, "TIMEFRAME_SECONDS": tf} for c in configs for tf in timeframes]
+        with self._lock:
+            if name in self._workers:
+                raise ValueError(f"Worker '{name}' already exists")
+            self._workers[name] = _Worker(name, configs, factory)
+
+    def remove(self, name: str):
+        self.stop(name)
+        with self._lock:
+            self._workers.pop(name, None)
+
+    def start(self, name: str):
+        with self._lock:
+            worker = self._workers[name]
+            worker.desired = True
+            worker.failures = 0
+            if worker.process is None or not worker.process.is_alive():
+                self._spawn(worker)
+
+    def stop(self, name: str, timeout: float = 15.0):
+        with self._lock:
+            worker = self._workers[name]
+            worker.desired = False
+            proc, commands = worker.process, worker.commands
+        if proc is not None and proc.is_alive():
+            try:
+                commands.send('stop')
+            except (OSError, EOFError):
+                pass
+            proc.join(timeout)
+            if proc.is_alive():
+                self.log(name, f"[WARN] worker did not stop in {timeout}s, terminating")
+                proc.terminate()
+                proc.join(5)
+        with self._lock:
+            worker.state = STOPPED
+            worker.last_exit = proc.exitcode if proc is not None else worker.last_exit
+
+    def call(self, name: str, method: str, *args):
+        """Run bot.method(*args) on every bot of a running worker, e.g. call(name, 'start_profiling')."""
+        with self._lock:
+            worker = self._workers[name]
+            proc, commands = worker.process, worker.commands
+        if proc is None or not proc.is_alive():
+            raise RuntimeError(f"Worker '{name}' is not running")
+        commands.send(('call', method, args))
+
+    def start_all(self):
+        for name in self.names():
+            self.start(name)
+
+    def stop_all(self, timeout: float = 15.0):
+        for name in self.names():
+            self.stop(name, timeout)
+
+    def names(self) -> List[str]:
+        with self._lock:
+            return list(self._workers)
+
+    def status(self) -> Dict[str, Dict]:
+        now = time.time()
+        with self._lock:
+            return {w.name: {
+                'state': w.state,
+                'pid': w.process.pid if w.process is not None and w.process.is_alive() else None,
+                'symbols': list(dict.fromkeys(c.get("SYMBOL") for c in w.configs)),
+                'uptime_s': now - w.started_at if w.state == RUNNING else 0.0,
+                'restarts': w.restarts,
+                'last_exit': w.last_exit,
+                'retry_in_s': max(0.0, w.retry_at - now) if w.state == BACKOFF else 0.0,
+                'metrics': w.metrics,
+            } for w in self._workers.values()}
+
+    def close(self, timeout: float = 15.0):
+        self.stop_all(timeout)
+        self._closed.set()
+        self._events.put(None)
+        self._reader.join(5)
+
+    # ---- internals ----
+    def _spawn(self, worker: _Worker):
+        parent_conn, child_conn = self._ctx.Pipe()
+        proc = self._ctx.Process(target=_worker_main, name=f"bot-{worker.name}", daemon=True,
+                                 args=(worker.name, worker.factory, worker.configs, self._events,
+                                       child_conn, self.metrics_interval, self.event_cb is not None))
+        proc.start()
+        child_conn.close()
+        worker.process, worker.commands = proc, parent_conn
+        worker.started_at = time.time()
+        worker.state = RUNNING
+        self.log(worker.name, f"worker started (pid {proc.pid})")
+
+    def _read_events(self):
+        while not self._closed.is_set():
+            try:
+                item = self._events.get()
+            except (EOFError, OSError):
+                return
+            if item is None:
+                return
+            kind, name, payload = item
+            if kind == 'log':
+                try:
+                    self.log(name, payload)
+                except Exception:
+                    print("Log callback error:", traceback.format_exc())
+            elif kind == 'event' and self.event_cb is not None:
+                try:
+                    self.event_cb(name, payload)
+                except Exception:
+                    print("Event callback error:", traceback.format_exc())
+            elif kind == 'metrics':
+                with self._lock:
+                    if name in self._workers:
+                        self._workers[name].metrics = payload
+
+    def _watch(self):
+        while not self._closed.wait(0.5):
+            with self._lock:
+                now = time.time()
+                for worker in self._workers.values():
+                    if not worker.desired:
+                        continue
+                    if worker.state == BACKOFF:
+                        if now >= worker.retry_at:
+                            worker.restarts += 1
+                            self._spawn(worker)
+                        continue
+                    proc = worker.process
+                    if proc is None or proc.is_alive():
+                        continue
+                    worker.last_exit = proc.exitcode
+                    if now - worker.started_at >= self.stable_after:
+                        worker.failures = 0
+                    delay = min(self.max_backoff, self.backoff * 2 ** worker.failures)
+                    worker.failures += 1
+                    worker.retry_at = now + delay
+                    worker.state = BACKOFF
+                    self.log(worker.name, f"[WARN] worker exited with code {proc.exitcode}, "
+                                          f"restarting in {delay:.1f}s")
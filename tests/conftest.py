@@ -0,0 +1,19 @@
+# tests/conftest.py
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def make_candles(n, seed=7, start=1_700_000_000_000, step=60_000):
+    """Random-walk ccxt rows [ts, o, h, l, c, v]; plain lists, so tests using them need no numpy."""
+    rng = random.Random(seed)
+    price, rows = 30000.0, []
+    for i in range(n):
+        o = price
+        price = max(1.0, price + rng.gauss(0, 25))
+        h = max(o, price) + rng.random() * 10
+        l = min(o, price) - rng.random() * 10
+        rows.append([start + i * step, o, h, l, price, rng.random() * 5])
+    return rows
@@ -0,0 +1,49 @@
+# tests/test_account_cache.py
+import threading
+import time
+
+import account_cache
+from account_cache import AccountCache
+
+
+class _Exchange:
+    """Answers every call after `latency` seconds."""
+
+    def __init__(self, latency=0.05):
+        self.latency = latency
+
+    def fetch_positions(self, symbols=None):
+        time.sleep(self.latency)
+        return [{'symbol': 'BTC/USDT:USDT', 'side': 'long', 'contracts': 2.0, 'entryPrice': 100.0}]
+
+    def fetch_ticker(self, symbol):
+        time.sleep(self.latency)
+        return {'symbol': symbol, 'last': 110.0}
+
+    def fetch_balance(self):
+        time.sleep(self.latency)
+        return {'total': {'USDT': 1000.0}}
+
+
+def _pool_threads():
+    return [t for t in threading.enumerate() if t.name.startswith("account-cache")]
+
+
+def test_refresh_fetches_in_parallel():
+    cache = AccountCache(_Exchange(), ['BTC/USDT:USDT'], 1.0)
+    start = time.perf_counter()
+    cache.refresh()
+    assert time.perf_counter() - start < 0.12  # one round-trip, not three
+    assert cache.position('BTC/USDT:USDT')['contracts'] == 2.0
+    assert cache.equity('BTC/USDT:USDT', 110.0) == 1020.0
+
+
+def test_caches_share_one_pool():
+    caches = [AccountCache(_Exchange(0.01), ['BTC/USDT:USDT'], 1.0) for _ in range(40)]
+    threads = [threading.Thread(target=c.refresh) for c in caches]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert all(c.balance() == 1000.0 for c in caches)
+    assert len(_pool_threads()) <= account_cache.POOL_WORKERS
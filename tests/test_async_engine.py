@@ -0,0 +1,94 @@
+# tests/test_async_engine.py
+import asyncio
+from collections import Counter
+
+import pytest
+
+np = pytest.importorskip("numpy")
+from async_engine import MultiSymbolEngine  # noqa: E402
+from backtest import SimulatedExchange  # noqa: E402
+from conftest import make_candles  # noqa: E402
+from indicators import IndicatorGraph  # noqa: E402
+from shared_exchange import PriorityRateLimiter, SharedExchange  # noqa: E402
+from strategies import DEFAULT_STRATEGY, feed, load_strategy  # noqa: E402
+
+SYMBOLS = ['AAA/USDT:USDT', 'BBB/USDT:USDT', 'CCC/USDT:USDT', 'DDD/USDT:USDT']
+SEED_BARS = 60
+BARS = 160
+TARGET = {"TIMEFRAME_SECONDS": 60, "LEVERAGE": 5, "MARGIN_PERCENT": 50, "CONTRACT_NUM": 0}
+
+
+class MultiSymbolSim(SimulatedExchange):
+    """SimulatedExchange with one candle series per symbol; `bar` is the index of the forming bar."""
+
+    def __init__(self, candles, bar, **kwargs):
+        super().__init__(**kwargs)
+        self.candles = candles
+        self.bar = bar
+        self.markets = {s: {'symbol': s, 'contractSize': self.contract_size} for s in candles}
+        self.calls = Counter()
+
+    def market(self, symbol):
+        return self.markets[symbol]
+
+    def last(self, symbol):
+        return self.candles[symbol][self.bar - 1][4]
+
+    def fetch_ohlcv(self, symbol, timeframe='1m', since=None, limit=None):
+        rows = [list(r) for r in self.candles[symbol][:self.bar + 1]]
+        return rows[-limit:] if limit else rows
+
+    def fetch_ticker(self, symbol):
+        return {'symbol': symbol, 'last': self.last(symbol)}
+
+    def fetch_tickers(self, symbols=None):
+        return {s: self.fetch_ticker(s) for s in symbols or self.candles}
+
+    def fetch_positions(self, symbols=None):
+        self.calls['fetch_positions'] += 1
+        with self._lock:
+            return super().fetch_positions(symbols)
+
+    def create_market_order(self, symbol, side, amount, price=None, params=None):
+        with self._lock:
+            self.price = self.last(symbol)
+            return self._fill(symbol, side, amount, params or {})
+
+    def margin_used(self):
+        notional = sum(p['contracts'] * self.contract_size * p['entryPrice'] for p in self.positions.values())
+        return notional / TARGET["LEVERAGE"]
+
+
+def test_symbols_trade_independently_within_one_margin_budget(tmp_path):
+    candles = {s: make_candles(BARS, seed=i) for i, s in enumerate(SYMBOLS)}
+    sim = MultiSymbolSim(candles, SEED_BARS, balance=10_000.0, contract_size=0.01, fee_rate=0.0)
+    engine = MultiSymbolEngine({"EXCHANGE_NAME": "sim", "SNAPSHOT_DIR": str(tmp_path), "HA_SEED_LIMIT": SEED_BARS},
+                               [{**TARGET, "SYMBOL": s} for s in SYMBOLS], log_cb=lambda s: None,
+                               exchange=SharedExchange(sim, PriorityRateLimiter(0)))
+
+    refs = {s: load_strategy(DEFAULT_STRATEGY, '').bind(IndicatorGraph(s, '1m')) for s in SYMBOLS}
+    for s, ref in refs.items():
+        feed(ref, candles[s][1:SEED_BARS])  # what the engine seeds with: limit=SEED_BARS minus the forming bar
+    expected = {s: [] for s in SYMBOLS}
+
+    async def drive():
+        await engine.setup()
+        for bar in range(SEED_BARS + 1, BARS):
+            sim.bar = bar
+            before = sim.calls['fetch_positions']
+            await engine.on_bar(engine.states)
+            assert sim.calls['fetch_positions'] - before <= 1  # one account refresh per bar for all symbols
+            assert sim.margin_used() <= sim.cash * TARGET["MARGIN_PERCENT"] / 100
+            for s, ref in refs.items():
+                _, trend = feed(ref, candles[s][bar - 6:bar])
+                if trend is not None:
+                    expected[s].append('buy' if trend == 'up' else 'sell')
+
+    asyncio.run(drive())
+    opened = {s: [o['side'] for o in sim.trades if o['symbol'] == s and not o['reduceOnly']] for s in SYMBOLS}
+    assert opened == expected
+    assert all(expected.values())
+    for s in SYMBOLS:
+        want = 'long' if expected[s][-1] == 'buy' else 'short'
+        assert [side for sym, side in sim.positions if sym == s] == [want]
+    assert len(list(tmp_path.iterdir())) == len(SYMBOLS)  # every decision went through the journal
@@ -0,0 +1,32 @@
+# tests/test_backtest.py
+import pytest
+
+from conftest import make_candles
+
+np = pytest.importorskip("numpy")
+from backtest import backtest, strategy_signals  # noqa: E402
+from strategies import HAReversal, replay  # noqa: E402
+
+
+@pytest.fixture(scope="module")
+def data():
+    return np.array(make_candles(3000, seed=11))
+
+
+def test_vectorized_signals_match_replay(data):
+    assert strategy_signals(HAReversal(), data) == replay(HAReversal(), data.tolist())
+
+
+def test_backtest_runs_every_strategy(data):
+    for name in ("ha_reversal", "ema_cross", "rsi_reversal"):
+        result = backtest(data, {"TIMEFRAME_SECONDS": 60, "STRATEGY": name, "STRATEGY_PARAMS": ""})
+        assert len(result["equity"]) == len(data)
+        assert result["num_trades"] > 0
+        assert result["final_equity"] == result["equity"][-1]
+
+
+def test_no_trades_during_warmup(data):
+    result = backtest(data[:50], {"TIMEFRAME_SECONDS": 60, "WARMUP_BARS": 50, "STRATEGY": "ha_reversal",
+                                  "STRATEGY_PARAMS": ""})
+    assert result["num_trades"] == 0
+    assert np.all(result["equity"] == result["config"]["INITIAL_BALANCE"])
@@ -0,0 +1,62 @@
+# tests/test_chart_data.py
+import random
+
+from chart_data import FACTOR, ChartData, LodSeries
+from conftest import make_candles
+
+
+def brute_view(bars, start, size):
+    """Coarse bars of `size` level-0 bars from index `start`, aggregated directly."""
+    out = []
+    for j in range(start // size * size, len(bars), size):
+        chunk = bars[j:j + size]
+        out.append((j, chunk[0][0], max(b[1] for b in chunk), min(b[2] for b in chunk), chunk[-1][3]))
+    return out
+
+
+def test_lod_levels_match_direct_aggregation():
+    rng = random.Random(3)
+    series, bars = LodSeries(), []
+    for _ in range(1000):
+        o, c = rng.uniform(90, 110), rng.uniform(90, 110)
+        bar = [o, max(o, c) + rng.random(), min(o, c) - rng.random(), c]
+        series.append(*bar)
+        bars.append(bar)
+    for _ in range(200):  # late updates anywhere, including interior bars of coarse buckets
+        i, v = rng.randrange(len(bars)), rng.uniform(80, 120)
+        series.update(i, v)
+        bars[i] = [bars[i][0], max(bars[i][1], v), min(bars[i][2], v), v]
+    for max_points, size in ((2000, 1), (300, FACTOR), (20, FACTOR ** 3)):
+        got_size, got = series.view(0, len(bars), max_points)
+        assert got_size == size
+        assert got == brute_view(bars, 0, size)
+
+
+def test_view_picks_finest_level_that_fits():
+    series = LodSeries()
+    for i in range(5000):
+        series.append(i, i + 1, i - 1, i)
+    size, bars = series.view(1000, 2000, 300)
+    assert size == FACTOR and len(bars) <= 300 + 1
+    assert bars[0][0] <= 1000 and bars[-1][0] + size >= 2000
+
+
+def test_late_equity_update_lands_on_its_bar():
+    data = ChartData()
+    candles = make_candles(10)
+    data.add_candles(candles)
+    for i, row in enumerate(candles):
+        data.add_equity(row[0], 1000.0 + i)
+    data.add_equity(candles[3][0] + 1, 900.0)  # a late point for bar 3
+    assert data.equity.value(3) == 900.0
+    assert data.equity.value(-1) == 1009.0
+    assert data.equity.view(0, 10, 100)[1][9][1:] == (1009.0, 1009.0, 1009.0, 1009.0)
+
+
+def test_equity_is_carried_over_gaps():
+    data = ChartData()
+    candles = make_candles(6)
+    data.add_candles(candles)
+    data.add_equity(candles[1][0], 1000.0)
+    data.add_equity(candles[4][0], 1010.0)
+    assert [data.equity.value(i) for i in range(len(data.equity))] == [1000.0, 1000.0, 1000.0, 1000.0, 1010.0]
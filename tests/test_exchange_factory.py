@@ -0,0 +1,60 @@
+# tests/test_exchange_factory.py
+import threading
+import time
+
+import pytest
+
+import exchange_factory
+
+
+class _Client:
+    rateLimit = 0
+
+    def __init__(self, name):
+        self.id = name
+
+
+@pytest.fixture
+def factory(monkeypatch):
+    """get_exchange with create_exchange replaced; `gates[name]` holds that client's load_markets()."""
+    gates, created = {}, []
+
+    def create_exchange(name, *args, **kwargs):
+        created.append(name)
+        gate = gates.get(name)
+        if gate is not None:
+            assert gate.wait(5)
+        return _Client(name)
+
+    monkeypatch.setattr(exchange_factory, "create_exchange", create_exchange)
+    monkeypatch.setattr(exchange_factory, "_clients", {})
+    monkeypatch.setattr(exchange_factory, "_key_locks", {})
+    return gates, created
+
+
+def test_slow_markets_load_does_not_block_other_clients(factory):
+    gates, created = factory
+    gates['slow'] = threading.Event()
+    got = []
+    callers = [threading.Thread(target=lambda: got.append(exchange_factory.get_exchange('slow'))) for _ in range(3)]
+    for t in callers:
+        t.start()
+    time.sleep(0.05)
+
+    start = time.perf_counter()
+    fast = exchange_factory.get_exchange('fast')
+    assert time.perf_counter() - start < 0.5 and fast.id == 'fast'
+    assert got == []  # the slow client is still loading
+
+    gates['slow'].set()
+    for t in callers:
+        t.join(5)
+    assert len(got) == 3 and all(c is got[0] for c in got)
+    assert created.count('slow') == 1
+    assert exchange_factory.get_exchange('slow') is got[0]
+
+
+def test_one_client_per_credentials(factory):
+    a = exchange_factory.get_exchange('x', 'key', 'secret')
+    assert exchange_factory.get_exchange('x', 'key', 'secret') is a
+    assert exchange_factory.get_exchange('x', 'key', 'other') is not a
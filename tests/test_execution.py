@@ -0,0 +1,127 @@
+# tests/test_execution.py
+import time
+
+import pytest
+
+np = pytest.importorskip("numpy")
+from account_cache import AccountCache  # noqa: E402
+from backtest import LatencyExchange, SimulatedExchange  # noqa: E402
+from execution import ReversalExecutor  # noqa: E402
+
+SYMBOL = 'BTC/USDT:USDT'
+SETTINGS = {"CONTRACT_NUM": 0, "MARGIN_PERCENT": 10, "LEVERAGE": 5}
+LATENCY = 0.05
+
+
+class _Recorder:
+    """Logs every call to the wrapped exchange as (method, args, kwargs)."""
+
+    def __init__(self, inner):
+        self._inner = inner
+        self.calls = []
+
+    def __getattr__(self, name):
+        attr = getattr(self._inner, name)
+        if not callable(attr) or name.startswith('_'):
+            return attr
+
+        def recorded(*args, **kwargs):
+            self.calls.append((name, args, kwargs))
+            return attr(*args, **kwargs)
+        return recorded
+
+    def orders(self):
+        return [(args[1], args[2], args[4]) for name, args, _ in self.calls if name == 'create_market_order']
+
+
+class _OneWayExchange(SimulatedExchange):
+    def create_market_order(self, symbol, side, amount, price=None, params=None):
+        if params and 'positionSide' in params:
+            raise ValueError("positionSide is only accepted in hedge mode")
+        return super().create_market_order(symbol, side, amount, price, params)
+
+
+def make(mode, sim=None):
+    sim = sim or SimulatedExchange(balance=1000.0, contract_size=1.0, fee_rate=0.0)
+    sim.set_price(100.0)
+    rec = _Recorder(sim)
+    exchange = LatencyExchange(rec, latency=LATENCY)
+    account = AccountCache(exchange, [SYMBOL], 1.0, log_cb=lambda s: None)
+    executor = ReversalExecutor(exchange, SYMBOL, account, SETTINGS, 1.0, mode=mode, log_cb=lambda s: None)
+    return sim, rec, account, executor
+
+
+def flip(executor, rec, trend):
+    executor.prepare()
+    rec.calls.clear()
+    start = time.perf_counter()
+    records = executor.execute(trend)
+    return records, time.perf_counter() - start
+
+
+def positions(sim):
+    return {k: (p['side'], p['contracts']) for k, p in sim.positions.items()}
+
+
+@pytest.mark.parametrize("mode", ['sequential', 'pipelined'])
+def test_hedge_modes_close_then_open(mode):
+    sim, rec, account, executor = make(mode)
+    records, _ = flip(executor, rec, 'up')
+    assert rec.orders() == [('buy', 5, {'positionSide': 'LONG'})]
+    sim.set_price(90.0)  # 950 left after the close: 950 * 10% * 5 / 90 -> 5 contracts
+    records, elapsed = flip(executor, rec, 'down')
+    assert sorted(rec.orders(), key=repr) == [('sell', 5, {'positionSide': 'SHORT'}),
+                                              ('sell', 5.0, {'reduceOnly': True, 'positionSide': 'LONG'})]
+    assert [r['leg'] for r in records] == ['close', 'open']
+    assert positions(sim) == {(SYMBOL, 'short'): ('short', 5.0)}
+    assert [name for name, _, _ in rec.calls] == ['create_market_order'] * 2  # prepare() did the reads
+    close, open_ = records
+    if mode == 'sequential':
+        assert open_['sent_at'] >= close['acked_at']
+        assert elapsed >= 2 * LATENCY
+    else:
+        assert open_['sent_at'] < close['acked_at']  # both round-trips overlap
+        assert elapsed < 2 * LATENCY
+
+
+def test_reverse_mode_flips_with_one_order():
+    sim, rec, account, executor = make('reverse', _OneWayExchange(balance=1000.0, contract_size=1.0, fee_rate=0.0))
+    flip(executor, rec, 'up')
+    records, elapsed = flip(executor, rec, 'down')
+    assert rec.orders() == [('sell', 10.0, {})]
+    assert [r['leg'] for r in records] == ['reverse']
+    assert elapsed < 2 * LATENCY
+    assert positions(sim) == {(SYMBOL, 'short'): ('short', 5.0)}
+
+
+def test_reverse_mode_same_side_never_sends_position_side():
+    sim, rec, account, executor = make('reverse', _OneWayExchange(balance=1000.0, contract_size=1.0, fee_rate=0.0))
+    flip(executor, rec, 'up')
+    records, _ = flip(executor, rec, 'up')  # close side differs from the new side: close, then open
+    assert rec.orders() == [('sell', 5.0, {'reduceOnly': True}), ('buy', 5, {})]
+    assert positions(sim) == {(SYMBOL, 'long'): ('long', 5.0)}
+
+
+def test_fills_update_the_cache_like_the_exchange():
+    sim = SimulatedExchange(balance=1000.0, contract_size=1.0, fee_rate=0.0006)
+    sim, rec, account, executor = make('sequential', sim)
+    flip(executor, rec, 'up')
+    sim.set_price(110.0)
+    flip(executor, rec, 'down')
+    pos = account.position(SYMBOL)
+    assert positions(sim) == {(SYMBOL, 'short'): (pos['side'], pos['contracts'])}
+    assert pos['entryPrice'] == sim.positions[(SYMBOL, 'short')]['entryPrice'] == 110.0
+    assert account.balance() == pytest.approx(sim.cash)
+    rec.calls.clear()
+    account.position(SYMBOL), account.balance()
+    assert rec.calls == []  # read from the cache, no refetch
+
+
+def test_stale_plan_is_rebuilt():
+    sim, rec, account, executor = make('sequential')
+    executor.prepare()
+    executor.plan.prepared_at -= executor.max_plan_age + 1
+    sim.set_price(50.0)
+    account.invalidate()
+    records = executor.execute('up')
+    assert records[0]['amount'] == 10  # sized at the new price
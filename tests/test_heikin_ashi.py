@@ -0,0 +1,77 @@
+# tests/test_heikin_ashi.py
+"""The streaming, list-based and NumPy Heikin-Ashi paths must agree bit for bit."""
+import pytest
+
+from conftest import make_candles
+from strategy import HeikinAshiEngine, detect_trend_change, to_heikin_ashi
+
+
+def original_heikin_ashi(candles):
+    """The dict-based version the bot shipped with, kept as the reference."""
+    ha_candles = []
+    for i, c in enumerate(candles):
+        o, h, l, cl = c[1:5]
+        ha_close = (o + h + l + cl) / 4
+        ha_open = (ha_candles[i - 1]['open'] + ha_candles[i - 1]['close']) / 2 if i > 0 else (o + cl) / 2
+        ha_candles.append({'open': ha_open, 'high': max(h, ha_open, ha_close),
+                           'low': min(l, ha_open, ha_close), 'close': ha_close})
+    return ha_candles
+
+
+@pytest.fixture(scope="module")
+def candles():
+    return make_candles(2000)
+
+
+def test_to_heikin_ashi_matches_original(candles):
+    expected = original_heikin_ashi(candles)
+    assert to_heikin_ashi(candles) == expected
+
+
+def test_streaming_engine_matches_original(candles):
+    expected = original_heikin_ashi(candles)
+    engine = HeikinAshiEngine(maxlen=6)
+    for i, c in enumerate(candles):
+        assert engine.update(c).as_dict() == expected[i]
+        assert engine.ha[-1].as_dict() == expected[i]
+        if i > 0:
+            assert engine.trend_change() == detect_trend_change(expected[i - 1], expected[i])
+    assert [ha.as_dict() for ha in engine.ha] == expected[-6:]
+
+
+def test_streaming_ingest_skips_seen_rows(candles):
+    engine = HeikinAshiEngine()
+    assert engine.ingest(candles[:100]) == 100
+    assert engine.ingest(candles[50:120]) == 20
+    assert engine.ha[-1].as_dict() == original_heikin_ashi(candles[:120])[-1]
+
+
+def test_engine_restore_continues_the_chain(candles):
+    engine = HeikinAshiEngine()
+    engine.ingest(candles[:500])
+    restored = HeikinAshiEngine()
+    restored.restore(engine.state())
+    for c in candles[500:]:
+        assert restored.update(c).as_dict() == engine.update(c).as_dict()
+
+
+def test_vectorized_matches_original(candles):
+    np = pytest.importorskip("numpy")
+    import vectorized
+    expected = original_heikin_ashi(candles)
+    ha_open, ha_high, ha_low, ha_close, flips, direction = vectorized.ha_signals(np.array(candles))
+    for i, ha in enumerate(expected):
+        assert (ha_open[i], ha_high[i], ha_low[i], ha_close[i]) == (ha['open'], ha['high'], ha['low'], ha['close'])
+    assert not flips[0]
+    for i in range(1, len(expected)):
+        changed, trend = detect_trend_change(expected[i - 1], expected[i])
+        assert bool(flips[i]) == changed
+        assert direction[i] == (vectorized.UP if trend == 'up' else vectorized.DOWN)
+
+
+def test_vectorized_empty_and_bad_shape():
+    np = pytest.importorskip("numpy")
+    import vectorized
+    assert all(len(col) == 0 for col in vectorized.heikin_ashi_array(np.empty((0, 6))))
+    with pytest.raises(ValueError):
+        vectorized.heikin_ashi_array(np.zeros((3, 3)))
@@ -0,0 +1,49 @@
+# tests/test_indicators.py
+import pytest
+
+from conftest import make_candles
+from indicators import ATR, EMA, RSI, HeikinAshi, IndicatorGraph
+from strategies import EMACross, HAReversal, feed
+
+
+@pytest.fixture(scope="module")
+def candles():
+    return make_candles(600)
+
+
+def test_late_node_is_seeded_from_history(candles):
+    live = IndicatorGraph('BTC/USDT', '1m', history=1000)
+    live.get(HeikinAshi)
+    live.ingest(candles[:400])
+    late = [live.get(EMA, period=21, source='ha_close'), live.get(ATR, period=14), live.get(RSI, period=14)]
+    live.ingest(candles[400:])
+
+    fresh = IndicatorGraph('BTC/USDT', '1m', history=1000)
+    ref = [fresh.get(EMA, period=21, source='ha_close'), fresh.get(ATR, period=14), fresh.get(RSI, period=14)]
+    fresh.ingest(candles)
+    assert [node.state() for node in late] == [node.state() for node in ref]
+
+
+def test_late_bound_strategy_on_shared_graph(candles):
+    graph = IndicatorGraph('BTC/USDT', '1m', history=1000)
+    first = HAReversal().bind(graph)
+    feed(first, candles[:300])
+    late = EMACross({'min_atr_percent': 0.01}).bind(graph)
+    assert late.fast.ready and late.slow.ready and late.atr.ready
+    feed(first, candles[300:])
+    feed(late, candles[300:])
+
+    alone = EMACross({'min_atr_percent': 0.01}).bind(IndicatorGraph('BTC/USDT', '1m', history=1000))
+    feed(alone, candles)
+    assert (late.fast.value, late.slow.value, late.atr.value) == (alone.fast.value, alone.slow.value,
+                                                                   alone.atr.value)
+
+
+def test_seed_is_limited_to_history(candles):
+    graph = IndicatorGraph('BTC/USDT', '1m', history=10)
+    graph.get(HeikinAshi)
+    graph.ingest(candles[:100])
+    ema = graph.get(EMA, period=20)
+    assert not ema.ready  # only 10 stored bars to replay
+    graph.ingest(candles[100:110])
+    assert ema.ready
@@ -0,0 +1,48 @@
+# tests/test_log_writer.py
+import threading
+
+from log_writer import LogWriter
+
+
+def test_full_queue_drops_and_reports_instead_of_blocking():
+    entered, release, lines = threading.Event(), threading.Event(), []
+
+    def slow_sink(line):
+        entered.set()
+        release.wait(5)
+        lines.append(line)
+
+    writer = LogWriter(None, echo=False, queue_size=3, sinks=[slow_sink])
+    assert writer.write("line 0")
+    assert entered.wait(5)  # the writer thread is now stuck in the sink with line 0
+    assert [writer.write(f"line {i}") for i in range(1, 6)] == [True, True, True, False, False]
+    assert writer.dropped == 2
+    release.set()
+    writer.close()
+    assert [line.split("] ", 1)[1] for line in lines] == [
+        "line 0", "line 1", "line 2", "line 3", "[WARN] 2 log lines dropped"]
+
+
+def test_close_writes_everything_queued(tmp_path):
+    writer = LogWriter(str(tmp_path / "bot-{date}.log"), echo=False, flush_interval=5.0, batch_size=7)
+    for i in range(1000):
+        writer.write(f"line {i}")
+    writer.close()
+    assert not writer._thread.is_alive()
+    (path,) = tmp_path.iterdir()
+    assert [line.split("] ", 1)[1] for line in path.read_text().splitlines()] == [f"line {i}" for i in range(1000)]
+
+
+def test_routed_lines_reach_only_their_sink(tmp_path):
+    shared, first, second = [], [], []
+    writer = LogWriter(str(tmp_path / "bot-{date}.log"), echo=False, sinks=[shared.append])
+    writer.write("for first", sink=first.append)
+    writer.write("for everyone")
+    writer.write("for second", sink=second.append)
+    writer.write("[WARN] also first", sink=first.append)
+    writer.close()
+    assert [line.split("] ", 1)[1] for line in first] == ["for first", "[WARN] also first"]
+    assert [line.split("] ", 1)[1] for line in second] == ["for second"]
+    assert [line.split("] ", 1)[1] for line in shared] == ["for everyone"]
+    (path,) = tmp_path.iterdir()
+    assert path.read_text().count("\n") == 1 and "for everyone" in path.read_text()
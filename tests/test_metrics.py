@@ -0,0 +1,44 @@
+# tests/test_metrics.py
+from metrics import DEFAULT_BUCKETS, Histogram, Registry
+
+
+def test_histogram_buckets_are_upper_inclusive():
+    hist = Histogram((0.1, 0.5, 1.0))
+    for value in (0.05, 0.1, 0.3, 1.0, 2.0):
+        hist.observe(value)
+    assert hist.counts == [2, 1, 1, 1]  # the last slot is +Inf
+    assert (hist.count, hist.min, hist.max) == (5, 0.05, 2.0)
+    assert hist.sum == 0.05 + 0.1 + 0.3 + 1.0 + 2.0
+    assert [hist.percentile(q) for q in (0.2, 0.4, 0.6, 0.8, 1.0)] == [0.1, 0.1, 0.5, 1.0, 2.0]
+
+
+def test_prometheus_text_format():
+    registry = Registry(enabled=True)
+    registry.observe("order", 0.003, leg="open")
+    registry.observe("order", 0.2, leg="open")
+    registry.observe("order", 0.02, leg="close")
+    registry.observe("stage", 7.0, stage="cycle")
+    lines = registry.prometheus_text().splitlines()
+
+    assert [line for line in lines if line.startswith("#")] == [
+        "# TYPE tradingbot_order_seconds histogram", "# TYPE tradingbot_stage_seconds histogram"]
+    open_buckets = [line for line in lines if line.startswith('tradingbot_order_seconds_bucket{leg="open"')]
+    assert len(open_buckets) == len(DEFAULT_BUCKETS) + 1
+    assert open_buckets[0] == 'tradingbot_order_seconds_bucket{leg="open",le="0.0005"} 0'
+    assert 'tradingbot_order_seconds_bucket{leg="open",le="0.005"} 1' in open_buckets
+    assert 'tradingbot_order_seconds_bucket{leg="open",le="0.25"} 2' in open_buckets
+    assert open_buckets[-1] == 'tradingbot_order_seconds_bucket{leg="open",le="+Inf"} 2'
+    counts = [int(line.rsplit(" ", 1)[1]) for line in open_buckets]
+    assert counts == sorted(counts)  # cumulative
+    assert 'tradingbot_order_seconds_sum{leg="open"} 0.203' in lines
+    assert 'tradingbot_order_seconds_count{leg="close"} 1' in lines
+    assert 'tradingbot_stage_seconds_bucket{stage="cycle",le="10.0"} 1' in lines
+    assert registry.prometheus_text().endswith("\n")
+
+
+def test_disabled_registry_records_nothing():
+    registry = Registry()
+    registry.observe("order", 0.1, leg="open")
+    with registry.timer("stage", stage="cycle"):
+        pass
+    assert registry.summary() == {} and registry.prometheus_text() == "\n"
@@ -0,0 +1,37 @@
+# tests/test_optimizer.py
+import csv
+import json
+
+import pytest
+
+from conftest import make_candles
+
+np = pytest.importorskip("numpy")
+from optimizer import grid_space, params_key, sweep  # noqa: E402
+
+
+def test_resume_ranks_only_the_current_grid(tmp_path):
+    data = np.array(make_candles(600))
+    out = str(tmp_path / "sweep")
+    grid = grid_space({"TIMEFRAME_SECONDS": [60, 300], "LEVERAGE": [1, 3]})
+    summary = {"return_pct": 1.0, "max_drawdown_pct": 0.0, "final_equity": 1.0, "fees": 0.0, "num_trades": 0}
+    foreign = [{"params": {"TIMEFRAME_SECONDS": 60, "LEVERAGE": lev, "MARGIN_PERCENT": 5}, **summary}
+               for lev in (1, 2, 5)]
+    resumed = {"params": grid[0], **summary}
+    with open(f"{out}.jsonl", "w") as f:
+        for rec in foreign + [resumed]:
+            f.write(json.dumps(rec) + "\n")
+        f.write('{"params": {"LEVERAGE"')  # torn last line
+
+    progress = []
+    ranked = sweep(data, grid, out, workers=2, progress_cb=lambda done, total: progress.append((done, total)))
+
+    assert sorted(params_key(r["params"]) for r in ranked) == sorted(params_key(p) for p in grid)
+    assert resumed in ranked  # reused, not recomputed
+    assert progress == [(2, 4), (3, 4), (4, 4)]
+    with open(f"{out}.csv") as f:
+        rows = list(csv.reader(f))
+    assert len(rows) == 1 + len(grid) and "MARGIN_PERCENT" not in rows[0]
+    with open(f"{out}.jsonl") as f:
+        assert sum(1 for line in f if "MARGIN_PERCENT" in line) == 3  # foreign runs stay in the journal
+    assert sweep(data, grid, out, progress_cb=lambda done, total: pytest.fail("nothing left to run")) == ranked
@@ -0,0 +1,117 @@
+# tests/test_resampler.py
+import pytest
+
+from conftest import make_candles
+from resampler import CandleFeed, Resampler
+
+MINUTE = 60_000
+
+
+def base_bars(n, start=1_700_000_000_000 // (60 * MINUTE) * (60 * MINUTE)):
+    return make_candles(n, start=start, step=MINUTE)
+
+
+def resample(bars, seconds):
+    """Epoch-aligned buckets of time-sorted rows, aggregated directly."""
+    step, out = seconds * 1000, []
+    for c in bars:
+        start = c[0] // step * step
+        if out and out[-1][0] == start:
+            bar = out[-1]
+            bar[2], bar[3], bar[4], bar[5] = max(bar[2], c[2]), min(bar[3], c[3]), c[4], bar[5] + c[5]
+        else:
+            out.append([start] + list(c[1:6]))
+    return out
+
+
+def test_buckets_match_direct_aggregation():
+    bars = base_bars(600)
+    r = Resampler('1m', ['5m', '15m', '1h'])
+    for c in bars:
+        r.push(c)
+    r.flush(bars[-1][0] + MINUTE)
+    for tf, seconds in (('5m', 300), ('15m', 900), ('1h', 3600)):
+        assert r.closed(tf) == resample(bars, seconds)
+
+
+def test_buckets_match_vectorized_resample():
+    np = pytest.importorskip("numpy")
+    import vectorized
+    bars = base_bars(600)
+    for seconds in (300, 900, 3600):
+        got, want = np.asarray(resample(bars, seconds)), vectorized.resample_ohlcv(bars, seconds)
+        assert got.shape == want.shape
+        assert (got[:, :5] == want[:, :5]).all()
+        np.testing.assert_allclose(got[:, 5], want[:, 5], rtol=1e-12)  # reduceat adds volumes pairwise
+
+
+def test_bar_closes_on_its_last_base_bar():
+    bars = base_bars(10)
+    r = Resampler('1m', ['5m'])
+    events = [r.push(c) for c in bars]
+    assert [len(e) for e in events] == [1, 1, 1, 1, 2, 1, 1, 1, 1, 2]
+    assert events[4][1] == ('5m', resample(bars[:5], 300)[0])
+    assert r.current('5m') is None
+    assert events[4][0][0] == '1m'  # base first, then ascending timeframes
+
+
+def test_gap_closes_the_bar_it_skipped():
+    bars = base_bars(10)
+    r = Resampler('1m', ['5m'])
+    for c in bars[:3]:
+        r.push(c)
+    events = r.push(bars[7])  # no trades for 4 minutes: the first 5m bar ends without its last base bar
+    assert ('5m', resample(bars[:3], 300)[0]) in events
+    assert r.current('5m')[0] == bars[5][0]
+
+
+def test_flush_closes_bars_that_ended():
+    bars = base_bars(3)
+    r = Resampler('1m', ['5m'])
+    for c in bars:
+        r.push(c)
+    assert r.flush(bars[0][0] + 4 * MINUTE) == []
+    assert r.flush(bars[0][0] + 5 * MINUTE) == [('5m', resample(bars, 300)[0])]
+    assert r.flush(bars[0][0] + 10 * MINUTE) == []
+
+
+def test_push_ignores_old_bars_and_reports_closes():
+    seen = []
+    r = Resampler('1m', ['5m'], on_close=lambda tf, c: seen.append((tf, c[0])))
+    bars = base_bars(5)
+    for c in bars + bars[:2]:
+        r.push(c)
+    assert seen == [('1m', c[0]) for c in bars[:4]] + [('1m', bars[4][0]), ('5m', bars[0][0])]
+
+
+def test_added_timeframe_rebuilds_current_bar():
+    bars = base_bars(8)
+    r = Resampler('1m')
+    for c in bars[:7]:
+        r.push(c)
+    r.add('5m', seed=resample(bars[:5], 300))
+    assert r.current('5m') == resample(bars[5:7], 300)[0]
+    with pytest.raises(ValueError):
+        r.add('90s')
+
+
+class _Exchange:
+    def __init__(self, bars):
+        self.bars, self.calls = bars, 0
+
+    def fetch_ohlcv(self, symbol, timeframe, limit=None):
+        self.calls += 1
+        return self.bars[-limit:] if limit else self.bars
+
+
+def test_feed_polls_once_per_base_bar():
+    bars = base_bars(11)
+    ex = _Exchange(bars)
+    feed = CandleFeed(ex, 'BTC/USDT', '1m')
+    feed.add_timeframe('5m')
+    now = (bars[-1][0] + 10_000) / 1000  # the last row is still forming
+    feed.poll(now)
+    feed.poll(now + 5)
+    assert ex.calls == 1
+    assert feed.closed('1m') == [list(c) for c in bars[:-1]]
+    assert feed.closed('5m') == resample(bars[:10], 300)
@@ -0,0 +1,72 @@
+# tests/test_scheduler.py
+import threading
+import time
+
+import scheduler
+from scheduler import CandleScheduler, StopEvent
+
+
+class _WallClock:
+    """Stand-in for the time module as scheduler uses it: settable wall clock, real monotonic clock."""
+
+    def __init__(self, wall):
+        self.wall = wall
+        self.monotonic = time.monotonic
+
+    def time(self):
+        return self.wall
+
+
+def test_next_boundary_is_aligned_and_strictly_after_now():
+    assert CandleScheduler.next_boundary(60, now=1000.3) == 1020
+    assert CandleScheduler.next_boundary(60, 2.0, now=1021.9) == 1022
+    assert CandleScheduler.next_boundary(60, 2.0, now=1022.0) == 1082
+    assert CandleScheduler.next_boundary(300, 2.0, now=1_700_000_123.0) == 1_700_000_102.0 + 300
+
+
+def test_boundary_wait_runs_on_monotonic_time(monkeypatch):
+    clock = _WallClock(1_700_000_000.0)
+    monkeypatch.setattr(scheduler, "time", clock)
+    sched = CandleScheduler()
+    result = {}
+
+    def wait():
+        start = time.monotonic()
+        result['ok'] = sched.wait_for_boundary(1, offset=0.2)  # 0.2s after a wall clock on the boundary
+        result['elapsed'] = time.monotonic() - start
+
+    waiter = threading.Thread(target=wait)
+    waiter.start()
+    time.sleep(0.05)
+    clock.wall += 3600  # a clock step mid-wait neither ends nor extends the wait
+    waiter.join(5)
+    assert result['ok']
+    assert 0.15 <= result['elapsed'] < 0.5
+
+
+def test_stop_event_wakes_a_sleeping_wait_at_once():
+    sched, stop, result = CandleScheduler(poll=10.0), StopEvent(), {}
+
+    def wait():
+        result['ok'] = sched.wait_for(60, stop)
+        result['woke'] = time.monotonic()
+
+    waiter = threading.Thread(target=wait)
+    waiter.start()
+    time.sleep(0.05)
+    stopped = time.monotonic()
+    stop.set()
+    waiter.join(5)
+    assert result['ok'] is False
+    assert result['woke'] - stopped < 0.1  # not after `poll`, as with a plain Event
+    assert sched.wait_for(60, stop) is False  # already stopped: returns without waiting
+
+
+def test_waiters_wake_in_deadline_order():
+    sched, order = CandleScheduler(), []
+    waiters = [threading.Thread(target=lambda d=d: (sched.wait_for(d), order.append(d))) for d in (0.3, 0.1, 0.2)]
+    for w in waiters:
+        w.start()
+    for w in waiters:
+        w.join(5)
+    assert order == [0.1, 0.2, 0.3]
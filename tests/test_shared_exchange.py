@@ -0,0 +1,113 @@
+# tests/test_shared_exchange.py
+import threading
+import time
+
+import pytest
+
+from shared_exchange import ACCOUNT, MARKET_DATA, ORDER, PriorityRateLimiter, SharedExchange
+
+
+def test_waiters_are_served_by_priority_then_fifo():
+    limiter = PriorityRateLimiter(rate=20, burst=1)
+    limiter.acquire()  # empty the bucket so everyone below queues
+    served, threads = [], []
+    for name, priority in (('md1', MARKET_DATA), ('acct', ACCOUNT), ('md2', MARKET_DATA), ('order', ORDER)):
+        t = threading.Thread(target=lambda n=name, p=priority: (limiter.acquire(p), served.append(n)))
+        t.start()
+        threads.append(t)
+        time.sleep(0.01)  # queued in this order, all before the next token
+    for t in threads:
+        t.join(5)
+    assert served == ['order', 'acct', 'md1', 'md2']
+
+
+def test_bucket_refills_at_rate_up_to_burst():
+    limiter = PriorityRateLimiter(rate=50, burst=5)
+    start = time.monotonic()
+    for _ in range(5):
+        limiter.acquire()
+    assert time.monotonic() - start < 0.01  # the burst is free
+    limiter.acquire()
+    assert time.monotonic() - start == pytest.approx(1 / 50, abs=0.015)
+
+    time.sleep(0.5)  # would refill 25 tokens, but the bucket holds 5
+    start = time.monotonic()
+    for _ in range(6):
+        limiter.acquire()
+    assert time.monotonic() - start >= 1 / 50 * 0.9
+
+
+def test_zero_rate_never_waits():
+    limiter = PriorityRateLimiter(rate=0)
+    start = time.monotonic()
+    for _ in range(1000):
+        limiter.acquire()
+    assert time.monotonic() - start < 0.1
+
+
+class _Client:
+    def __init__(self):
+        self.calls = []
+        self.release = threading.Event()
+
+    def fetch_ticker(self, symbol):
+        self.calls.append(symbol)
+        assert self.release.wait(5)
+        if symbol == 'BAD':
+            raise RuntimeError("boom")
+        return {'symbol': symbol, 'last': 100.0, 'info': {'bids': [[99.0, 1]]}}
+
+    def fetch_positions(self, symbols=None):
+        self.calls.append('positions')
+        return []
+
+
+def _concurrent(fn, n):
+    results, threads = [None] * n, []
+    for i in range(n):
+        def run(i=i):
+            try:
+                results[i] = fn()
+            except Exception as e:
+                results[i] = e
+        threads.append(threading.Thread(target=run))
+        threads[-1].start()
+    return results, threads
+
+
+def test_identical_reads_in_flight_are_merged_into_copies():
+    client = _Client()
+    ex = SharedExchange(client, PriorityRateLimiter(0))
+    results, threads = _concurrent(lambda: ex.fetch_ticker('BTC/USDT'), 5)
+    time.sleep(0.05)
+    client.release.set()
+    for t in threads:
+        t.join(5)
+    assert client.calls == ['BTC/USDT'] and ex.merged == 4
+    assert all(r == results[0] for r in results)
+    results[1]['last'] = 0.0
+    results[1]['info']['bids'].clear()
+    assert all(r['last'] == 100.0 and r['info']['bids'] for i, r in enumerate(results) if i != 1)
+
+
+def test_only_identical_market_reads_are_merged():
+    client = _Client()
+    client.release.set()
+    ex = SharedExchange(client, PriorityRateLimiter(0))
+    ex.fetch_ticker('BTC/USDT')
+    ex.fetch_ticker('BTC/USDT')  # not in flight at the same time: a second request
+    ex.fetch_ticker('ETH/USDT')
+    ex.fetch_positions()
+    ex.fetch_positions()
+    assert client.calls == ['BTC/USDT', 'BTC/USDT', 'ETH/USDT', 'positions', 'positions'] and ex.merged == 0
+
+
+def test_merged_callers_all_get_the_error():
+    client = _Client()
+    ex = SharedExchange(client, PriorityRateLimiter(0))
+    results, threads = _concurrent(lambda: ex.fetch_ticker('BAD'), 3)
+    time.sleep(0.05)
+    client.release.set()
+    for t in threads:
+        t.join(5)
+    assert client.calls == ['BAD'] and all(isinstance(r, RuntimeError) for r in results)
@@ -0,0 +1,97 @@
+# tests/test_snapshot.py
+import json
+
+import pytest
+
+from conftest import make_candles
+from indicators import IndicatorGraph
+from snapshot import VERSION, DecisionJournal, SnapshotStore, check_against_exchange, make_snapshot
+from strategies import EMACross, HAReversal, feed
+
+
+@pytest.fixture(scope="module")
+def candles():
+    return make_candles(300)
+
+
+def bound(strategy, history=50):
+    return strategy.bind(IndicatorGraph('BTC/USDT:USDT', '1m', history=history))
+
+
+def journal(tmp_path, strategy):
+    return DecisionJournal(SnapshotStore(str(tmp_path)), 'xt', 'BTC/USDT:USDT', '1m', strategy)
+
+
+@pytest.mark.parametrize("cls", [HAReversal, EMACross])
+def test_restored_strategy_continues_like_uninterrupted(tmp_path, candles, cls):
+    first = bound(cls())
+    feed(first, candles[:200])
+    journal(tmp_path, first).decided(None, [])
+
+    restored = bound(cls())
+    assert journal(tmp_path, restored).restore() is not None
+    assert restored.last_ts == first.last_ts
+    signals = [feed(restored, (row,))[1] for row in candles[200:]]
+
+    alone = bound(cls())
+    feed(alone, candles[:200])
+    assert signals == [feed(alone, (row,))[1] for row in candles[200:]]
+    assert restored.graph.state() == alone.graph.state()
+
+
+def test_save_is_json_and_atomic(tmp_path, candles):
+    s = bound(HAReversal())
+    feed(s, candles[:20])
+    store = SnapshotStore(str(tmp_path))
+    path = store.path('xt', 'BTC/USDT:USDT', '1m')
+    store.save(path, make_snapshot('BTC/USDT:USDT', '1m', s.graph, s.last_ts, 'up', 'long', strategy=s))
+    assert path.endswith('xt-BTC_USDT_USDT-1m.json')
+    assert [p.name for p in tmp_path.iterdir()] == ['xt-BTC_USDT_USDT-1m.json']
+    with open(path) as f:
+        assert json.load(f)['version'] == VERSION
+
+
+def test_restore_rejects_other_version_strategy_and_stale(tmp_path, candles):
+    s = bound(EMACross({'fast': 5}))
+    feed(s, candles[:50])
+    journal(tmp_path, s).decided(None, [])
+
+    assert journal(tmp_path, bound(EMACross({'fast': 7}))).restore() is None
+    assert journal(tmp_path, bound(HAReversal())).restore() is None
+    assert journal(tmp_path, bound(EMACross({'fast': 5}))).restore(since=s.last_ts + 1) is None
+
+    path = SnapshotStore(str(tmp_path)).path('xt', 'BTC/USDT:USDT', '1m')
+    with open(path) as f:
+        snap = json.load(f)
+    snap['version'] = VERSION - 1
+    with open(path, 'w') as f:
+        json.dump(snap, f)
+    assert journal(tmp_path, bound(EMACross({'fast': 5}))).restore() is None
+
+
+def test_journal_never_decides_a_bar_twice(tmp_path, candles):
+    s = bound(HAReversal())
+    feed(s, candles[:30])
+    j = journal(tmp_path, s)
+    assert j.is_new()
+    j.intent('up')
+    j.decided('up', [{'leg': 'open', 'side': 'buy', 'amount': 1.0, 'order_id': 'a1'}])
+    assert not j.is_new() and j.position_side == 'long'
+
+    again = journal(tmp_path, bound(HAReversal()))
+    snap = again.restore()
+    assert snap['pending'] is None and snap['orders'] == [{'leg': 'open', 'side': 'buy', 'amount': 1.0, 'id': 'a1'}]
+    assert not again.is_new()
+    feed(again.strategy, candles[30:31])
+    assert again.is_new()
+
+
+def test_pending_intent_is_reported_not_resent(tmp_path, candles):
+    s = bound(HAReversal())
+    feed(s, candles[:30])
+    journal(tmp_path, s).intent('down')  # crashed before the orders were acked
+    snap = journal(tmp_path, bound(HAReversal())).restore()
+    assert snap['pending'] == {'bar': s.last_ts, 'trend': 'down'}
+    assert check_against_exchange(snap, {'side': 'short'}) == [
+        f"orders for bar {s.last_ts} were sent before the restart and are filled"]
+    assert check_against_exchange(snap, None)[0].startswith("[WARN]")
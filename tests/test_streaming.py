@@ -0,0 +1,121 @@
+# tests/test_streaming.py
+import asyncio
+import queue
+import threading
+import time
+
+import pytest
+
+from streaming import CandleStream
+
+STEP = 1000  # '1s' bars
+
+
+class FakeWatcher:
+    """ccxt.pro stand-in: watch_ohlcv() returns the queued batches in order and raises queued exceptions."""
+
+    def __init__(self):
+        self.batches = queue.Queue()
+        self.idle = threading.Event()
+        self.closed = False
+
+    def push(self, *items):
+        self.idle.clear()
+        for item in items:
+            self.batches.put(item)
+
+    async def watch_ohlcv(self, symbol, timeframe):
+        while True:
+            try:
+                item = self.batches.get_nowait()
+            except queue.Empty:
+                self.idle.set()
+                await asyncio.sleep(0.005)
+                continue
+            if isinstance(item, Exception):
+                raise item
+            return item
+
+    async def close(self):
+        self.closed = True
+
+
+class FakeRest:
+    def __init__(self):
+        self.rows = []
+        self.calls = 0
+
+    def fetch_ohlcv(self, symbol, timeframe=None, limit=None):
+        self.calls += 1
+        return self.rows[-limit:]
+
+
+def bar(ts, close, volume=1.0):
+    return [ts, 100.0, max(100.0, close), min(100.0, close), close, volume]
+
+
+def wait_for(predicate, timeout=2.0):
+    deadline = time.time() + timeout
+    while not predicate():
+        assert time.time() < deadline, "timed out"
+        time.sleep(0.005)
+
+
+@pytest.fixture
+def stream():
+    ws, rest = FakeWatcher(), FakeRest()
+    s = CandleStream(lambda: ws, rest, 'BTC/USDT:USDT', '1s', log_cb=lambda s: None,
+                     grace=0.05, rest_delay=0.05, reconnect_delay=0.01)
+    s.ws = ws
+    s.start()
+    yield s
+    s.stop()
+    assert ws.closed
+
+
+def delivered(s):
+    s.ws.idle.wait(2.0)
+    time.sleep(0.02)  # let the last batch be folded in
+
+
+def test_closed_bar_is_emitted_once_on_next_bar(stream):
+    t = int(time.time()) * 1000 - 2 * STEP
+    stream.ws.push([bar(t, 101.0)], [bar(t, 102.0)], [bar(t, 103.0), bar(t + STEP, 104.0)])
+    assert stream.next_closed() == [bar(t, 103.0)]
+
+    # more ticks of the open bar, and a repeat of the closed one, emit nothing
+    stream.ws.push([bar(t, 103.0), bar(t + STEP, 105.0)], [bar(t + STEP, 106.0)])
+    delivered(stream)
+    assert list(stream._closed) == [bar(t, 103.0)]
+    assert stream.rest_exchange.calls == 0
+
+
+def test_partial_bar_is_not_emitted(stream):
+    t = int(time.time()) * 1000 - STEP
+    stream.ws.push([bar(t, 101.0)], [bar(t, 99.0)])
+    delivered(stream)
+    assert stream.connected and list(stream._closed) == []
+
+    # nothing final yet: after the grace period the REST fallback is asked and returns nothing new
+    stream.rest_exchange.rows = [bar(t - STEP, 100.0)]
+    stream.last_emitted = t - STEP
+    assert stream.next_closed() == []
+    assert stream.rest_exchange.calls == 1
+
+
+def test_disconnect_falls_back_to_rest_then_resumes(stream):
+    t = int(time.time()) * 1000
+    stream.ws.push([bar(t - 2 * STEP, 101.0)], [bar(t - STEP, 102.0)])
+    assert stream.next_closed() == [bar(t - 2 * STEP, 101.0)]
+    assert stream.connected
+
+    stream.ws.push(ConnectionError("socket closed"))
+    wait_for(lambda: not stream.connected)
+    stream.rest_exchange.rows = [bar(t - 2 * STEP, 101.0), bar(t - STEP, 102.5)]
+    assert stream.next_closed() == [bar(t - STEP, 102.5)]
+    assert stream.rest_exchange.calls == 1
+
+    # the stream comes back: the bar REST already returned is not emitted again
+    stream.ws.push([bar(t, 103.0)], [bar(t + STEP, 104.0)])
+    assert stream.next_closed() == [bar(t, 103.0)]
+    assert stream.connected and stream.rest_exchange.calls == 1
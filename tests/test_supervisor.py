@@ -0,0 +1,103 @@
+# tests/test_supervisor.py
+import os
+import re
+import signal
+import threading
+import time
+
+import pytest
+
+from supervisor import RUNNING, STOPPED, BotSupervisor
+
+# the worker processes import these bots by name (spawn passes sys.path on)
+HERE = __name__
+
+
+class _Bot:
+    def __init__(self, config, log_cb=None, event_cb=None):
+        self.config = config
+        self.log = log_cb
+        self.running = False
+
+    def start(self):
+        self.running = True
+        self.log(f"bot started in {os.getpid()}")
+
+    def stop(self):
+        self.running = False
+
+    def is_running(self):
+        return self.running
+
+
+class CrashingBot(_Bot):
+    """Takes its whole worker process down shortly after starting."""
+
+    def start(self):
+        super().start()
+        threading.Timer(0.1, os._exit, (3,)).start()
+
+
+class HangingBot(_Bot):
+    def stop(self):
+        time.sleep(60)
+
+
+@pytest.fixture
+def supervised():
+    lines = []
+    sup = BotSupervisor(log_cb=lambda worker, line: lines.append((worker, line)), backoff=0.2, max_backoff=5.0)
+    yield sup, lines
+    sup.close(timeout=2.0)
+
+
+def wait_for(predicate, timeout=30.0):
+    deadline = time.time() + timeout
+    while not predicate():
+        assert time.time() < deadline, "timed out"
+        time.sleep(0.05)
+
+
+def started(lines, name):
+    return sum(1 for worker, line in lines if worker == name and line.startswith("bot started"))
+
+
+def test_crashed_worker_restarts_with_doubling_backoff(supervised):
+    sup, lines = supervised
+    sup.add("crash", {}, factory=f"{HERE}:CrashingBot")
+    sup.start("crash")
+    wait_for(lambda: sup.status()["crash"]["restarts"] >= 2 and started(lines, "crash") >= 3)
+    delays = [float(m.group(1)) for worker, line in lines
+              if worker == "crash" and (m := re.search(r"exited with code 3, restarting in ([\d.]+)s", line))]
+    assert delays[:2] == [0.2, 0.4]
+    assert sup.status()["crash"]["last_exit"] == 3
+    sup.stop("crash", timeout=2.0)
+    assert sup.status()["crash"]["state"] == STOPPED
+
+
+def test_stop_ends_worker_within_timeout(supervised):
+    sup, lines = supervised
+    sup.add("calm", {}, factory=f"{HERE}:_Bot")
+    sup.start("calm")
+    wait_for(lambda: started(lines, "calm") == 1)
+    assert sup.status()["calm"]["state"] == RUNNING
+    t0 = time.monotonic()
+    sup.stop("calm", timeout=5.0)
+    assert time.monotonic() - t0 < 5.0
+    status = sup.status()["calm"]
+    assert (status["state"], status["last_exit"], status["pid"]) == (STOPPED, 0, None)
+    time.sleep(0.6)  # a monitor pass: a worker stopped on purpose is not restarted
+    assert sup.status()["calm"]["state"] == STOPPED and sup.status()["calm"]["restarts"] == 0
+
+
+def test_stop_terminates_a_worker_that_does_not_exit(supervised):
+    sup, lines = supervised
+    sup.add("stuck", {}, factory=f"{HERE}:HangingBot")
+    sup.start("stuck")
+    wait_for(lambda: started(lines, "stuck") == 1)
+    t0 = time.monotonic()
+    sup.stop("stuck", timeout=0.5)
+    assert time.monotonic() - t0 < 2.0  # the timeout, then terminate()
+    assert any("did not stop in 0.5s, terminating" in line for worker, line in lines if worker == "stuck")
+    status = sup.status()["stuck"]
+    assert (status["state"], status["last_exit"]) == (STOPPED, -signal.SIGTERM)
@@ -1,32 +1,71 @@
 import os
 import sys
 import time
-import ccxt
 import dotenv
 from datetime import datetime, timezone, UTC
 import threading
 import traceback
 from typing import List, Tuple, Callable, Dict, Optional
 
+import exchange_factory
+import log_writer
+from account_cache import AccountCache
+from execution import ReversalExecutor
+from metrics import REGISTRY as metrics, InstrumentedExchange
+from profiler import DEFAULT_INTERVAL as PROFILE_INTERVAL, SamplingProfiler
+from resampler import get_feed
+from scheduler import StopEvent, get_scheduler
+from indicators import graph_for
+from snapshot import DecisionJournal, SnapshotStore, check_against_exchange
+from strategies import DEFAULT_STRATEGY, feed, load_strategy
+from strategy import CONTRACT_SIZE, to_heikin_ashi, detect_trend_change, int_to_timeframe
+from streaming import CandleStream
+
 
 class TradingBot:
     """
     Core trading bot that runs in its own thread and uses a log callback to emit messages.
     - config: dict of configuration
     - log_cb: function(str) -> None
+    - event_cb: optional function(tuple) -> None for charts, called on the trading thread (keep it cheap):
+      ('candles', rows) for newly closed ccxt rows, ('trade', ts, side, price, leg) per order,
+      ('equity', ts, value) after each bar, with ts the open time of the bar that decided
+    - exchange: client to trade on instead of exchange_factory.get_exchange(), e.g. a simulator
+    Unless config LOG_ASYNC is false, log_cb runs on the process-wide log_writer thread
+    (shared by every bot), so a slow callback never delays the trading thread.
+    Each step runs config STRATEGY (strategies.py) on the closed candles of SYMBOL and
+    reverses the position through a ReversalExecutor when it signals. With BASE_TIMEFRAME
+    set, candles come from a CandleFeed (resampler.py) shared by every bot on SYMBOL,
+    so bots on several timeframes cost one base-timeframe request per bar between them.
     """
 
-    def __init__(self, config: Dict, log_cb: Optional[Callable[[str], None]] = None):
+    def __init__(self, config: Dict, log_cb: Optional[Callable[[str], None]] = None,
+                 event_cb: Optional[Callable[[tuple], None]] = None, exchange=None):
         self.config = config.copy()
         self.log_cb = log_cb or (lambda s: print(s))
+        self.event_cb = event_cb
         self._thread: Optional[threading.Thread] = None
-        self._stop_event = threading.Event()
+        self._stop_event = StopEvent()
         self._running_lock = threading.Lock()
         self._is_running = False
+        if str(self.config.get("METRICS_ENABLED", "")).lower() == "true":
+            metrics.enabled = True
+        self.strategy = None  # built with the exchange on the first step
+        self._client = exchange
+        self.executor: Optional[ReversalExecutor] = None
+        self.journal: Optional[DecisionJournal] = None
+        self.feed = None
+        self._profiler: Optional[SamplingProfiler] = None
+        self._log_writer: Optional[log_writer.LogWriter] = None
+        if str(self.config.get("LOG_ASYNC", True)).lower() != "false":
+            self._log_writer = log_writer.get_writer()  # lines are routed to log_cb only, not to the log file
 
     # helper logging
     def log(self, msg: str):
-        ts = time.strftime("%Y-%m-%d %H:%M:%S")
+        if self._log_writer is not None:
+            self._log_writer.write(msg, sink=self.log_cb)
+            return
+        ts = time.strftime(log_writer.SINK_TIME_FORMAT)
         text = f"[{ts}] {msg}"
         try:
             self.log_cb(text)
@@ -35,6 +74,31 @@ class TradingBot:
             print("Log callback error:", traceback.format_exc())
             print(text)
 
+    def emit(self, *event):
+        if self.event_cb is None:
+            return
+        try:
+            self.event_cb(event)
+        except Exception:
+            print("Event callback error:", traceback.format_exc())
+
+    def _emit_bar(self, records: List[Dict]):
+        """Chart events for the bar just decided: its orders and the equity after them."""
+        if self.event_cb is None:
+            return
+        ts = self.strategy.last_ts
+        for rec in records:
+            order = rec.get('order') or {}
+            price = order.get('average') or order.get('price') or self.strategy.graph.close
+            self.emit('trade', ts, rec['side'], float(price), rec['leg'])
+        equity = self.account.equity(self.symbol, self.strategy.graph.close)
+        if equity is not None:
+            self.emit('equity', ts, equity)
+
+    def flush_log(self, timeout: float = 5.0):
+        if self._log_writer is not None:
+            self._log_writer.flush(timeout)
+
     def start(self):
         with self._running_lock:
             if self._is_running:
@@ -53,22 +117,103 @@ class TradingBot:
                 return
             self.log("Stopping TradingBot...")
             self._stop_event.set()
-            if self._thread:
-                self._thread.join(timeout)
+            thread = self._thread
+        # join outside the lock: _run's cleanup takes it too
+        if thread:
+            thread.join(timeout)
+        with self._running_lock:
             self._is_running = False
-            self.log("TradingBot stopped")
+        self.log("TradingBot stopped")
+        if self._profiler is not None:
+            self.stop_profiling()
+        self.flush_log()
 
     def is_running(self) -> bool:
         with self._running_lock:
             return self._is_running
+
+    def metrics_summary(self) -> Dict[str, Dict]:
+        """Per-stage and per-exchange-call latency stats in seconds (empty unless METRICS_ENABLED)."""
+        return metrics.summary()
+
+    # ---- on-demand profiling ----
+    def _profiled_threads(self) -> Dict[int, str]:
+        threads = {}
+        for label, thread in (("bot", self._thread),
+                              ("log-writer", self._log_writer._thread if self._log_writer else None)):
+            if thread is not None and thread.ident is not None:
+                threads[thread.ident] = label
+        return threads
+
+    def is_profiling(self) -> bool:
+        return self._profiler is not None
+
+    def start_profiling(self, interval: float = PROFILE_INTERVAL, allocations: bool = False) -> str:
+        """Sample the bot and log-writer threads until stop_profiling(); allocations adds tracemalloc."""
+        if self._profiler is not None:
+            return "Profiler already running"
+        tags = {}
+        for fn in (self.log_cb, TradingBot.log):
+            code = getattr(fn, '__code__', None) or getattr(getattr(fn, '__func__', None), '__code__', None)
+            if code is not None:
+                tags[code] = 'log'
+        self._profiler = SamplingProfiler(self._profiled_threads, interval=float(interval), tags=tags,
+                                          allocations=allocations)
+        self._profiler.start()
+        msg = f"Profiler started ({float(interval) * 1000:.0f}ms interval{', allocations' if allocations else ''})"
+        self.log(msg)
+        return msg
+
+    def stop_profiling(self, out_dir: Optional[str] = None, top: int = 25) -> Optional[Dict[str, str]]:
+        """Stop sampling and write <name>.folded (flame graph input) and <name>.txt (top-N report)."""
+        profiler, self._profiler = self._profiler, None
+        if profiler is None:
+            return None
+        result = profiler.stop()
+        parts = (self.config.get('SYMBOL') or 'bot', self.config.get('TIMEFRAME_SECONDS'), time.strftime('%Y%m%d-%H%M%S'))
+        name = "-".join(str(p) for p in parts if p).replace('/', '_').replace(':', '_')
+        base = os.path.join(out_dir or self.config.get("PROFILE_DIR", PROFILE_DIR), name)
+        paths = {'folded': f"{base}.folded", 'report': f"{base}.txt"}
+        result.write_folded(paths['folded'])
+        with open(paths['report'], "w") as f:
+            f.write(result.report(top))
+        self.log(f"Profile written: {paths['folded']} ({result.samples} samples), report {paths['report']}")
+        return paths
+
+    def toggle_profiling(self, allocations: bool = False):
+        return self.stop_profiling() if self._profiler is not None else self.start_profiling(allocations=allocations)
     # the main loop - call your existing interval-based logic here
 
+    def _wait_next(self, started: float) -> bool:
+        """
+        Sleep on the shared scheduler until the next step; False once stop() is called.
+        POLL_INTERVAL runs steps that many seconds apart; without it steps are aligned
+        to TIMEFRAME_SECONDS bar boundaries plus CANDLE_OFFSET_SECONDS.
+        """
+        scheduler = get_scheduler()
+        if "POLL_INTERVAL" not in self.config and self.config.get("TIMEFRAME_SECONDS"):
+            offset = float(self.config.get("CANDLE_OFFSET_SECONDS", CANDLE_OFFSET_SECONDS))
+            target = scheduler.next_boundary(float(self.config["TIMEFRAME_SECONDS"]), offset)
+            prepare_at = target - offset - float(self.config.get("PREPARE_LEAD_SECONDS", PREPARE_LEAD_SECONDS))
+            if self.executor is not None and prepare_at > time.time():
+                # as run(): refresh the account and size the legs before the close, not after it
+                if not scheduler.wait_until(prepare_at, self._stop_event):
+                    return False
+                try:
+                    with metrics.timer("stage", stage="prepare"):
+                        self.executor.prepare()
+                except Exception as e:
+                    self.log(f"[WARN] Order preparation failed, will prepare on demand: {e}")
+            return scheduler.wait_until(target, self._stop_event)
+        interval = float(self.config.get("POLL_INTERVAL", 60))
+        return scheduler.wait_monotonic(started + interval, self._stop_event)
+
     def _run(self):
         try:
             self.log(f"Bot loop started with config: {self.config}")
             # Example main loop: call _run_once repeatedly until stop requested
             while not self._stop_event.is_set():
-                start_ts = time.time()
+                start_ts = time.monotonic()
                 try:
                     # PUT YOUR CORE STEP HERE:
                     # You can call self._run_once() where _run_once implements:
@@ -77,23 +222,14 @@ class TradingBot:
                     # - detect trend
                     # - place/close orders
                     # - log actions via self.log(...)
-                    self._run_once()
+                    with metrics.timer("stage", stage="cycle"):
+                        self._run_once()
                 except Exception as e:
                     self.log(f"[ERROR] run step failed: {e}")
                     self.log(traceback.format_exc())
 
-                # respect a configured polling interval if present, otherwise small sleep
-                interval = float(self.config.get("POLL_INTERVAL", 60))
-                elapsed = time.time() - start_ts
-                sleep_for = max(0.0, interval - elapsed)
-                # early exit responsiveness
-                for _ in range(int(sleep_for // 1)):
-                    if self._stop_event.is_set():
-                        break
-                    time.sleep(1)
-                else:
-                    if not self._stop_event.is_set():
-                        time.sleep(sleep_for % 1)
+                if not self._wait_next(start_ts):
+                    break
             self.log("Bot loop exiting normally")
         except Exception as e:
             self.log(f"[FATAL] unexpected exception: {e}")
@@ -101,18 +237,85 @@ class TradingBot:
         finally:
             with self._running_lock:
                 self._is_running = False
-    # Placeholder single-step run - replace with your real logic
+
+    def _setup(self):
+        """Exchange, account, executor and strategy for this bot; the strategy is seeded from history."""
+        cfg = self.config
+        self.symbol = cfg.get("SYMBOL", SYMBOL)
+        self.timeframe = int_to_timeframe(int(cfg.get("TIMEFRAME_SECONDS", TIMEFRAME_SECONDS)))
+        ex = self._client
+        if ex is None:
+            ex = exchange_factory.get_exchange(cfg.get("EXCHANGE_NAME", EXCHANGE_NAME), cfg.get("API_KEY", API_KEY),
+                                               cfg.get("API_SECRET", API_SECRET), cache_dir=CACHE_DIR,
+                                               markets_ttl=MARKETS_TTL_SECONDS)
+        if ex.market(self.symbol).get('contract', False):
+            exchange_factory.ensure_leverage(ex, self.symbol, int(cfg.get("LEVERAGE", LEVERAGE)),
+                                             cache_dir=CACHE_DIR, log_cb=self.log)
+        self.exchange = InstrumentedExchange(ex, metrics) if metrics.enabled else ex
+        self.account = AccountCache(self.exchange, [self.symbol], CONTRACT_SIZE,
+                                    reconcile_interval=RECONCILE_SECONDS, log_cb=self.log)
+        self.executor = ReversalExecutor(self.exchange, self.symbol, self.account, cfg, CONTRACT_SIZE,
+                                         mode=cfg.get("EXECUTION_MODE", EXECUTION_MODE), log_cb=self.log)
+        strategy = load_strategy(cfg.get("STRATEGY", STRATEGY), cfg.get("STRATEGY_PARAMS", STRATEGY_PARAMS))
+        graph = graph_for(self.symbol, self.timeframe)
+        strategy.bind(graph)
+        seed_limit = int(cfg.get("HA_SEED_LIMIT", HA_SEED_LIMIT))
+        self.tf_seconds = tf_seconds = int(cfg.get("TIMEFRAME_SECONDS", TIMEFRAME_SECONDS))
+        self.journal = DecisionJournal(SnapshotStore(cfg.get("SNAPSHOT_DIR", SNAPSHOT_DIR)),
+                                       cfg.get("EXCHANGE_NAME", EXCHANGE_NAME), self.symbol, self.timeframe, strategy)
+        since = (int(time.time()) // tf_seconds - seed_limit) * tf_seconds * 1000
+        # a graph another bot already feeds is live: only a fresh one is restored from disk
+        snap = self.journal.restore(since) if graph.bars == 0 else None
+        history = self.exchange.fetch_ohlcv(self.symbol, self.timeframe, limit=seed_limit)[:-1]
+        seeded, _ = feed(strategy, history)  # after a restore, only the bars closed while stopped
+        self.emit('candles', [list(c[:6]) for c in history])
+        base = cfg.get("BASE_TIMEFRAME", BASE_TIMEFRAME)
+        if base:
+            self.feed = get_feed(self.exchange, self.symbol, base)
+            self.feed.add_timeframe(self.timeframe, seed=history)
+        pos = self.account.position(self.symbol)
+        if snap:
+            self.log(f"Restored snapshot from {datetime.fromtimestamp(snap['saved_at']).isoformat()}, "
+                     f"caught up {seeded} candles")
+            for msg in check_against_exchange(snap, pos):
+                self.log(msg)
+        self.journal.position_side = pos['side'] if pos else None
+        self.strategy = strategy
+        if self.event_cb is not None:
+            self.account.refresh()  # the chart's equity is read from the cache from here on
+            self._emit_bar([])
+        self.log(f"Strategy {type(strategy).__name__} {strategy.params} on {self.symbol} {self.timeframe}, "
+                 f"seeded with {seeded} candles")
 
     def _run_once(self):
         """
-        Example placeholder. Replace this by importing and calling your actual functions
-        (fetch ohlcv, compute HA, detect trend, open/close positions).
-        Use self.log(...) to report.
+        One decision: feed the newly closed candles to the strategy and reverse on a signal, through the
+        same decide() / record_order_metrics() as run(), so snapshots and latency metrics match.
         """
-        # Example: log heartbeat and sleep
-        self.log("Heartbeat - replace _run_once with real trading logic.")
-        # If you want shorter immediate testing, set POLL_INTERVAL in config.
-        time.sleep(0.1)
+        if self.strategy is None:
+            self._setup()
+            return
+        with metrics.timer("stage", stage="candle_fetch"):
+            if self.feed is not None:
+                self.feed.poll()  # no request if another bot on this symbol already polled this bar
+                candles = self.feed.closed(self.timeframe, self.strategy.last_ts)
+            else:
+                candles = self.exchange.fetch_ohlcv(self.symbol, self.timeframe, limit=7)[:-1]
+        last_ts = self.strategy.last_ts
+        with metrics.timer("stage", stage="strategy"):
+            new_bars, trend = feed(self.strategy, candles)
+        if not new_bars:
+            self.log("No new closed candle yet")
+            return
+        records = decide(self.journal, self.executor, trend)
+        record_order_metrics(records, self.strategy.last_ts, self.tf_seconds)
+        self.emit('candles', [list(c[:6]) for c in candles if c[0] > last_ts])
+        self.log(f"{self.symbol} {self.timeframe}: {self.strategy.describe()} | signal: {trend}")
+        for rec in records:
+            self.log(f"{rec['leg'].capitalize()} order: {rec['side']} {rec['amount']} {self.symbol}, "
+                     f"rtt {rec['rtt_ms']:.0f}ms")
+        self._emit_bar(records)
+        self.account.maybe_reconcile()
 
 
 # ========== Load Config ==========
@@ -126,185 +329,250 @@ LEVERAGE = float(os.getenv("LEVERAGE", 5))
 MARGIN_PERCENT = float(os.getenv("MARGIN_PERCENT", 50))
 TIMEFRAME_SECONDS = int(os.getenv("TIMEFRAME_SECONDS", 300))  # default 5m
 CONTRACT_NUM = int(os.getenv("CONTRACT_NUM", 0))
-
-CONTRACT_SIZE = 0.0001
+HA_SEED_LIMIT = int(os.getenv("HA_SEED_LIMIT", 500))
+CANDLE_DIR = os.getenv("CANDLE_DIR", "candles")
+STREAM_MODE = os.getenv("STREAM_MODE", "false").lower() == "true"
+STREAM_GRACE_SECONDS = float(os.getenv("STREAM_GRACE_SECONDS", 1.5))
+EXECUTION_MODE = os.getenv("EXECUTION_MODE", "sequential").lower()
+PREPARE_LEAD_SECONDS = float(os.getenv("PREPARE_LEAD_SECONDS", 5))
+CACHE_DIR = os.getenv("CACHE_DIR", ".cache")
+MARKETS_TTL_SECONDS = float(os.getenv("MARKETS_TTL_SECONDS", exchange_factory.MARKETS_TTL))
+RECONCILE_SECONDS = float(os.getenv("RECONCILE_SECONDS", 300))
+SNAPSHOT_DIR = os.getenv("SNAPSHOT_DIR", ".state")
+CANDLE_OFFSET_SECONDS = float(os.getenv("CANDLE_OFFSET_SECONDS", 2))  # wait after the boundary for the bar to finalize
+METRICS_PORT = int(os.getenv("METRICS_PORT", 0))  # serve /metrics on localhost when > 0
+METRICS_FILE = os.getenv("METRICS_FILE", "")  # rewrite this file after every cycle when set
+STRATEGY = os.getenv("STRATEGY", DEFAULT_STRATEGY)  # strategies.STRATEGIES name or module:Class
+STRATEGY_PARAMS = os.getenv("STRATEGY_PARAMS", "")  # JSON object, e.g. {"fast": 12, "slow": 26}
+PROFILE_DIR = os.getenv("PROFILE_DIR", "profiles")  # where stop_profiling() writes its files
+BASE_TIMEFRAME = os.getenv("BASE_TIMEFRAME", "")  # e.g. 1m: poll only this and resample TradingBot timeframes from it
 # ========== Exchange Setup ==========
-exchange_class = getattr(ccxt, EXCHANGE_NAME)
-exchange = exchange_class({
-    'apiKey': API_KEY,
-    'secret': API_SECRET,
-    'enableRateLimit': True,
-    'options': {'defaultType': 'future'},
-})
-exchange.load_markets()
-if SYMBOL not in exchange.markets:
-    raise ValueError(f"Symbol '{SYMBOL}' not found in exchange markets")
-
-market = exchange.market(SYMBOL)
-if market.get('contract', False):
-    try:
-        exchange.set_leverage(int(LEVERAGE), SYMBOL, {'positionSide': 'LONG'})
-        exchange.set_leverage(int(LEVERAGE), SYMBOL, {'positionSide': 'SHORT'})
-    except Exception as e:
-        print(f"[WARN] Could not set leverage: {e}")
-else:
-    print(f"[WARN] {SYMBOL} is not a contract market; leverage not set.")
+# Nothing here runs at import time: the client, candle store and account cache are
+# built on first use, with markets and leverage served from CACHE_DIR when fresh.
+_exchange = None
+_candle_store = None
+_account: Optional[AccountCache] = None
+_setup_lock = threading.RLock()
+candle_streams: Dict[Tuple[str, str], CandleStream] = {}
+_stop_event = StopEvent()  # set by request_stop() to end run() without waiting out the bar
+
+
+def get_exchange():
+    global _exchange
+    with _setup_lock:
+        if _exchange is None:
+            ex = exchange_factory.get_exchange(EXCHANGE_NAME, API_KEY, API_SECRET,
+                                               cache_dir=CACHE_DIR, markets_ttl=MARKETS_TTL_SECONDS)
+            if SYMBOL not in ex.markets:
+                raise ValueError(f"Symbol '{SYMBOL}' not found in exchange markets")
+            market = ex.market(SYMBOL)
+            if market.get('contract', False):
+                exchange_factory.ensure_leverage(ex, SYMBOL, int(LEVERAGE), cache_dir=CACHE_DIR, log_cb=print)
+            else:
+                print(f"[WARN] {SYMBOL} is not a contract market; leverage not set.")
+            _exchange = InstrumentedExchange(ex, metrics) if metrics.enabled else ex
+        return _exchange
+
+
+def get_candle_store():
+    global _candle_store
+    with _setup_lock:
+        if _candle_store is None:
+            from candle_store import CandleStore  # deferred: pulls in numpy
+            _candle_store = CandleStore(get_exchange(), CANDLE_DIR)
+        return _candle_store
+
+
+def get_account() -> AccountCache:
+    global _account
+    with _setup_lock:
+        if _account is None:
+            _account = AccountCache(get_exchange(), [SYMBOL], CONTRACT_SIZE,
+                                    reconcile_interval=RECONCILE_SECONDS, log_cb=lambda m: log(m))
+        return _account
+
+
+def __getattr__(name):
+    # keeps `trading_bot.exchange` & co. working for callers while staying lazy
+    if name == 'exchange':
+        return get_exchange()
+    if name == 'candle_store':
+        return get_candle_store()
+    if name == 'account':
+        return get_account()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 # ========== Utilities ==========
 
 
 def log(msg):
-    log_filename = f"logging-{datetime.now().strftime('%Y%m%d')}.log"
-    string = f"[{datetime.now().isoformat()}] {msg}\n"
-    print(string.strip())
-    with open(log_filename, 'a') as f:
-        f.write(string)
-
-
-def int_to_timeframe(seconds: int) -> str:
-    if seconds < 60:
-        return f"{seconds}s"
-    elif seconds % 60 == 0:
-        minutes = seconds // 60
-        return f"{minutes}m"
-    else:
-        raise ValueError(
-            "Timeframe must be divisible by 60 or less than 60 seconds.")
+    # queued only; file writes and printing happen on the log writer thread (see LOG_* env vars)
+    log_writer.get_writer().write(str(msg))
 
 
-def get_candles(symbol: str, seconds: int, limit: int = 6):
-    now = int(time.time())
-    wait_time = seconds - (now % seconds) + 2
-    log(f"Waiting {wait_time}s for next finalized candle...")
-    time.sleep(wait_time)
-    tf = int_to_timeframe(seconds)
-    ohlcv = exchange.fetch_ohlcv(symbol, timeframe=tf, limit=limit)
-    return ohlcv[:-1]
-
-
-def to_heikin_ashi(candles: List[List[float]]) -> List[dict]:
-    ha_candles = []
-    for i, c in enumerate(candles):
-        o, h, l, cl = c[1:5]
-        ha_close = (o + h + l + cl) / 4
-        ha_open = (ha_candles[i-1]['open'] + ha_candles[i-1]
-                   ['close']) / 2 if i > 0 else (o + cl) / 2
-        ha_high = max(h, ha_open, ha_close)
-        ha_low = min(l, ha_open, ha_close)
-        ha_candle = {
-            'open': ha_open,
-            'high': ha_high,
-            'low': ha_low,
-            'close': ha_close
-        }
-        ha_candles.append(ha_candle)
-    return ha_candles
-
-
-def detect_trend_change(c1: dict, c2: dict) -> Tuple[bool, str]:
-    trend1 = 'up' if c1['close'] > c1['open'] else 'down'
-    trend2 = 'up' if c2['close'] > c2['open'] else 'down'
-    return trend1 != trend2, trend2
-
-
-def get_balance():
-    balance = exchange.fetch_balance()
-    return balance['total']['USDT']
-
-
-def check_position_profit():
-    positions = exchange.fetch_positions([SYMBOL])
-    for pos in positions:
-        if float(pos['contracts']) > 0:
-            entry_price = float(pos['entryPrice'])
-            mark_price = float(pos.get('markPrice')
-                               or exchange.fetch_ticker(SYMBOL)['last'])
-            side = pos['side']
-            profit = mark_price > entry_price if side == 'long' else mark_price < entry_price
-
-            log(f"--- Position Info ---")
-            log(f"Side       : {side.upper()}")
-            log(f"Entry Price: {entry_price}")
-            log(f"Mark Price : {mark_price}")
-            log(f"In Profit? : {'Yes' if profit else 'No'}")
-            return
+def make_ws_exchange():
+    import ccxt.pro as ccxtpro
+    return getattr(ccxtpro, EXCHANGE_NAME)({
+        'apiKey': API_KEY,
+        'secret': API_SECRET,
+        'options': {'defaultType': 'future'},
+    })
 
-    print("No open position.")
 
+def start_candle_stream(symbol: str, seconds: int) -> CandleStream:
+    tf = int_to_timeframe(seconds)
+    stream = candle_streams.get((symbol, tf))
+    if stream is None:
+        stream = CandleStream(make_ws_exchange, get_exchange(), symbol, tf, log, grace=STREAM_GRACE_SECONDS)
+        candle_streams[(symbol, tf)] = stream
+    stream.start()
+    return stream
 
-def get_open_position():
-    positions = exchange.fetch_positions([SYMBOL])
-    for p in positions:
-        if float(p['contracts']) > 0:
-            return p
-    return None
 
+def get_candles(symbol: str, seconds: int, limit: int = 6, before_close: Optional[Callable[[], None]] = None):
+    """
+    Wait for the next finalized candle and return the latest `limit - 1` of them.
+    before_close() is called about PREPARE_LEAD_SECONDS before the bar boundary
+    (right away in stream mode) so order preparation happens off the critical path.
+    """
+    tf = int_to_timeframe(seconds)
+    store = get_candle_store()
+    stream = candle_streams.get((symbol, tf))
+    if stream is not None:
+        if before_close:
+            before_close()
+        with metrics.timer("stage", stage="candle_wait"):
+            closed = stream.next_closed(_stop_event)
+        if not closed:
+            return []
+        bounds = store.bounds(symbol, tf)
+        if closed and bounds and closed[0][0] > bounds[1] + seconds * 1000:
+            store.sync(symbol, tf)  # the stream skipped bars; backfill them over REST
+        store.write(symbol, tf, closed)
+        return store.latest(symbol, tf, limit - 1).tolist()
+
+    scheduler = get_scheduler()
+    target = scheduler.next_boundary(seconds, CANDLE_OFFSET_SECONDS)
+    log(f"Waiting {target - time.time():.1f}s for next finalized candle...")
+    prepare_at = target - CANDLE_OFFSET_SECONDS - PREPARE_LEAD_SECONDS
+    if before_close and prepare_at > time.time():
+        with metrics.timer("stage", stage="candle_wait"):
+            if not scheduler.wait_until(prepare_at, _stop_event):
+                return []
+        try:
+            with metrics.timer("stage", stage="prepare"):
+                before_close()
+        except Exception as e:
+            log(f"[WARN] Order preparation failed, will prepare on demand: {e}")
+    with metrics.timer("stage", stage="candle_wait"):
+        if not scheduler.wait_until(target, _stop_event):
+            return []
+    with metrics.timer("stage", stage="candle_fetch"):
+        store.sync(symbol, tf)
+    return store.latest(symbol, tf, limit - 1).tolist()
 
-def close_position(pos):
-    side = 'sell' if pos['side'] == 'long' else 'buy'
-    amount = float(pos['contracts'])
-    position_side = 'LONG' if side == 'sell' else 'SHORT'
-    check_position_profit()
-    exchange.create_market_order(SYMBOL, side, amount, None, {
-        'reduceOnly': True,
-        'positionSide': position_side
-    })
-    log(f"Closed position: {side} {amount} {SYMBOL} [{position_side}]")
-
-
-def open_position(trend):
-    side = 'buy' if trend == 'up' else 'sell'
-    position_side = 'LONG' if side == 'buy' else 'SHORT'
-    last_price = exchange.fetch_ticker(SYMBOL)['last']
-    if CONTRACT_NUM > 0:  # fixed
-        amount = CONTRACT_NUM
-        exchange.create_market_order(SYMBOL, side, amount, None, {
-            'positionSide': position_side
-        })
-        log(f"Opened position: {side} {amount} {SYMBOL} [{position_side}]")
-        log(f'Volume: {amount*CONTRACT_SIZE*last_price}')
-    else:
-        usdt_balance = get_balance()
-        margin = usdt_balance * (MARGIN_PERCENT / 100)
-        position_size = margin * LEVERAGE
-        amount = int(position_size / (last_price * CONTRACT_SIZE))
-        exchange.create_market_order(SYMBOL, side, amount, None, {
-            'positionSide': position_side
-        })
-        log(f"Opened position: {side} {amount} {SYMBOL} [{position_side}]")
-        log(f'With data:\nusdt_balance: {usdt_balance}, margin: {(amount*CONTRACT_SIZE*last_price)/LEVERAGE}, position size: {amount*CONTRACT_SIZE*last_price}')
 
 # ========== Main Loop ==========
 
 
+def decide(journal: DecisionJournal, executor: ReversalExecutor, trend: Optional[str]) -> List[Dict]:
+    """
+    Act on the strategy's last bar: reverse on a signal unless that bar was already decided,
+    with a write-ahead snapshot so a crash mid-send is detected instead of repeated after a restart.
+    Returns the order records (empty without a trade).
+    """
+    records = []
+    if trend is not None and journal.is_new():
+        journal.intent(trend)
+        with metrics.timer("stage", stage="execute"):
+            records = executor.execute(trend)
+    journal.decided(trend, records)
+    return records
+
+
+def record_order_metrics(records: List[Dict], bar_ts: int, timeframe_seconds: int):
+    """close_to_fill and order latency per leg for the orders sent on the bar opened at bar_ts."""
+    close_time = (bar_ts + timeframe_seconds * 1000) / 1000
+    for rec in records:
+        metrics.observe("close_to_fill", rec['acked_at'] - close_time, leg=rec['leg'])
+        metrics.observe("order", rec['rtt_ms'] / 1000, leg=rec['leg'])
+    if metrics.enabled and METRICS_FILE:
+        metrics.write_file(METRICS_FILE)
+
+
 def run():
     log("Bot started")
-    last_candle_time = 0
-
-    while True:
+    tf = int_to_timeframe(TIMEFRAME_SECONDS)
+    strategy = load_strategy(STRATEGY, STRATEGY_PARAMS)
+    graph = graph_for(SYMBOL, tf)
+    strategy.bind(graph)
+    since = (int(time.time()) // TIMEFRAME_SECONDS - HA_SEED_LIMIT) * TIMEFRAME_SECONDS * 1000
+    store = get_candle_store()
+    account = get_account()
+    journal = DecisionJournal(SnapshotStore(SNAPSHOT_DIR), EXCHANGE_NAME, SYMBOL, tf, strategy)
+    snap = journal.restore(since)
+    if snap:
+        # warm restart: continue the indicators and only catch up on bars closed while stopped
+        store.sync(SYMBOL, tf)
+        caught_up, _ = feed(strategy, store.read(SYMBOL, tf, since=graph.last_ts + 1).tolist())
+        log(f"Restored snapshot from {datetime.fromtimestamp(snap['saved_at']).isoformat()}, "
+            f"caught up {caught_up} candles")
+        for msg in check_against_exchange(snap, account.position(SYMBOL)):
+            log(msg)
+    else:
+        store.sync(SYMBOL, tf, since=since)
+        seeded, _ = feed(strategy, store.read(SYMBOL, tf, since=since).tolist())
+        log(f"Seeded strategy {type(strategy).__name__} {strategy.params} with {seeded} candles")
+    pos = account.position(SYMBOL)
+    journal.position_side = pos['side'] if pos else None
+    if STREAM_MODE:
+        start_candle_stream(SYMBOL, TIMEFRAME_SECONDS)
+    executor = ReversalExecutor(get_exchange(), SYMBOL, account, {
+        "CONTRACT_NUM": CONTRACT_NUM,
+        "MARGIN_PERCENT": MARGIN_PERCENT,
+        "LEVERAGE": LEVERAGE,
+    }, CONTRACT_SIZE, mode=EXECUTION_MODE, log_cb=log)
+    if metrics.enabled and METRICS_PORT:
+        metrics.serve(METRICS_PORT)
+        log(f"Serving metrics on http://127.0.0.1:{METRICS_PORT}/metrics")
+
+    while not _stop_event.is_set():
         try:
-            candles = get_candles(SYMBOL, 300, limit=6)
-            if candles[-1][0] == last_candle_time:
-                time.sleep(5)
+            candles = get_candles(SYMBOL, TIMEFRAME_SECONDS, limit=6, before_close=executor.prepare)
+            if _stop_event.is_set():
+                break
+            if candles and strategy.last_ts and candles[0][0] > strategy.last_ts + TIMEFRAME_SECONDS * 1000:
+                log("[WARN] Missed candles since last cycle; indicators may drift")
+            with metrics.timer("stage", stage="strategy"):
+                new_bars, new_trend = feed(strategy, candles)
+            if not new_bars:
+                _stop_event.wait(5)
                 continue
-            last_candle_time = candles[-1][0]
-            ha = to_heikin_ashi(candles)
-            log("Latest regular and HA candles:")
-            for i in range(len(ha)):
-                ts = datetime.fromtimestamp(
-                    candles[i][0]/1000, UTC).strftime('%Y-%m-%d %H:%M')
-                log(f"[{ts}] Regular: O={candles[i][1]} C={candles[i][4]} | HA: O={ha[i]['open']:.2f} C={ha[i]['close']:.2f}")
+            # orders go out before any logging so nothing sits between the candle close and the fill
+            records = decide(journal, executor, new_trend)
+            record_order_metrics(records, strategy.last_ts, TIMEFRAME_SECONDS)
 
-            trend_changed, new_trend = detect_trend_change(ha[-2], ha[-1])
-            log(f"Trend changed: {trend_changed}, New trend: {new_trend}")
-
-            if trend_changed:
-                open_pos = get_open_position()
-                if open_pos:
-                    close_position(open_pos)
-                open_position(new_trend)
+            log("Latest candles:")
+            for c in graph.candles:
+                ts = datetime.fromtimestamp(
+                    c[0]/1000, UTC).strftime('%Y-%m-%d %H:%M')
+                log(f"[{ts}] Regular: O={c[1]} C={c[4]}")
+            log(f"{type(strategy).__name__}: {strategy.describe()}")
+            if new_trend is None:
+                continue
+            log(f"Signal: reverse to {new_trend}")
+            for rec in records:
+                log(f"{rec['leg'].capitalize()} order: {rec['side']} {rec['amount']} {SYMBOL} "
+                    f"sent {(rec['sent_at'] - rec['prepared_at']):.2f}s after prepare, rtt {rec['rtt_ms']:.0f}ms")
+            account.maybe_reconcile()
         except KeyboardInterrupt:
             log(f"Graceful exit ....")
             sys.exit(0)
+    log("Bot stopped")
+
+
+def request_stop():
+    """Make run() return at once, even mid-wait for a candle."""
+    _stop_event.set()
 
 
 if __name__ == '__main__':
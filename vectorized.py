@@ -0,0 +1,84 @@
+# vectorized.py
+"""
+Array-based Heikin-Ashi and trend-flip detection for bulk history.
+
+Takes an (N, 6) OHLCV array laid out like ccxt rows
+(timestamp, open, high, low, close, volume) and gives exactly the same
+numbers as trading_bot.to_heikin_ashi / detect_trend_change.
+"""
+from itertools import accumulate
+from typing import Tuple
+
+import numpy as np
+
+TS, OPEN, HIGH, LOW, CLOSE, VOLUME = range(6)
+
+UP = 1
+DOWN = -1
+
+
+def heikin_ashi_array(ohlcv) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """Return (ha_open, ha_high, ha_low, ha_close) float64 columns."""
+    data = np.asarray(ohlcv, dtype=np.float64)
+    if data.ndim != 2 or data.shape[1] < 5:
+        raise ValueError(f"Expected an (N, 6) OHLCV array, got shape {data.shape}")
+    o, h, l, c = data[:, OPEN], data[:, HIGH], data[:, LOW], data[:, CLOSE]
+    n = len(data)
+
+    # same left-to-right summation as the scalar version, so the floats match bit for bit
+    ha_close = (o + h + l + c) / 4
+    if n == 0:
+        return ha_close.copy(), ha_close.copy(), ha_close.copy(), ha_close
+    # ha_open[i] depends on ha_open[i-1], so it is the only sequential part. The step still runs
+    # as Python once per row (~0.3us); every other column is pure NumPy. A closed form
+    # (0.5**i weights via lfilter or cumsum) would be faster but rounds differently, and the
+    # results must match the scalar path bit for bit.
+    seed = (o[0] + c[0]) / 2
+    ha_open = np.fromiter(
+        accumulate(ha_close[:-1].tolist(), lambda prev_open, prev_close: (prev_open + prev_close) / 2,
+                   initial=float(seed)),
+        dtype=np.float64, count=n)
+    ha_high = np.maximum(np.maximum(h, ha_open), ha_close)
+    ha_low = np.minimum(np.minimum(l, ha_open), ha_close)
+    return ha_open, ha_high, ha_low, ha_close
+
+
+def trend_flips(ha_open: np.ndarray, ha_close: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Return (flips, direction).
+    - direction[i]: UP (1) if the HA candle closed above its open, else DOWN (-1)
+    - flips[i]: detect_trend_change(ha[i-1], ha[i])[0]; always False for the first row
+    """
+    direction = np.where(ha_close > ha_open, UP, DOWN).astype(np.int8)
+    flips = np.zeros(len(direction), dtype=bool)
+    np.not_equal(direction[1:], direction[:-1], out=flips[1:])
+    return flips, direction
+
+
+def ha_signals(ohlcv):
+    """Heikin-Ashi columns plus the trend-flip mask and direction in one call."""
+    ha_open, ha_high, ha_low, ha_close = heikin_ashi_array(ohlcv)
+    flips, direction = trend_flips(ha_open, ha_close)
+    return ha_open, ha_high, ha_low, ha_close, flips, direction
+
+
+def resample_ohlcv(ohlcv, seconds: int) -> np.ndarray:
+    """
+    Aggregate time-sorted OHLCV rows into `seconds`-wide bars aligned to the epoch,
+    the same way the exchange builds higher timeframes.
+    """
+    data = np.asarray(ohlcv, dtype=np.float64)
+    if len(data) == 0:
+        return data.reshape(0, 6)
+    step = seconds * 1000
+    bucket = data[:, TS] // step * step
+    starts = np.flatnonzero(np.r_[True, bucket[1:] != bucket[:-1]])
+    ends = np.r_[starts[1:] - 1, len(data) - 1]
+    out = np.empty((len(starts), 6), dtype=np.float64)
+    out[:, TS] = bucket[starts]
+    out[:, OPEN] = data[starts, OPEN]
+    out[:, HIGH] = np.maximum.reduceat(data[:, HIGH], starts)
+    out[:, LOW] = np.minimum.reduceat(data[:, LOW], starts)
+    out[:, CLOSE] = data[ends, CLOSE]
+    out[:, VOLUME] = np.add.reduceat(data[:, VOLUME], starts)
+    return out